@@ -1,10 +1,11 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate, upgrade
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
+import tempfile
 from .extensions import db, bcrypt #, mail
+from .services.database import engine_options, install_pool_metrics
 
 
 # Load environment variables
@@ -19,6 +20,102 @@ def create_app():
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY')
+    app.config['ISSUES_PAGE_SIZE'] = int(os.environ.get('ISSUES_PAGE_SIZE', 50))
+    app.config['ISSUES_MAX_PAGE_SIZE'] = int(os.environ.get('ISSUES_MAX_PAGE_SIZE', 200))
+    # 'memory' keeps a k-d tree of workers in process, 'postgis' queries ST_Distance every time
+    app.config['WORKER_LOCATOR_BACKEND'] = os.environ.get('WORKER_LOCATOR_BACKEND', 'memory')
+    app.config['WORKER_INDEX_REFRESH_SECONDS'] = int(os.environ.get('WORKER_INDEX_REFRESH_SECONDS', 300))
+    # A worker's score is distance in meters plus this penalty per open issue they hold
+    app.config['DISPATCH_LOAD_PENALTY_METERS'] = float(os.environ.get('DISPATCH_LOAD_PENALTY_METERS', 1000))
+    app.config['DISPATCH_CANDIDATES'] = int(os.environ.get('DISPATCH_CANDIDATES', 10))
+    app.config['DISPATCH_LOAD_REFRESH_SECONDS'] = int(os.environ.get('DISPATCH_LOAD_REFRESH_SECONDS', 60))
+    # Most issues one POST /issues/dispatch call assigns, whatever 'limit' it asks for
+    app.config['DISPATCH_MAX_BATCH'] = int(os.environ.get('DISPATCH_MAX_BATCH', 5000))
+    # 'sync' runs uploads, Gemini and assignment inside POST /api/issues, 'async' hands them to the job queue
+    app.config['ISSUE_PIPELINE_MODE'] = os.environ.get('ISSUE_PIPELINE_MODE', 'sync')
+    app.config['JOB_QUEUE_BACKEND'] = os.environ.get('JOB_QUEUE_BACKEND', 'thread')
+    app.config['JOB_QUEUE_PATH'] = os.environ.get('JOB_QUEUE_PATH', os.path.join(tempfile.gettempdir(), 'civic-jobs.sqlite3'))
+    app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+    app.config['UPLOAD_SPOOL_DIR'] = os.environ.get('UPLOAD_SPOOL_DIR', os.path.join(tempfile.gettempdir(), 'civic-uploads'))
+    # 'vercel' uploads photos to Vercel Blob, 'local' streams them into LOCAL_BLOB_DIR
+    app.config['BLOB_STORAGE_BACKEND'] = os.environ.get('BLOB_STORAGE_BACKEND', 'vercel')
+    app.config['LOCAL_BLOB_DIR'] = os.environ.get('LOCAL_BLOB_DIR', os.path.join(tempfile.gettempdir(), 'civic-blobs'))
+    app.config['LOCAL_BLOB_BASE_URL'] = os.environ.get('LOCAL_BLOB_BASE_URL')
+    app.config['UPLOAD_MAX_WORKERS'] = int(os.environ.get('UPLOAD_MAX_WORKERS', 4))
+    app.config['UPLOAD_TIMEOUT_SECONDS'] = int(os.environ.get('UPLOAD_TIMEOUT_SECONDS', 10))
+    # Gemini results are cached in memory and in the categorization_cache table
+    app.config['CATEGORIZATION_CACHE_SIZE'] = int(os.environ.get('CATEGORIZATION_CACHE_SIZE', 1024))
+    app.config['CATEGORIZATION_CACHE_TTL_SECONDS'] = int(os.environ.get('CATEGORIZATION_CACHE_TTL_SECONDS', 7 * 86400))
+    app.config['CATEGORIZATION_CACHE_MAX_ROWS'] = int(os.environ.get('CATEGORIZATION_CACHE_MAX_ROWS', 100000))
+    app.config['CATEGORIZATION_CACHE_PERSISTENT'] = os.environ.get('CATEGORIZATION_CACHE_PERSISTENT', 'true').lower() in ['true', 'on', '1']
+    # Reports the local classifier is at least this sure about skip the Gemini call. Off by
+    # default: the keyword-seeded model is too coarse, enable it with a trained CLASSIFIER_MODEL_PATH
+    app.config['CLASSIFIER_ENABLED'] = os.environ.get('CLASSIFIER_ENABLED', 'false').lower() in ['true', 'on', '1']
+    app.config['CLASSIFIER_CONFIDENCE'] = float(os.environ.get('CLASSIFIER_CONFIDENCE', 0.75))
+    app.config['CLASSIFIER_MODEL_PATH'] = os.environ.get('CLASSIFIER_MODEL_PATH')
+    # token_required serves user snapshots from memory for up to this long; 0 disables the cache
+    app.config['PRINCIPAL_CACHE_SIZE'] = int(os.environ.get('PRINCIPAL_CACHE_SIZE', 4096))
+    app.config['PRINCIPAL_CACHE_TTL_SECONDS'] = int(os.environ.get('PRINCIPAL_CACHE_TTL_SECONDS', 30))
+    # bcrypt work factor of new hashes; older hashes are upgraded on the next successful login
+    app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    # Processes that run bcrypt (0 hashes on the request thread), and how many hashes may be in flight at once.
+    # Serverless functions are too short-lived to pay for starting a pool, so Vercel hashes inline by default.
+    # Elsewhere every app instance (e.g. each gunicorn worker) gets its own pool, so the default stays at one
+    # process; size it as cores / instances
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 0 if os.environ.get('VERCEL') else 1))
+    app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 4 * (os.cpu_count() or 1)))
+    app.config['PASSWORD_HASH_WAIT_SECONDS'] = float(os.environ.get('PASSWORD_HASH_WAIT_SECONDS', 2))
+    # Rows checked, hashed and inserted together by POST /api/users/import
+    app.config['USER_IMPORT_BATCH_SIZE'] = int(os.environ.get('USER_IMPORT_BATCH_SIZE', 500))
+    # Rows fetched per round trip by GET /api/issues/export
+    app.config['EXPORT_BATCH_SIZE'] = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+    # 'memory' caches GET /api/issues/public/recent per process, 'sqlite' shares it between processes, 'none' turns it off
+    app.config['RESPONSE_CACHE_BACKEND'] = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+    app.config['RESPONSE_CACHE_PATH'] = os.environ.get('RESPONSE_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'civic-responses.sqlite3'))
+    app.config['RECENT_FEED_CACHE_TTL_SECONDS'] = int(os.environ.get('RECENT_FEED_CACHE_TTL_SECONDS', 10))
+    # Caps of the public map queries: issues returned, search radius, and candidates read per duplicate check
+    app.config['MAP_MAX_RESULTS'] = int(os.environ.get('MAP_MAX_RESULTS', 500))
+    app.config['MAP_MAX_RADIUS_METERS'] = float(os.environ.get('MAP_MAX_RADIUS_METERS', 50000))
+    app.config['MAP_MAX_CANDIDATES'] = int(os.environ.get('MAP_MAX_CANDIDATES', 20000))
+    # Cells returned at most by GET /api/issues/public/clusters, and how long each tile stays in the response cache
+    app.config['MAP_MAX_CLUSTERS'] = int(os.environ.get('MAP_MAX_CLUSTERS', 256))
+    app.config['MAP_CLUSTER_CACHE_TTL_SECONDS'] = int(os.environ.get('MAP_CLUSTER_CACHE_TTL_SECONDS', 60))
+    # A new report within this distance and age of an open issue, and at least this similar, becomes a comment on it
+    app.config['DUPLICATE_DETECTION_ENABLED'] = os.environ.get('DUPLICATE_DETECTION_ENABLED', 'true').lower() in ['true', 'on', '1']
+    app.config['DUPLICATE_RADIUS_METERS'] = float(os.environ.get('DUPLICATE_RADIUS_METERS', 50))
+    app.config['DUPLICATE_WINDOW_DAYS'] = int(os.environ.get('DUPLICATE_WINDOW_DAYS', 14))
+    app.config['DUPLICATE_SIMILARITY'] = float(os.environ.get('DUPLICATE_SIMILARITY', 0.4))
+    # The Gemini SDK is only imported when a report first needs the model
+    app.config['GEMINI_API_KEY'] = os.environ.get('GEMINI_API_KEY')
+    app.config['GEMINI_MODEL'] = os.environ.get('GEMINI_MODEL', 'gemini-2.5-flash')
+    # Migrations run in the build step (`vercel-build`) or with `flask db upgrade`; set this to also run them in create_app
+    app.config['MIGRATE_ON_STARTUP'] = os.environ.get('MIGRATE_ON_STARTUP', 'false').lower() in ['true', 'on', '1']
+    # 'queue' keeps up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections per instance, 'null' opens one per
+    # checkout for PgBouncer (Neon's -pooler endpoints), 'auto' picks by host. SQLite URLs keep SQLAlchemy's defaults.
+    app.config['DB_POOL_MODE'] = os.environ.get('DB_POOL_MODE', 'auto')
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 1 if os.environ.get('VERCEL') else 5))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 2 if os.environ.get('VERCEL') else 10))
+    app.config['DB_POOL_TIMEOUT'] = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+    # Neon closes connections of a compute it suspends after 5 idle minutes
+    app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 300))
+    app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ['true', 'on', '1']
+    app.config['DB_CONNECT_TIMEOUT'] = int(os.environ.get('DB_CONNECT_TIMEOUT', 5))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    # Opt-in: Server-Timing headers and Prometheus metrics at /api/admin/metrics. PROFILE_SAMPLE_RATE of
+    # requests also run under cProfile, and those slower than PROFILE_SLOW_REQUEST_MS are dumped to PROFILE_DIR
+    app.config['PROFILING_ENABLED'] = os.environ.get('PROFILING_ENABLED', 'false').lower() in ['true', 'on', '1']
+    app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    app.config['PROFILE_SLOW_REQUEST_MS'] = float(os.environ.get('PROFILE_SLOW_REQUEST_MS', 500))
+    app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'civic-profiles'))
+    app.config['PROFILE_KEEP'] = int(os.environ.get('PROFILE_KEEP', 50))
+    # Development and staging: report SQL shapes repeated more than QUERY_N_PLUS_ONE_THRESHOLD times in one
+    # request, statements slower than SLOW_QUERY_MS and requests over QUERY_BUDGET statements (0 = no budget).
+    # QUERY_INSPECTOR_STRICT raises QueryBudgetExceeded instead, so tests fail on a regression
+    app.config['QUERY_INSPECTOR_ENABLED'] = os.environ.get('QUERY_INSPECTOR_ENABLED', 'false').lower() in ['true', 'on', '1']
+    app.config['QUERY_N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('QUERY_N_PLUS_ONE_THRESHOLD', 5))
+    app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', 100))
+    app.config['QUERY_BUDGET'] = int(os.environ.get('QUERY_BUDGET', 0))
+    app.config['QUERY_INSPECTOR_STRICT'] = os.environ.get('QUERY_INSPECTOR_STRICT', 'false').lower() in ['true', 'on', '1']
     #app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
     #app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
     #app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', 'true').lower() in ['true', 'on', '1']
@@ -29,16 +126,29 @@ def create_app():
 
     #mail.init_app(app)
     db.init_app(app)
-    Migrate(app, db)
+    install_pool_metrics(app)
+    if app.config['PROFILING_ENABLED']:
+        from .services.profiling import init_profiling
+        init_profiling(app)
+    if app.config['QUERY_INSPECTOR_ENABLED']:
+        from .services.query_inspector import init_query_inspector
+        init_query_inspector(app)
 
+    # Flask-Migrate pulls in Alembic, which serving requests never needs. The flask
+    # CLI sets FLASK_RUN_FROM_CLI before it loads the app, so `flask db` still works.
+    if os.environ.get('FLASK_RUN_FROM_CLI') == 'true' or app.config['MIGRATE_ON_STARTUP']:
+        from flask_migrate import Migrate
+        Migrate(app, db)
 
-    with app.app_context():
-        try:
-            print("🔄 Running database migrations...")
-            upgrade()
-            print("✅ Database is up to date.")
-        except Exception as e:
-            print(f"⚠️ Skipping migration due to error: {e}")
+    if app.config['MIGRATE_ON_STARTUP']:
+        from flask_migrate import upgrade
+        with app.app_context():
+            try:
+                print("🔄 Running database migrations...")
+                upgrade()
+                print("✅ Database is up to date.")
+            except Exception as e:
+                print(f"⚠️ Skipping migration due to error: {e}")
 
     from .routes.auth import auth_bp
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -49,4 +159,19 @@ def create_app():
     from .routes.issues import issues_bp
     app.register_blueprint(issues_bp, url_prefix='/api/issues')
 
+    from .routes.admin import admin_bp
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+
+    from .services.jobs import jobs_cli
+    app.cli.add_command(jobs_cli)
+
+    from .services.classifier import classifier_cli
+    app.cli.add_command(classifier_cli)
+
+    from .services.issue_stats import stats_cli
+    app.cli.add_command(stats_cli)
+
+    from .services.search import search_cli
+    app.cli.add_command(search_cli)
+
     return app
\ No newline at end of file
@@ -1,6 +1,10 @@
-from .extensions import db, bcrypt
+from .extensions import db
+from .services.passwords import get_password_hasher
+from .utils.geohash import encode as encode_geohash
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import event, DDL
+from sqlalchemy.orm import joinedload, selectinload
 import uuid
 from datetime import datetime
 import enum
@@ -19,6 +23,17 @@ class IssueStatus(enum.Enum):
     ForReview = 'For Review'
     Resolved = 'Resolved'
 
+# Values of Issue.processing_state while the asynchronous pipeline owns the issue
+PROCESSING = 'processing'
+PROCESSING_FAILED = 'failed'
+
+# Values of Issue.category_source: who picked the category. The local classifier
+# only trains on the first two, never on its own guesses. 'admin' is for categories
+# corrected by hand in the database; the API has no endpoint that sets it.
+CATEGORY_SOURCE_GEMINI = 'gemini'
+CATEGORY_SOURCE_ADMIN = 'admin'
+CATEGORY_SOURCE_CLASSIFIER = 'classifier'
+
 class Comment(db.Model):
     __tablename__ = 'comments'
     id = db.Column(db.Integer, primary_key=True)
@@ -28,6 +43,11 @@ class Comment(db.Model):
     issue_id = db.Column(db.String(8), db.ForeignKey('issues.public_id'), nullable=False)
     author_name = db.Column(db.String(150), nullable=False)
 
+    __table_args__ = (
+        # Loading the comments of a set of issues in creation order
+        db.Index('ix_comments_issue_id_created_at', issue_id, created_at),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -37,6 +57,19 @@ class Comment(db.Model):
             'authorName': f"{self.author.first_name} {self.author.last_name}"
         }
 
+def search_document(title, description, comment_texts=()):
+    """The text full-text search indexes for an issue: title, description and comments."""
+    return "\n".join([title or "", description or "", *comment_texts])
+
+def _issue_search_document(context):
+    params = context.get_current_parameters()
+    return search_document(params['title'], params['description'])
+
+def _issue_geohash(context):
+    """Column default of Issue.geohash, so Core and bulk inserts get one too."""
+    params = context.get_current_parameters()
+    return encode_geohash(params['location_lat'], params['location_lng'])
+
 class Issue(db.Model):
     __tablename__ = 'issues'
     id = db.Column(db.Integer, primary_key=True)
@@ -45,6 +78,8 @@ class Issue(db.Model):
     title = db.Column(db.String(150), nullable=False)
     description = db.Column(db.Text, nullable=False)
     category = db.Column(db.String(50), nullable=False)
+    # One of the CATEGORY_SOURCE_* values, NULL for placeholders, fallbacks and issues older than the column
+    category_source = db.Column(db.String(20), nullable=True)
     photo_urls = db.Column(db.JSON, nullable=True) # Storing a list of photo URLs
     location_lat = db.Column(db.Float, nullable=False)
     location_lng = db.Column(db.Float, nullable=False)
@@ -55,9 +90,42 @@ class Issue(db.Model):
     rating = db.Column(db.Integer, nullable=True)
     reporter_name = db.Column(db.String(150), nullable=False)
     assigned_to_name = db.Column(db.String(150), nullable=True)
-    
+    # Set while photos, categorization and assignment are still being processed in the background
+    processing_state = db.Column(db.String(20), nullable=True)
+    # Bumped by every UPDATE of the row, ORM or bulk, and used for ETag / Last-Modified
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1, onupdate=db.text('version + 1'))
+    # Geohash of the location; map queries turn a box into a few prefix ranges on its index
+    geohash = db.Column(db.String(12), nullable=True, default=_issue_geohash)
+    # Title, description and comment texts, indexed for full-text search (see SEARCH_INDEX_DDL)
+    search_document = db.Column(db.Text, nullable=True, default=_issue_search_document)
+
+    # Every listing is ordered by (created_at, id) newest first, usually scoped
+    # to a reporter, a worker or a status, so the indexes follow that shape.
+    __table_args__ = (
+        db.Index('ix_issues_created_at_id', created_at.desc(), id.desc()),
+        db.Index('ix_issues_reporter_id_created_at', reporter_id, created_at.desc(), id.desc()),
+        db.Index('ix_issues_assigned_to_id_created_at', assigned_to_id, created_at.desc(), id.desc()),
+        db.Index('ix_issues_status_created_at', status, created_at.desc()),
+        db.Index('ix_issues_geohash', geohash),
+    )
+
     # Relationships
     comments = db.relationship('Comment', backref='issue', lazy=True, cascade="all, delete-orphan")
+    duplicate_reports = db.relationship('DuplicateReport', backref='issue', lazy='dynamic', cascade="all, delete-orphan")
+
+    @classmethod
+    def query_for_serialization(cls):
+        """
+        Returns an Issue query that eagerly loads everything to_dict() touches.
+        Reporters and workers are joined in, comments and their authors come in one
+        extra SELECT ... IN query, so a page of issues costs two queries in total.
+        """
+        return cls.query.options(
+            joinedload(cls.reporter),
+            joinedload(cls.assigned_worker),
+            selectinload(cls.comments).joinedload(Comment.author)
+        )
 
     def to_dict(self):
         """Serializes the Issue object to a dictionary."""
@@ -78,9 +146,19 @@ class Issue(db.Model):
             'assignedTo': self.assigned_worker.email if self.assigned_worker else None,
             'assignedToName': f"{self.assigned_worker.first_name} {self.assigned_worker.last_name}" if self.assigned_worker else None,
             'comments': [comment.to_dict() for comment in self.comments],
-            'rating': self.rating
+            'rating': self.rating,
+            'processingState': self.processing_state,
+            'updatedAt': self.updated_at.isoformat() + 'Z' if self.updated_at else None
         }
 
+    def touch(self):
+        """Marks the issue as changed when only related rows (e.g. comments) were modified."""
+        self.updated_at = datetime.datetime.utcnow()
+
+    def refresh_search_document(self):
+        """Re-renders search_document after the title, description or comments changed."""
+        self.search_document = search_document(self.title, self.description, [comment.text for comment in self.comments])
+
 class User(db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
@@ -92,17 +170,27 @@ class User(db.Model):
     role = db.Column(db.Enum(UserRole), nullable=False, default=UserRole.Citizen)
     location_lat = db.Column(db.Float, nullable=True)
     location_lng = db.Column(db.Float, nullable=True)
-    
+
+    __table_args__ = (
+        # Partial index covering only the rows the nearest-worker lookup scans
+        db.Index(
+            'ix_users_worker_location', location_lat, location_lng,
+            postgresql_where=db.text("role = 'Worker' AND location_lat IS NOT NULL AND location_lng IS NOT NULL"),
+            sqlite_where=db.text("role = 'Worker' AND location_lat IS NOT NULL AND location_lng IS NOT NULL")
+        ),
+    )
+
     # Relationships
     reported_issues = db.relationship('Issue', foreign_keys='Issue.reporter_id', backref='reporter', lazy='dynamic')
     assigned_issues = db.relationship('Issue', foreign_keys='Issue.assigned_to_id', backref='assigned_worker', lazy='dynamic')
     comments = db.relationship('Comment', backref='author', lazy='dynamic')
 
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        # Hashing runs in the shared process pool and may raise PasswordHasherBusy
+        self.password_hash = get_password_hasher().hash(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return get_password_hasher().verify(self.password_hash, password)
 
     def to_dict(self):
         """Serializes the User object to a dictionary, omitting the password."""
@@ -116,4 +204,65 @@ class User(db.Model):
                 'lat': self.location_lat,
                 'lng': self.location_lng
             } if self.location_lat is not None and self.location_lng is not None else None
-        }
\ No newline at end of file
+        }
+
+class DuplicateReport(db.Model):
+    """
+    A report that duplicate detection folded into an existing issue instead of
+    creating a new one. Kept for every duplicate, whoever sent it, so repeat
+    reports still count towards the issue.
+    """
+    __tablename__ = 'duplicate_reports'
+    id = db.Column(db.Integer, primary_key=True)
+    issue_id = db.Column(db.String(8), db.ForeignKey('issues.public_id'), nullable=False, index=True)
+    reporter_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    location_lat = db.Column(db.Float, nullable=False)
+    location_lng = db.Column(db.Float, nullable=False)
+    similarity = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+class CategorizationCacheEntry(db.Model):
+    """Persistent tier of the Gemini categorization cache, keyed by a content hash."""
+    __tablename__ = 'categorization_cache'
+    key = db.Column(db.String(64), primary_key=True)
+    category = db.Column(db.String(50), nullable=False)
+    title = db.Column(db.String(150), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow, index=True)
+
+class IssueStatsBucket(db.Model):
+    """
+    Rollup of issue counts and ratings, one row per (dimension, bucket), e.g.
+    ('status', 'Pending') or ('week', '2026-10-12'). Kept up to date by
+    services.issue_stats whenever an issue is created or changed.
+    """
+    __tablename__ = 'issue_stats'
+    dimension = db.Column(db.String(20), primary_key=True)
+    bucket = db.Column(db.String(64), primary_key=True)
+    issue_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+
+# The search index over issues.search_document is dialect specific, so it is
+# created here rather than declared on the table (see migration b9e4f7a2d315):
+# a GIN expression index on Postgres, an FTS5 table kept in sync by triggers on SQLite.
+SEARCH_VECTOR_SQL = "to_tsvector('english', coalesce(search_document, ''))"
+SEARCH_INDEX_DDL = {
+    'postgresql': [
+        f"CREATE INDEX IF NOT EXISTS ix_issues_search_document ON issues USING gin ({SEARCH_VECTOR_SQL})",
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS issues_fts USING fts5("
+        "search_document, content='issues', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS issues_fts_insert AFTER INSERT ON issues BEGIN "
+        "INSERT INTO issues_fts (rowid, search_document) VALUES (new.id, new.search_document); END",
+        "CREATE TRIGGER IF NOT EXISTS issues_fts_delete AFTER DELETE ON issues BEGIN "
+        "INSERT INTO issues_fts (issues_fts, rowid, search_document) VALUES ('delete', old.id, old.search_document); END",
+        "CREATE TRIGGER IF NOT EXISTS issues_fts_update AFTER UPDATE OF search_document ON issues BEGIN "
+        "INSERT INTO issues_fts (issues_fts, rowid, search_document) VALUES ('delete', old.id, old.search_document); "
+        "INSERT INTO issues_fts (rowid, search_document) VALUES (new.id, new.search_document); END",
+    ],
+}
+for dialect, statements in SEARCH_INDEX_DDL.items():
+    for statement in statements:
+        event.listen(Issue.__table__, 'after_create', DDL(statement).execute_if(dialect=dialect))
@@ -0,0 +1,51 @@
+from flask import Blueprint, Response, jsonify, current_app
+from ..utils.decorators import token_required, role_required
+from ..models import UserRole
+from ..services.database import pool_stats
+from ..services.profiling import render_metrics
+
+admin_bp = Blueprint('admin_bp', __name__)
+
+# Extensions that expose a stats() method, keyed by the name they are reported under
+CACHE_EXTENSIONS = {
+    'categorization': 'categorization_cache',
+    'principals': 'principal_cache',
+    'responses': 'response_cache',
+}
+
+@admin_bp.route('/caches/', methods=['GET'])
+@token_required
+@role_required(UserRole.Admin)
+def get_cache_stats(current_user):
+    """
+    [Admin only] Returns hit/miss counters of the in-process caches of this instance.
+    Caches that have not been used yet are omitted.
+    """
+    stats = {}
+    for name, extension in CACHE_EXTENSIONS.items():
+        cache = current_app.extensions.get(extension)
+        if cache is not None:
+            stats[name] = cache.stats()
+    return jsonify(stats), 200
+
+@admin_bp.route('/db-pool/', methods=['GET'])
+@token_required
+@role_required(UserRole.Admin)
+def get_db_pool_stats(current_user):
+    """
+    [Admin only] Returns the database connection pool of this instance: its mode,
+    connections checked out and in, overflow in use, and time spent waiting for a
+    connection since the instance started.
+    """
+    return jsonify(pool_stats()), 200
+
+@admin_bp.route('/metrics/', methods=['GET'])
+@token_required
+@role_required(UserRole.Admin)
+def get_metrics(current_user):
+    """
+    [Admin only] Returns this instance's metrics in the Prometheus text format:
+    request latency and SQL statement histograms, span timings (with
+    PROFILING_ENABLED) and the connection pool.
+    """
+    return Response(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -5,6 +5,7 @@ import os
 
 from ..models import User
 from ..extensions import db
+from ..services.passwords import get_password_hasher, PasswordHasherBusy
 
 auth_bp = Blueprint('auth_bp', __name__)
 
@@ -23,7 +24,10 @@ def register():
         mobile_number=data['mobileNumber'],
         role='Citizen' # Default role
     )
-    new_user.set_password(data['password'])
+    try:
+        new_user.set_password(data['password'])
+    except PasswordHasherBusy:
+        return jsonify({"message": "Too many requests in progress, please retry shortly."}), 503, {'Retry-After': '1'}
 
     db.session.add(new_user)
     db.session.commit()
@@ -59,8 +63,20 @@ def login():
     user = User.query.filter_by(email=email).first()
 
     # Check if the user exists and the password is correct
-    if not user or not user.check_password(password):
-        return jsonify({"message": "Invalid email or password"}), 401
+    try:
+        if not user or not user.check_password(password):
+            return jsonify({"message": "Invalid email or password"}), 401
+    except PasswordHasherBusy:
+        return jsonify({"message": "Too many logins in progress, please retry shortly."}), 503, {'Retry-After': '1'}
+
+    # Upgrade hashes made with an older BCRYPT_LOG_ROUNDS while we have the plain password
+    if get_password_hasher().needs_rehash(user.password_hash):
+        try:
+            user.set_password(password)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Password rehash for user {user.id} skipped: {e}")
 
     try:
         # Create the JWT token
@@ -1,64 +1,135 @@
 import traceback
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
-from ..models import Issue, UserRole, User, Comment, IssueStatus
+from ..models import Issue, UserRole, User, Comment, IssueStatus, DuplicateReport, PROCESSING, PROCESSING_FAILED
+from ..models import CATEGORY_SOURCE_GEMINI, CATEGORY_SOURCE_CLASSIFIER
 from ..utils.decorators import role_required, token_required
-from sqlalchemy import or_, text
-import google.generativeai as genai
+from ..utils.pagination import paginate_issues, wants_all_issues, get_page_size, page_variant, InvalidCursor
+from ..utils.issue_export import parse_export_filters, generate_issue_export, InvalidExportFilter
+from ..utils.issue_map import read_float, read_limit, issues_in_box, issues_near, clusters_in_box, map_response, InvalidMapQuery
+from ..utils.conditional import conditional_response, issue_etag, collection_etag
+from ..services.dispatch import get_dispatch_engine, OPEN_STATUSES
+from ..services.jobs import get_job_queue, job
+from ..services.storage import get_blob_storage, get_upload_executor, buffer_upload, put_buffered, delete_quietly, UploadFailed
+from ..services.categorization_cache import get_categorization_cache, categorization_key
+from ..services.classifier import get_local_classifier
+from ..services.issue_stats import issue_stats_snapshot, record_issue_change, record_reassignments, read_issue_stats
+from ..services.response_cache import get_response_cache
+from ..services.duplicates import find_duplicate
+from ..services.search import search_issues, InvalidSearchQuery
+from ..services.gemini import get_gemini_model, issue_category_schema, categorization_config
+from ..services.profiling import timed
+from sqlalchemy import or_, update, func
 from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta, timezone
 import os
 import json
 import uuid
+import time
 from functools import wraps
-import requests
 from ..extensions import db
-import vercel_blob
-from pydantic import BaseModel
-from typing import Literal, List
+from collections import namedtuple
 import re
 #from ..mail_services import send_new_issue_notification, send_status_update_notification
 
 # --- Flask Blueprint Definition ---
 
-class IssueCategory(BaseModel):
-    category: Literal["Pothole", "Garbage", "Streetlight", "Graffiti", "Flooding", "Damaged Signage", "Other"]
-    title: str
+# Category and title of a report, from the local classifier, the cache or Gemini.
+# source is the CATEGORY_SOURCE_* value stored on the issue, None for fallbacks.
+IssueCategory = namedtuple('IssueCategory', ['category', 'title', 'source'])
 
 # --- Blueprint Definition ---
 issues_bp = Blueprint('issues_bp', __name__)
 
-# This would be your real Gemini client initialization
+# The Gemini client is created on first use by services.gemini.get_gemini_model()
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-gemini_model = genai.GenerativeModel("gemini-2.5-flash")
+# How far back the public recent feed reaches
+RECENT_WINDOW = timedelta(days=7)
+
+def invalidate_recent_feed(*issues):
+    """
+    Drops the cached public recent feed when any of the given issues is in its
+    window. Call it after committing; with no issues it always invalidates.
+    Cached map clusters share the cache generation, so every new issue drops them too.
+    """
+    cache = get_response_cache()
+    if cache is None:
+        return
+    cutoff = datetime.utcnow() - RECENT_WINDOW
+    if not issues or any(issue.created_at.replace(tzinfo=None) >= cutoff for issue in issues):
+        try:
+            cache.invalidate()
+        except Exception as e:
+            print(f"Recent feed cache invalidation failed: {e}")
 
 def upload_files_to_storage(files):
     """
-    Upload files to Vercel Blob Storage and return their public URLs.
+    Upload files concurrently to the configured blob storage and return their public URLs.
+    Each file is buffered first, so uploads never read the request stream after the
+    request is gone. If any upload fails or misses the UPLOAD_TIMEOUT_SECONDS deadline,
+    the photos already stored are deleted again and UploadFailed is raised naming the
+    photos that were not stored.
     """
     if not files or not files[0].filename:
         return ["/assets/placeholder-image.svg"]
 
-    uploaded_urls = []
-
-    for file in files:
-        filename = secure_filename(file.filename)
-        file_bytes = file.read()
-        file.seek(0)
+    storage = get_blob_storage()
+    executor = get_upload_executor()
+    timeout = current_app.config['UPLOAD_TIMEOUT_SECONDS']
 
-        response = vercel_blob.put(filename, file_bytes, {
-                "addRandomSuffix": "true",
-            })
+    buffers = [buffer_upload(file.stream) for file in files]
 
-        uploaded_urls.append(response["url"])  # This is the public file URL
+    def discard_late_upload(future):
+        if future.exception() is None:
+            delete_quietly(storage, future.result())
 
+    uploaded_urls = []
+    failed = []
+    errors = []
+    with timed('upload'):
+        # From here on each buffer belongs to its upload task, which closes it when done
+        futures = [
+            executor.submit(put_buffered, storage, secure_filename(file.filename), buffer, file.content_type)
+            for file, buffer in zip(files, buffers)
+        ]
+        deadline = time.monotonic() + timeout
+
+        for file, buffer, future in zip(files, buffers, futures):
+            try:
+                uploaded_urls.append(future.result(timeout=max(0, deadline - time.monotonic())))
+            except Exception as e:
+                # A running upload cannot be cancelled; it finishes in the background, closes
+                # its buffer, and what it stored is deleted once it is done
+                if future.cancel():
+                    buffer.close()
+                else:
+                    future.add_done_callback(discard_late_upload)
+                failed.append(file.filename)
+                errors.append(e)
+                print(f"Upload of '{file.filename}' failed: {e!r}")
+
+    if failed:
+        for url in uploaded_urls:
+            delete_quietly(storage, url)
+        raise UploadFailed(failed, errors[0])
     return uploaded_urls
 
 def categorize_issue_with_gemini(description: str, image_parts: list) -> IssueCategory:
     """
     Calls the Gemini API to get a title and category, enforcing JSON output.
+    Results are cached by a hash of the normalized description and image digests,
+    so repeated or retried reports skip the model call entirely.
     """
+    cache = get_categorization_cache()
+    cache_key = categorization_key(description, image_parts)
+    try:
+        cached = cache.get(cache_key)
+        if cached:
+            return IssueCategory(source=CATEGORY_SOURCE_GEMINI, **cached)
+    except Exception as e:
+        print(f"Categorization cache lookup failed: {e}")
+
     print("Calling Gemini API for categorization...")
     try:
         # Define the exact JSON structure you want the model to return
@@ -73,21 +144,27 @@ def categorize_issue_with_gemini(description: str, image_parts: list) -> IssueCa
         contents = image_parts + [prompt]
         
         # Use GenerationConfig to force the model to return JSON matching your schema
-        response = gemini_model.generate_content(
-            contents=contents,
-            generation_config=genai.GenerationConfig(
-                response_schema=IssueCategory
+        model, generation_config = get_gemini_model(), categorization_config()
+        with timed('gemini'):
+            response = model.generate_content(
+                contents=contents,
+                generation_config=generation_config
             )
-        )
         
         try:
             clean_json = re.sub(r"^```json\s*|```$", "", response.text.strip(), flags=re.MULTILINE)
-            result: IssueCategory = IssueCategory.model_validate_json(clean_json)
+            parsed = issue_category_schema().model_validate_json(clean_json)
+            result = IssueCategory(category=parsed.category, title=parsed.title, source=CATEGORY_SOURCE_GEMINI)
 
         except Exception as e:
             print(f"Gemini output was not JSON, falling back. {e}")
-            result = IssueCategory(category="Other", title="Issue Report")
-        
+            # Fallbacks are not cached so the next identical report tries the model again
+            return IssueCategory(category="Other", title="Issue Report", source=None)
+
+        try:
+            cache.put(cache_key, result._asdict())
+        except Exception as e:
+            print(f"Categorization cache store failed: {e}")
         return result
         
     except Exception as e:
@@ -95,37 +172,176 @@ def categorize_issue_with_gemini(description: str, image_parts: list) -> IssueCa
         # Add more detailed logging for debugging if an error still occurs
         if 'response' in locals() and hasattr(response, 'prompt_feedback'):
             print(f"Gemini prompt feedback: {response.prompt_feedback}")
-        return {"category": "Other", "title": "Issue Report"}
+        return IssueCategory(category="Other", title="Issue Report", source=None)
+
+def categorize_issue(description: str, image_parts: list) -> IssueCategory:
+    """
+    Categorizes a report with the local classifier when it is confident enough,
+    and with Gemini otherwise.
+    """
+    if current_app.config['CLASSIFIER_ENABLED']:
+        try:
+            prediction = get_local_classifier().confident_prediction(description)
+            if prediction:
+                return IssueCategory(category=prediction.category, title=prediction.title, source=CATEGORY_SOURCE_CLASSIFIER)
+        except Exception as e:
+            print(f"Local classifier failed, using Gemini: {e}")
+    return categorize_issue_with_gemini(description, image_parts)
     
-def find_nearest_worker(location):
-    """Find the nearest worker using PostGIS ST_Distance."""
-
-    # Use raw SQL for PostGIS geospatial query
-    sql = text("""
-        SELECT id, first_name, last_name,
-               ST_Distance(
-                   geography(ST_MakePoint(:lng, :lat)),
-                   geography(ST_MakePoint(location_lng, location_lat))
-               ) AS distance
-        FROM users
-        WHERE role = 'Worker'
-        ORDER BY distance ASC
-        LIMIT 1;
-    """)
-
-    lat = float(location["lat"])
-    lng = float(location["lng"])
-
-    result = db.session.execute(sql, {"lat": lat, "lng": lng}).fetchone()
-    if result:
-        # Normalize keys to match your usage
-        return {
-            "id": result.id,
-            "firstName": result.first_name,   # map column to key you use
-            "lastName": result.last_name,
-            "distance": result.distance
-        }
-    return None
+def run_issue_pipeline(description, location, photos):
+    """
+    Runs the slow part of issue creation: photo upload, categorization and
+    worker selection. Returns (photo_urls, ai_result, assigned_worker).
+    """
+    # 2. Handle file uploads and prepare for Gemini
+    photo_urls = upload_files_to_storage(photos)
+
+    # Convert photos to Gemini-compatible 'Part' objects if they exist
+    image_parts = []
+    # for photo in photos:
+    #    image_parts.append(Part.from_data(
+    #        mime_type=photo.content_type,
+    #        data=photo.read()
+    #    ))
+    #    photo.seek(0) # Reset file pointer after reading
+
+    # 3. Categorize locally when the report is unambiguous, otherwise ask Gemini for category and title
+    ai_result = categorize_issue(description, image_parts)
+
+    # 4. Pick a nearby worker for automatic assignment, weighing in their current workload
+    assigned_worker = get_dispatch_engine().pick_worker(float(location["lat"]), float(location["lng"]))
+
+    return photo_urls, ai_result, assigned_worker
+
+def spool_uploads(files):
+    """
+    Saves uploaded photos to UPLOAD_SPOOL_DIR so a background job can read them
+    after the request is gone. Returns JSON-friendly descriptions of the files.
+    """
+    if not files or not files[0].filename:
+        return []
+
+    spool_dir = current_app.config['UPLOAD_SPOOL_DIR']
+    os.makedirs(spool_dir, exist_ok=True)
+    spooled = []
+    try:
+        for file in files:
+            path = os.path.join(spool_dir, uuid.uuid4().hex)
+            spooled.append({"path": path, "filename": file.filename, "contentType": file.content_type})
+            file.save(path)
+    except Exception:
+        discard_spooled(spooled)
+        raise
+    return spooled
+
+def discard_spooled(spooled):
+    """Deletes photos saved by spool_uploads once nothing will read them again."""
+    for photo in spooled:
+        try:
+            os.remove(photo["path"])
+        except FileNotFoundError:
+            pass
+
+@job('process_issue')
+def process_issue_job(payload, final_attempt):
+    """
+    Background half of asynchronous issue creation: runs the pipeline for an issue
+    persisted in the 'processing' state, then fills in the results. The spooled
+    photos are kept for retries until the job succeeds or runs its last attempt,
+    which is also when the issue is marked 'failed'.
+    """
+    issue = Issue.query.filter_by(public_id=payload["issue_id"]).first()
+    if not issue:
+        print(f"Issue {payload['issue_id']} vanished before processing.")
+        return
+
+    photos = []
+    succeeded = False
+    try:
+        for photo in payload["photos"]:
+            photos.append(FileStorage(stream=open(photo["path"], "rb"), filename=photo["filename"], content_type=photo["contentType"]))
+        stats_before = issue_stats_snapshot(issue)
+        location = {"lat": issue.location_lat, "lng": issue.location_lng}
+        photo_urls, ai_result, assigned_worker = run_issue_pipeline(issue.description, location, photos)
+
+        issue.title = ai_result.title
+        issue.category = ai_result.category
+        issue.category_source = ai_result.source
+        issue.photo_urls = photo_urls
+        if assigned_worker and issue.assigned_to_id is None:
+            issue.assigned_to_id = assigned_worker['id']
+            issue.assigned_to_name = f"{assigned_worker['firstName']} {assigned_worker['lastName']}"
+        issue.processing_state = None
+        issue.refresh_search_document()
+        record_issue_change(stats_before, issue_stats_snapshot(issue))
+        db.session.commit()
+        succeeded = True
+        get_dispatch_engine().loads.record_transition(None, None, issue.assigned_to_id, issue.status)
+        invalidate_recent_feed(issue)
+    except Exception:
+        db.session.rollback()
+        if final_attempt:
+            issue.processing_state = PROCESSING_FAILED
+            db.session.commit()
+        raise
+    finally:
+        for photo in photos:
+            photo.close()
+        if succeeded or final_attempt:
+            discard_spooled(payload["photos"])
+
+def issue_list_response(query):
+    """
+    Serializes an Issue query as one page of {"issues", "nextCursor"}.
+    Clients that still need the whole list in a bare JSON array can pass ?all=true.
+    """
+    if wants_all_issues():
+        issues = query.order_by(Issue.created_at.desc()).all()
+        return jsonify([issue.to_dict() for issue in issues]), 200
+
+    issues, next_cursor = paginate_issues(query)
+    return jsonify({
+        "issues": [issue.to_dict() for issue in issues],
+        "nextCursor": next_cursor
+    }), 200
+
+def can_comment_on(user, issue):
+    """Only the reporter, the assigned worker and admins may comment on an issue."""
+    return issue.reporter_id == user.id or issue.assigned_to_id == user.id or user.role == UserRole.Admin
+
+def record_duplicate_report(reporter, match, description, location):
+    """
+    Answers a report that duplicates an existing issue with that issue's id instead
+    of running uploads, categorization and assignment again. Every such report is
+    stored as a DuplicateReport linked to the issue. It is also added as a comment
+    when the reporter may comment on the issue; nothing else about the issue is
+    revealed to a reporter who could not view it.
+    """
+    issue = Issue.query.options(joinedload(Issue.comments)).filter_by(public_id=match.public_id).first()
+    print(f"Report by {reporter.email} matches issue {issue.public_id} ({match.similarity:.2f} similar, {match.meters:.0f} m away)")
+    db.session.add(DuplicateReport(
+        issue_id=issue.public_id,
+        reporter_id=reporter.id,
+        description=description,
+        location_lat=float(location["lat"]),
+        location_lng=float(location["lng"]),
+        similarity=match.similarity
+    ))
+    commented = can_comment_on(reporter, issue)
+    if commented:
+        issue.comments.append(Comment(
+            author_id=reporter.id,
+            author_name=f"{reporter.first_name} {reporter.last_name}",
+            text=f"Reported again: {description}",
+            created_at=datetime.now(timezone.utc),
+            issue_id=issue.public_id
+        ))
+        issue.touch()
+        issue.refresh_search_document()
+    db.session.commit()
+    if commented:
+        invalidate_recent_feed(issue)
+    return jsonify({"id": issue.public_id, "duplicate": True}), 200
 
 # --- Flask Blueprint Definition ---
 
@@ -135,6 +351,10 @@ def create_issue(current_user):
     """
     Creates a new civic issue.
     Receives multipart/form-data with description, location (JSON string), and photos.
+    With ISSUE_PIPELINE_MODE=async the issue is stored in the 'processing' state and
+    202 is returned immediately; poll GET /api/issues/<id> for the final result.
+    A report that matches an open issue nearby is answered with 200 and that issue's
+    id, marked 'duplicate', unless allowDuplicate=true is sent.
     """
     try:
         print(f"Post issues api is triggered")
@@ -151,52 +371,81 @@ def create_issue(current_user):
         except json.JSONDecodeError:
             return jsonify({"message": "Invalid location format. Must be valid JSON."}), 400
 
-        # 2. Handle file uploads and prepare for Gemini
-        photo_urls = upload_files_to_storage(photos)
-        
-        # Convert photos to Gemini-compatible 'Part' objects if they exist
-        image_parts = []
-        # for photo in photos:
-        #    image_parts.append(Part.from_data(
-        #        mime_type=photo.content_type,
-        #        data=photo.read()
-        #    ))
-        #    photo.seek(0) # Reset file pointer after reading
-
-        # 3. Call Gemini for AI-powered categorization and title
-        ai_result = categorize_issue_with_gemini(description, image_parts)
-
-        # 4. Find the nearest worker for automatic assignment
-        assigned_worker = find_nearest_worker(location)
-
-        # 5. Create the issue in the database (example using a dictionary)
         reporter = current_user
+        if current_app.config['DUPLICATE_DETECTION_ENABLED'] and request.form.get('allowDuplicate', '').lower() != 'true':
+            match = find_duplicate(description, float(location["lat"]), float(location["lng"]))
+            if match:
+                return record_duplicate_report(reporter, match, description, location)
+
         new_issue_data = {
             "public_id": str(uuid.uuid4())[:8],
-            "title": ai_result.title,
             "description": description,
-            "category": ai_result.category,
-            "photo_urls": photo_urls,
             "location_lat": float(location["lat"]),
             "location_lng": float(location["lng"]),
             "status": IssueStatus.Pending,
             "created_at": datetime.now(timezone.utc),
             "reporter_id": reporter.id,
-            "reporter_name": f"{reporter.first_name} {reporter.last_name}",
+            "reporter_name": f"{reporter.first_name} {reporter.last_name}"
+        }
+
+        if current_app.config['ISSUE_PIPELINE_MODE'] == 'async':
+            # Persist a placeholder right away and let a background job do the slow work.
+            # Photos are spooled first, so a failure there leaves no issue behind.
+            spooled = spool_uploads(photos)
+            new_issue = Issue(
+                **new_issue_data,
+                title="Issue Report",
+                category="Other",
+                photo_urls=[],
+                processing_state=PROCESSING
+            )
+            try:
+                db.session.add(new_issue)
+                record_issue_change(None, issue_stats_snapshot(new_issue))
+                db.session.commit()
+            except Exception:
+                discard_spooled(spooled)
+                raise
+            invalidate_recent_feed(new_issue)
+            try:
+                get_job_queue().enqueue('process_issue', {"issue_id": new_issue.public_id, "photos": spooled})
+            except Exception:
+                # Nothing will process the issue, so don't leave it 'processing' forever
+                discard_spooled(spooled)
+                new_issue.processing_state = PROCESSING_FAILED
+                db.session.commit()
+                raise
+            return jsonify(new_issue.to_dict()), 202
+
+        # 2-4. Upload photos, categorize with Gemini and pick a worker
+        photo_urls, ai_result, assigned_worker = run_issue_pipeline(description, location, photos)
+
+        # 5. Create the issue in the database (example using a dictionary)
+        new_issue_data.update({
+            "title": ai_result.title,
+            "category": ai_result.category,
+            "category_source": ai_result.source,
+            "photo_urls": photo_urls,
             "assigned_to_id": assigned_worker['id'] if assigned_worker else None,
             "assigned_to_name": f"{assigned_worker['firstName']} {assigned_worker['lastName']}" if assigned_worker else None
-        }
-        
+        })
+
         # Using SQLAlchemy:
         new_issue = Issue(**new_issue_data)
         db.session.add(new_issue)
+        record_issue_change(None, issue_stats_snapshot(new_issue))
         db.session.commit()
+        get_dispatch_engine().loads.record_transition(None, None, new_issue.assigned_to_id, new_issue.status)
+        invalidate_recent_feed(new_issue)
 
         # send email notification
         #send_new_issue_notification(user=current_user, issue=new_issue)
 
         return jsonify(new_issue.to_dict()), 201
 
+    except UploadFailed as e:
+        print(f"Error creating issue: {e}")
+        return jsonify({"message": "Some photos could not be uploaded. Please try again.", "failedPhotos": e.filenames}), 502
     except Exception as e:
         print(f"Error creating issue: {e}")
         traceback.print_exc()
@@ -224,12 +473,9 @@ def add_comment_to_issue(current_user, issue_id):
         if not issue:
             return jsonify({"message": "Issue not found."}), 404
         
-        # 2. Check if user is authorized to comment (example logic)
+        # 2. Check if user is authorized to comment
         author = current_user
-        is_reporter = issue.reporter_id == author.id
-        is_assigned = issue.assigned_to_id == author.id
-        is_admin = author.role == 'Admin'
-        if not (is_reporter or is_assigned or is_admin):
+        if not can_comment_on(author, issue):
             return jsonify({"message": "You are not authorized to comment on this issue."}), 403
 
         # 3. Create and add the new comment
@@ -244,7 +490,11 @@ def add_comment_to_issue(current_user, issue_id):
         # Using SQLAlchemy:
         new_comment = Comment(**new_comment_data)
         issue.comments.append(new_comment)
+        # The comment is part of the issue's representation, so it needs a new version
+        issue.touch()
+        issue.refresh_search_document()
         db.session.commit()
+        invalidate_recent_feed(issue)
         return jsonify(issue.to_dict()), 200
 
     except Exception as e:
@@ -293,8 +543,13 @@ def update_issue_status(current_user, issue_id):
         new_status_to_update = status_map[new_status]
         # 3. Update the status and commit
         print(f"Updating issue {issue_id} status to '{new_status}'")
+        old_status = issue.status
+        stats_before = issue_stats_snapshot(issue)
         issue.status = new_status_to_update
+        record_issue_change(stats_before, issue_stats_snapshot(issue))
         db.session.commit()
+        get_dispatch_engine().loads.record_transition(issue.assigned_to_id, old_status, issue.assigned_to_id, issue.status)
+        invalidate_recent_feed(issue)
         return jsonify(issue.to_dict()), 200
         
     except Exception as e:
@@ -328,9 +583,14 @@ def assign_issue_to_worker(current_user, issue_id):
             return jsonify({"message": "Worker not found or user is not a worker."}), 404
         
         # 3. Update the issue and commit
+        old_worker_id = issue.assigned_to_id
+        stats_before = issue_stats_snapshot(issue)
         issue.assigned_to_id = worker.id
         issue.assigned_to_name = f"{worker.first_name} {worker.last_name}"
+        record_issue_change(stats_before, issue_stats_snapshot(issue))
         db.session.commit()
+        get_dispatch_engine().loads.record_transition(old_worker_id, issue.status, worker.id, issue.status)
+        invalidate_recent_feed(issue)
         return jsonify(issue.to_dict()), 200
         
     except Exception as e:
@@ -338,6 +598,73 @@ def assign_issue_to_worker(current_user, issue_id):
         return jsonify({"message": "An internal error occurred."}), 500
 
 
+@issues_bp.route('/dispatch/', methods=['POST'])
+@token_required
+@role_required(UserRole.Admin)
+def dispatch_backlog(current_user):
+    """
+    Assigns a whole backlog of issues in one batch.
+    Accessible by Admins only.
+    Receives optional JSON with 'mode' ('unassigned' or 'rebalance') and 'limit',
+    which is capped at DISPATCH_MAX_BATCH (also the default).
+    'unassigned' assigns open issues that have no worker yet, 'rebalance' redistributes
+    every Pending issue across workers, including already assigned ones.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        mode = data.get('mode', 'unassigned')
+        max_batch = current_app.config['DISPATCH_MAX_BATCH']
+        try:
+            limit = int(data.get('limit', max_batch))
+        except (TypeError, ValueError):
+            return jsonify({"message": "limit must be a positive integer."}), 400
+        if limit < 1:
+            return jsonify({"message": "limit must be a positive integer."}), 400
+        limit = min(limit, max_batch)
+
+        query = db.session.query(Issue.id, Issue.location_lat, Issue.location_lng, Issue.assigned_to_id)
+        if mode == 'unassigned':
+            query = query.filter(Issue.assigned_to_id.is_(None), Issue.status.in_(OPEN_STATUSES))
+        elif mode == 'rebalance':
+            query = query.filter(Issue.status == IssueStatus.Pending)
+        else:
+            return jsonify({"message": "mode must be 'unassigned' or 'rebalance'."}), 400
+
+        query = query.order_by(Issue.created_at.asc(), Issue.id.asc()).limit(limit)
+        backlog = query.all()
+
+        dispatch_engine = get_dispatch_engine()
+        current_workers = {issue_id: worker_id for issue_id, _, _, worker_id in backlog}
+        assignments = dispatch_engine.assign_bulk(backlog, release_current=(mode == 'rebalance'))
+
+        # 2. Write every changed assignment back in one executemany UPDATE
+        changes = [{
+            "id": issue_id,
+            "assigned_to_id": worker["id"],
+            "assigned_to_name": f"{worker['firstName']} {worker['lastName']}"
+        } for issue_id, worker in assignments if current_workers[issue_id] != worker["id"]]
+        if changes:
+            db.session.execute(update(Issue), changes)
+            # Open issues have no rating yet, only their worker bucket moves
+            record_reassignments([(current_workers[change["id"]], change["assigned_to_id"], None) for change in changes])
+        db.session.commit()
+        dispatch_engine.loads.invalidate()
+        if changes:
+            invalidate_recent_feed()
+
+        return jsonify({
+            "mode": mode,
+            "considered": len(backlog),
+            "assigned": len(changes)
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error dispatching backlog: {e}")
+        traceback.print_exc()
+        return jsonify({"message": "An internal error occurred."}), 500
+
+
 @issues_bp.route('/<string:issue_id>/resolve/', methods=['PUT'])
 @token_required
 @role_required(UserRole.Citizen)
@@ -367,10 +694,13 @@ def resolve_issue(current_user, issue_id):
             return jsonify({"message": f"Issue cannot be resolved with status '{issue.status}'."}), 409 # 409 Conflict
         
         # 4. Update the issue status and rating, then commit
+        stats_before = issue_stats_snapshot(issue)
         issue.status = IssueStatus.Resolved
         issue.rating = rating
         issue.resolvedAt = datetime.now(timezone.utc) # Optional: track resolution time
+        record_issue_change(stats_before, issue_stats_snapshot(issue))
         db.session.commit()
+        invalidate_recent_feed(issue)
         return jsonify(issue.to_dict()), 200
 
     except Exception as e:
@@ -382,14 +712,78 @@ def resolve_issue(current_user, issue_id):
 @role_required(UserRole.Admin)
 def get_all_issues(current_user):
     """
-    [Admin only] Retrieves all issues in the system.
+    [Admin only] Retrieves all issues in the system, one page at a time.
     """
     try:
-        issues = Issue.query.order_by(Issue.created_at.desc()).all()
-        return jsonify([issue.to_dict() for issue in issues]), 200
+        return issue_list_response(Issue.query_for_serialization())
+    except InvalidCursor as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         return jsonify({"message": "An error occurred while fetching issues"}), 500
     
+@issues_bp.route('/stats/', methods=['GET'])
+@token_required
+@role_required(UserRole.Admin)
+def get_issue_stats(current_user):
+    """
+    [Admin only] Dashboard totals by status, category, worker and week, plus average ratings.
+    Served from the issue_stats rollup, so the cost does not grow with the number of issues.
+    Optional ?since=YYYY-MM-DD limits the weekly series.
+    """
+    try:
+        return jsonify(read_issue_stats(since=request.args.get('since'))), 200
+    except Exception as e:
+        print(f"Error reading issue stats: {e}")
+        return jsonify({"message": "An error occurred while fetching statistics."}), 500
+
+@issues_bp.route('/search/', methods=['GET'])
+@token_required
+@role_required(UserRole.Admin, UserRole.Service)
+def search_all_issues(current_user):
+    """
+    [Admin/Service] Full-text search over issue titles, descriptions and comments.
+    ?q= takes words (and on Postgres "quoted phrases", or, -exclusions); results are
+    best match first, paginated with ?limit= and ?cursor= like the listings, and
+    take the status, category, since and until filters of the export.
+    """
+    try:
+        issues, next_cursor = search_issues(
+            request.args.get('q'), parse_export_filters(request.args), get_page_size(), request.args.get('cursor')
+        )
+        return jsonify({
+            "issues": [issue.to_dict() for issue in issues],
+            "nextCursor": next_cursor
+        }), 200
+    except (InvalidSearchQuery, InvalidExportFilter, InvalidCursor) as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        print(f"Error searching issues: {e}")
+        return jsonify({"message": "An error occurred while searching issues."}), 500
+
+@issues_bp.route('/export/', methods=['GET'])
+@token_required
+@role_required(UserRole.Admin)
+def export_issues(current_user):
+    """
+    [Admin only] Streams every issue matching the filters, oldest first, for analytics.
+    Query parameters: format=ndjson|csv, since, until, status, category, comments=true.
+    """
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in ['ndjson', 'csv']:
+        return jsonify({"message": "format must be 'ndjson' or 'csv'."}), 400
+    try:
+        filters = parse_export_filters(request.args)
+    except InvalidExportFilter as e:
+        return jsonify({"message": str(e)}), 400
+    with_comments = request.args.get('comments', 'false').lower() == 'true'
+
+    chunks = generate_issue_export(filters, fmt, with_comments, batch_size=current_app.config['EXPORT_BATCH_SIZE'])
+    return Response(
+        stream_with_context(chunks),
+        mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename=issues.{fmt}'}
+    )
+
 @issues_bp.route('/reported/', methods=['GET'])
 @token_required
 @role_required(UserRole.Citizen)
@@ -398,8 +792,9 @@ def get_reported_issues(current_user):
     [Citizen only] Returns issues reported by the authenticated citizen.
     """
     try:
-        issues = Issue.query.filter_by(reporter_id=current_user.id).order_by(Issue.created_at.desc()).all()
-        return jsonify([issue.to_dict() for issue in issues]), 200
+        return issue_list_response(Issue.query_for_serialization().filter_by(reporter_id=current_user.id))
+    except InvalidCursor as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         return jsonify({"message": "An error occurred while fetching reported issues"}), 500
 
@@ -411,8 +806,9 @@ def get_assigned_issues(current_user):
     [Worker only] Returns issues assigned to the authenticated worker.
     """
     try:
-        issues = Issue.query.filter_by(assigned_to_id=current_user.id).order_by(Issue.created_at.desc()).all()
-        return jsonify([issue.to_dict() for issue in issues]), 200
+        return issue_list_response(Issue.query_for_serialization().filter_by(assigned_to_id=current_user.id))
+    except InvalidCursor as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         return jsonify({"message": "An error occurred while fetching assigned issues"}), 500
     
@@ -431,11 +827,14 @@ def get_issues_by_user_identifier(current_user, identifier):
 
         if not target_user:
             # Return an empty list if the user doesn't exist, as per the contract
-            return jsonify([]), 200
+            if wants_all_issues():
+                return jsonify([]), 200
+            return jsonify({"issues": [], "nextCursor": None}), 200
 
         # Fetch issues reported by that user
-        issues = Issue.query.filter_by(reporter_id=target_user.id).order_by(Issue.created_at.desc()).all()
-        return jsonify([issue.to_dict() for issue in issues]), 200
+        return issue_list_response(Issue.query_for_serialization().filter_by(reporter_id=target_user.id))
+    except InvalidCursor as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         return jsonify({"message": "An error occurred while searching for user issues"}), 500
 
@@ -448,7 +847,11 @@ def get_issue_by_id(current_user, id):
     with role-based access checks.
     """
     try:
-        issue = Issue.query.filter_by(public_id=id).first()
+        # Only the columns needed for authorization and the version check, so a
+        # conditional request that comes back 304 never loads comments or users
+        issue = db.session.query(
+            Issue.reporter_id, Issue.assigned_to_id, Issue.version, Issue.updated_at
+        ).filter_by(public_id=id).first()
 
         if not issue:
             return jsonify({"message": "Issue not found"}), 404
@@ -461,7 +864,11 @@ def get_issue_by_id(current_user, id):
         if not (is_admin_or_service or is_reporter or is_assigned_worker):
             return jsonify({"message": "Access forbidden: You are not authorized to view this issue."}), 403
 
-        return jsonify(issue.to_dict()), 200
+        def build():
+            full_issue = Issue.query_for_serialization().filter_by(public_id=id).first()
+            return jsonify(full_issue.to_dict()), 200
+
+        return conditional_response(issue_etag(id, issue.version), issue.updated_at, build, cache_control='private, no-cache')
     except Exception as e:
         return jsonify({"message": "An error occurred while fetching the issue"}), 500
     
@@ -471,21 +878,112 @@ def get_recent_public_issues():
     """
     Fetches all civic issues that were reported within the last 7 days.
     This is a public endpoint and does not require any authentication.
+    The response is identical for every caller, so it is served from the
+    response cache for RECENT_FEED_CACHE_TTL_SECONDS and marked public for CDNs.
     """
     try:
         # Calculate the date and time for 7 days ago from the current UTC time.
-        seven_days_ago = datetime.now(timezone.utc) - timedelta(days=7)
+        seven_days_ago = datetime.now(timezone.utc) - RECENT_WINDOW
         
-        recent_issues = Issue.query.filter(
+        recent_issues = Issue.query_for_serialization().filter(
             Issue.created_at >= seven_days_ago
-        ).order_by(Issue.created_at.desc()).all()
-        
-        issues_list = [issue.to_dict() for issue in recent_issues]
-        
-        return jsonify(issues_list), 200
+        )
 
+        def version_of_window():
+            # One aggregate over the window decides whether anything the client could see changed
+            count, last_modified, version_sum = db.session.query(
+                func.count(Issue.id), func.max(Issue.updated_at), func.sum(Issue.version)
+            ).filter(Issue.created_at >= seven_days_ago).one()
+            return collection_etag(count, last_modified, version_sum, page_variant()), last_modified
+
+        ttl = current_app.config['RECENT_FEED_CACHE_TTL_SECONDS']
+        cache_control = f"public, max-age={ttl}, s-maxage={ttl}, stale-while-revalidate={ttl}"
+
+        cache = get_response_cache()
+        if cache is None:
+            etag, last_modified = version_of_window()
+            # Issues leaving the window do not move max(updated_at), so only the ETag can prove freshness here
+            return conditional_response(etag, last_modified, lambda: issue_list_response(recent_issues),
+                                        cache_control=cache_control, use_modified_since=False)
+
+        def render():
+            etag, last_modified = version_of_window()
+            response, status = issue_list_response(recent_issues)
+            return {"body": response.get_data(), "etag": etag, "lastModified": last_modified}
+
+        entry = cache.get_or_compute(f"recent:{page_variant()}", render, ttl)
+        return conditional_response(entry["etag"], entry["lastModified"],
+                                    lambda: (Response(entry["body"], mimetype='application/json'), 200),
+                                    cache_control=cache_control, use_modified_since=False)
+
+    except InvalidCursor as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         # It's important to log the actual error for debugging.
         print(f"Error fetching recent public issues: {e}")
         return jsonify({"message": "An error occurred while fetching recent issues."}), 500
-    
+
+
+@issues_bp.route('/public/nearby/', methods=['GET'])
+def get_nearby_public_issues():
+    """
+    Public map query: issues within ?radius= meters (default 1000) of ?lat= and ?lng=,
+    nearest first, each with its 'distance' in meters. At most ?limit= issues are
+    returned; 'truncated' is true when more matched. Accepts the status, category,
+    since and until filters of the export.
+    """
+    try:
+        lat = read_float('lat', -90, 90)
+        lng = read_float('lng', -180, 180)
+        radius = read_float('radius', 1, current_app.config['MAP_MAX_RADIUS_METERS'], default=1000)
+        results, truncated = issues_near(lat, lng, radius, read_limit(), parse_export_filters(request.args))
+        return jsonify(map_response(results, truncated)), 200
+    except (InvalidMapQuery, InvalidExportFilter) as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        print(f"Error fetching nearby issues: {e}")
+        return jsonify({"message": "An error occurred while fetching nearby issues."}), 500
+
+@issues_bp.route('/public/bbox/', methods=['GET'])
+def get_public_issues_in_bbox():
+    """
+    Public map query: issues inside the visible map area given by ?south=, ?west=,
+    ?north= and ?east=, nearest to its center first. A box with west > east crosses
+    the antimeridian. Takes the same limit and filters as /public/nearby/.
+    """
+    try:
+        south = read_float('south', -90, 90)
+        north = read_float('north', -90, 90)
+        west = read_float('west', -180, 180)
+        east = read_float('east', -180, 180)
+        if south > north:
+            raise InvalidMapQuery("'south' must not be greater than 'north'")
+        results, truncated = issues_in_box(south, west, north, east, read_limit(), parse_export_filters(request.args))
+        return jsonify(map_response(results, truncated)), 200
+    except (InvalidMapQuery, InvalidExportFilter) as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        print(f"Error fetching issues in bounding box: {e}")
+        return jsonify({"message": "An error occurred while fetching issues for the map."}), 500
+
+@issues_bp.route('/public/clusters/', methods=['GET'])
+def get_public_issue_clusters():
+    """
+    Public map query for zoomed-out views: instead of individual issues, returns
+    per-cell counts for the area given by ?south=, ?west=, ?north=, ?east= at map
+    ?zoom= (0-22), each with a centroid and counts by status and category.
+    """
+    try:
+        south = read_float('south', -90, 90)
+        north = read_float('north', -90, 90)
+        west = read_float('west', -180, 180)
+        east = read_float('east', -180, 180)
+        zoom = read_float('zoom', 0, 22)
+        if south > north:
+            raise InvalidMapQuery("'south' must not be greater than 'north'")
+        return jsonify(clusters_in_box(south, west, north, east, zoom)), 200
+    except InvalidMapQuery as e:
+        return jsonify({"message": str(e)}), 400
+    except Exception as e:
+        print(f"Error fetching issue clusters: {e}")
+        return jsonify({"message": "An error occurred while fetching issue clusters."}), 500
@@ -1,7 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from ..utils.decorators import token_required, role_required
 from ..models import User, UserRole
 from ..extensions import db
+from ..services.worker_locator import get_worker_locator
+from ..services.principal_cache import get_principal_cache
+from ..services.passwords import PasswordHasherBusy
+from ..utils.user_import import iter_import_records, import_users
 
 users_bp = Blueprint('users_bp', __name__)
 
@@ -51,7 +55,10 @@ def create_user(current_user):
         mobile_number=data['mobileNumber'],
         role=role
     )
-    new_user.set_password(data['password'])
+    try:
+        new_user.set_password(data['password'])
+    except PasswordHasherBusy:
+        return jsonify({"message": "Too many requests in progress, please retry shortly."}), 503, {'Retry-After': '1'}
 
     if 'location' in data and data['location'] and role == UserRole.Worker:
         new_user.location_lat = data['location'].get('lat')
@@ -60,6 +67,8 @@ def create_user(current_user):
     try:
         db.session.add(new_user)
         db.session.commit()
+        if role == UserRole.Worker:
+            get_worker_locator().upsert_worker(new_user)
         return jsonify(new_user.to_dict()), 201
     except Exception as e:
         db.session.rollback()
@@ -67,6 +76,47 @@ def create_user(current_user):
 
 
 
+@users_bp.route('/import/', methods=['POST'])
+@token_required
+@role_required(UserRole.Admin)
+def import_users_in_bulk(current_user):
+    """
+    Creates Worker and Service users in bulk.
+    Accepts CSV with a header row (text/csv) or one create_user JSON object per line
+    (application/x-ndjson), either as the request body or as a multipart 'file'.
+    The upload is parsed as it is read, and all rows are created in one transaction.
+    Returns a result per row; rows that fail validation do not stop the others.
+    """
+    upload = request.files.get('file')
+    if upload:
+        stream = upload.stream
+        is_csv = upload.filename.lower().endswith('.csv') or upload.mimetype == 'text/csv'
+    elif request.mimetype in ['text/csv', 'application/x-ndjson', 'application/jsonl', 'application/json']:
+        stream = request.stream
+        is_csv = request.mimetype == 'text/csv'
+    else:
+        return jsonify({"message": "Send text/csv or application/x-ndjson, or a multipart 'file'"}), 415
+
+    try:
+        records = iter_import_records(stream, 'csv' if is_csv else 'ndjson')
+        results, created = import_users(records, batch_size=current_app.config['USER_IMPORT_BATCH_SIZE'])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"User import failed: {e}")
+        return jsonify({"message": "Import failed, no users were created"}), 500
+
+    locator = get_worker_locator()
+    for row in created:
+        if row['role'] == UserRole.Worker:
+            locator.upsert_worker(User(**row))
+
+    return jsonify({
+        "created": len(created),
+        "failed": len(results) - len(created),
+        "results": results
+    }), 200
+
 @users_bp.route('/me/', methods=['GET'])
 @token_required
 def get_me(current_user: User):
@@ -96,12 +146,18 @@ def update_me(current_user):
     if not data:
         return jsonify({"message": "Request body is empty"}), 400
 
+    # token_required hands out a read-only snapshot, modify the actual row
+    current_user = current_user.load()
     current_user.first_name = data.get('firstName', current_user.first_name)
     current_user.last_name = data.get('lastName', current_user.last_name)
     current_user.mobile_number = data.get('mobileNumber', current_user.mobile_number)
 
     try:
         db.session.commit()
+        get_principal_cache().invalidate(current_user.id)
+        if current_user.role == UserRole.Worker:
+            # Assignment uses the worker's name, keep the locator in sync
+            get_worker_locator().upsert_worker(current_user)
         return jsonify(current_user.to_dict()), 200
     except Exception as e:
         db.session.rollback()
@@ -117,12 +173,16 @@ def update_my_password(current_user):
     if not data or 'oldPassword' not in data or 'newPassword' not in data:
         return jsonify({"message": "oldPassword and newPassword are required"}), 400
 
-    if not current_user.check_password(data['oldPassword']):
-        return jsonify({"message": "Incorrect old password"}), 401
-    
-    current_user.set_password(data['newPassword'])
+    current_user = current_user.load()
+    try:
+        if not current_user.check_password(data['oldPassword']):
+            return jsonify({"message": "Incorrect old password"}), 401
+        current_user.set_password(data['newPassword'])
+    except PasswordHasherBusy:
+        return jsonify({"message": "Too many requests in progress, please retry shortly."}), 503, {'Retry-After': '1'}
     try:
         db.session.commit()
+        get_principal_cache().invalidate(current_user.id)
         # Per the contract, just return a 200 OK status with no body.
         return "", 200
     except Exception as e:
@@ -139,11 +199,15 @@ def update_my_location(current_user):
     if not data or 'lat' not in data or 'lng' not in data:
         return jsonify({"message": "lat and lng are required"}), 400
 
+    current_user = current_user.load()
     current_user.location_lat = data['lat']
     current_user.location_lng = data['lng']
 
     try:
         db.session.commit()
+        get_principal_cache().invalidate(current_user.id)
+        if current_user.role == UserRole.Worker:
+            get_worker_locator().upsert_worker(current_user)
         return jsonify(current_user.to_dict()), 200
     except Exception as e:
         db.session.rollback()
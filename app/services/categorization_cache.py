@@ -0,0 +1,155 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, select, func
+from ..extensions import db
+from ..models import CategorizationCacheEntry
+
+# Run size-based eviction on the persistent tier once every this many stores
+PRUNE_EVERY = 100
+
+
+def normalize_description(description):
+    """Lowercases, strips punctuation and collapses whitespace so trivial edits share a key."""
+    text = re.sub(r"[^\w\s]", " ", description.lower())
+    return " ".join(text.split())
+
+
+def _part_bytes(part):
+    data = part.get('data') if isinstance(part, dict) else getattr(part, 'data', None)
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data)
+    return repr(part).encode('utf-8')
+
+
+def categorization_key(description, image_parts):
+    """
+    Content hash of everything the model sees: the normalized description plus
+    the digests of the image parts, in a stable order.
+    """
+    digests = sorted(hashlib.sha256(_part_bytes(part)).hexdigest() for part in image_parts)
+    material = normalize_description(description) + "\0" + "\0".join(digests)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class CategorizationCache:
+    """
+    Two-tier cache of {category, title} results.
+
+    The first tier is an in-process LRU of up to max_entries. The second is the
+    categorization_cache table, shared by every instance, which keeps up to
+    max_rows entries (oldest evicted first). Entries in both tiers expire after
+    ttl_seconds. The table is accessed on its own connection so cache writes
+    never join, or break, the request's transaction.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=7 * 86400, max_rows=100000, persistent=True):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.persistent = persistent
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stores = 0
+        self.counters = {'memory_hits': 0, 'persistent_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def _remember(self, key, value, stored_at):
+        with self._lock:
+            self._entries[key] = (value, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def get(self, key):
+        """Returns the cached {category, title} dict for key, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[1] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.counters['memory_hits'] += 1
+                return dict(entry[0])
+            if entry:
+                del self._entries[key]
+
+        if self.persistent:
+            cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+            with db.engine.connect() as connection:
+                row = connection.execute(
+                    select(CategorizationCacheEntry.category, CategorizationCacheEntry.title, CategorizationCacheEntry.created_at)
+                    .where(CategorizationCacheEntry.key == key, CategorizationCacheEntry.created_at >= cutoff)
+                ).first()
+            if row:
+                value = {'category': row.category, 'title': row.title}
+                stored_at = now - (datetime.utcnow() - row.created_at).total_seconds()
+                self._remember(key, value, stored_at)
+                self._count('persistent_hits')
+                return dict(value)
+
+        self._count('misses')
+        return None
+
+    def put(self, key, value):
+        """Stores a {category, title} dict in both tiers."""
+        value = {'category': value['category'], 'title': value['title']}
+        self._remember(key, value, time.time())
+        self._count('stores')
+        if not self.persistent:
+            return
+
+        with db.engine.begin() as connection:
+            connection.execute(delete(CategorizationCacheEntry.__table__).where(CategorizationCacheEntry.key == key))
+            connection.execute(CategorizationCacheEntry.__table__.insert().values(
+                key=key, category=value['category'], title=value['title'], created_at=datetime.utcnow()
+            ))
+
+        with self._lock:
+            self._stores += 1
+            due = self._stores % PRUNE_EVERY == 0
+        if due:
+            self.prune()
+
+    def prune(self):
+        """Deletes expired rows and the oldest rows beyond max_rows from the persistent tier."""
+        table = CategorizationCacheEntry.__table__
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        with db.engine.begin() as connection:
+            removed = connection.execute(delete(table).where(table.c.created_at < cutoff)).rowcount
+            overflow = connection.execute(select(func.count()).select_from(table)).scalar() - self.max_rows
+            if overflow > 0:
+                oldest = select(table.c.key).order_by(table.c.created_at.asc()).limit(overflow)
+                removed += connection.execute(delete(table).where(table.c.key.in_(oldest))).rowcount
+        self._count('evictions', removed)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            counters['memory_entries'] = len(self._entries)
+        lookups = counters['memory_hits'] + counters['persistent_hits'] + counters['misses']
+        counters['hit_rate'] = (counters['memory_hits'] + counters['persistent_hits']) / lookups if lookups else 0.0
+        return counters
+
+
+def get_categorization_cache():
+    """
+    Returns the app's categorization cache, creating it on first use from the CATEGORIZATION_CACHE_* settings.
+    """
+    cache = current_app.extensions.get('categorization_cache')
+    if cache is None:
+        cache = CategorizationCache(
+            max_entries=current_app.config['CATEGORIZATION_CACHE_SIZE'],
+            ttl_seconds=current_app.config['CATEGORIZATION_CACHE_TTL_SECONDS'],
+            max_rows=current_app.config['CATEGORIZATION_CACHE_MAX_ROWS'],
+            persistent=current_app.config['CATEGORIZATION_CACHE_PERSISTENT']
+        )
+        current_app.extensions['categorization_cache'] = cache
+    return cache
@@ -0,0 +1,214 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict, namedtuple
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+CATEGORIES = ["Pothole", "Garbage", "Streetlight", "Graffiti", "Flooding", "Damaged Signage", "Other"]
+
+# Pseudo-documents that give an untrained model sensible priors for each category.
+# Words shared across categories (street, road, light, ...) are left out on purpose.
+SEED_KEYWORDS = {
+    "Pothole": "pothole potholes crater cracked asphalt sinkhole tarmac pavement",
+    "Garbage": "garbage trash rubbish litter waste dump dumped dumping bin bins overflowing debris refuse junk",
+    "Streetlight": "streetlight streetlights lamp lamppost flickering bulb dark unlit lights",
+    "Graffiti": "graffiti spray sprayed painted vandalism vandalized tagging mural defaced",
+    "Flooding": "flood flooding flooded drain drains clogged sewer puddle waterlogged underwater",
+    "Damaged Signage": "sign signs signage signpost bent knocked faded",
+    "Other": "noise tree fallen branch abandoned parking animal smell bench",
+}
+
+# Each seed keyword counts as this many observations, so one clear keyword is enough evidence
+SEED_WEIGHT = 10
+
+CATEGORY_TITLES = {
+    "Pothole": "Pothole",
+    "Garbage": "Garbage accumulation",
+    "Streetlight": "Streetlight outage",
+    "Graffiti": "Graffiti",
+    "Flooding": "Flooding",
+    "Damaged Signage": "Damaged sign",
+    "Other": "Issue",
+}
+
+PLACE_PATTERN = re.compile(
+    r"\b(on|at|near|along|outside|by)\s+((?:the\s+)?(?:[\w'-]+\s+){0,3}?"
+    r"(?:street|st|road|rd|avenue|ave|boulevard|blvd|lane|ln|drive|dr|way|highway|hwy|park|square|bridge|corner))\b",
+    re.IGNORECASE
+)
+
+Prediction = namedtuple('Prediction', ['category', 'confidence', 'title'])
+
+
+def tokenize(text):
+    """Lowercase word unigrams plus bigrams."""
+    words = re.findall(r"[a-z0-9']+", text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def generate_title(category, description):
+    """Builds a short title such as 'Pothole on Main Street' from the description."""
+    base = CATEGORY_TITLES[category]
+    match = PLACE_PATTERN.search(description)
+    if match:
+        place = " ".join(word.capitalize() if word.lower() != 'the' else 'the' for word in match.group(2).split())
+        return f"{base} {match.group(1).lower()} {place}"[:150]
+    return f"{base} reported"
+
+
+class LocalClassifier:
+    """
+    Multinomial naive Bayes over unigrams and bigrams, seeded with category keywords.
+
+    predict() returns the most likely category with its posterior probability as
+    the confidence. It is cheap enough to run before every Gemini call, and only
+    predictions at or above the confidence threshold are used in place of the model.
+    """
+
+    def __init__(self, threshold=0.75, smoothing=0.5):
+        self.threshold = threshold
+        self.smoothing = smoothing
+        self.token_counts = defaultdict(Counter)
+        self.doc_counts = Counter()
+        self.trained_documents = 0
+        self._totals = None
+        for category, keywords in SEED_KEYWORDS.items():
+            self._add(category, keywords, weight=SEED_WEIGHT)
+
+    def _add(self, category, text, weight=1):
+        for token in tokenize(text):
+            self.token_counts[category][token] += weight
+        self.doc_counts[category] += 1
+
+    def train(self, rows):
+        """Adds (description, category) pairs to the model. Unknown categories are ignored."""
+        for description, category in rows:
+            if category in CATEGORIES and description:
+                self._add(category, description)
+                self.trained_documents += 1
+        self._totals = None
+
+    def _prepare(self):
+        """
+        Caches the log prior and smoothed token total of every category. Priors are
+        smoothed like token counts, so a category without documents (e.g. in a model
+        file from an older build) gets a small prior instead of log(0).
+        """
+        totals = self._totals
+        if totals is None:
+            vocabulary = len(set().union(*(counts.keys() for counts in self.token_counts.values())))
+            total_docs = sum(self.doc_counts[category] for category in CATEGORIES) + self.smoothing * len(CATEGORIES)
+            totals = {
+                category: (
+                    math.log((self.doc_counts[category] + self.smoothing) / total_docs),
+                    sum(self.token_counts[category].values()) + self.smoothing * vocabulary
+                )
+                for category in CATEGORIES
+            }
+            self._totals = totals
+        return totals
+
+    def predict(self, description):
+        tokens = [token for token in tokenize(description)
+                  if any(token in self.token_counts[category] for category in CATEGORIES)]
+        if not tokens:
+            return Prediction("Other", 0.0, generate_title("Other", description))
+
+        totals = self._prepare()
+        scores = {}
+        for category in CATEGORIES:
+            prior, denominator = totals[category]
+            counts = self.token_counts[category]
+            scores[category] = prior + sum(math.log((counts[token] + self.smoothing) / denominator) for token in tokens)
+
+        best = max(scores, key=scores.get)
+        # Softmax over the log scores gives the posterior of the best category
+        top = scores[best]
+        confidence = 1.0 / sum(math.exp(score - top) for score in scores.values())
+        return Prediction(best, confidence, generate_title(best, description))
+
+    def confident_prediction(self, description):
+        """Returns the prediction if it is confident enough to skip the LLM, else None."""
+        prediction = self.predict(description)
+        # 'Other' is the catch-all, so leave those to the model which may know better
+        if prediction.category != "Other" and prediction.confidence >= self.threshold:
+            return prediction
+        return None
+
+    def to_json(self):
+        return {
+            "token_counts": {category: dict(counts) for category, counts in self.token_counts.items()},
+            "doc_counts": dict(self.doc_counts),
+            "trained_documents": self.trained_documents,
+            "smoothing": self.smoothing,
+        }
+
+    @classmethod
+    def from_json(cls, data, threshold=0.75):
+        classifier = cls(threshold=threshold, smoothing=data.get("smoothing", 0.5))
+        classifier.token_counts = defaultdict(Counter, {c: Counter(t) for c, t in data["token_counts"].items()})
+        classifier.doc_counts = Counter(data["doc_counts"])
+        classifier.trained_documents = data.get("trained_documents", 0)
+        classifier._totals = None
+        return classifier
+
+
+def training_rows_from_database():
+    """
+    Yields (description, category) pairs of every issue categorized by Gemini or
+    an admin. Issues the classifier categorized itself are left out, so it never
+    learns from, and reinforces, its own mistakes.
+    """
+    from ..extensions import db
+    from ..models import Issue, CATEGORY_SOURCE_GEMINI, CATEGORY_SOURCE_ADMIN
+    query = db.session.query(Issue.description, Issue.category).filter(
+        Issue.processing_state.is_(None),
+        Issue.category_source.in_([CATEGORY_SOURCE_GEMINI, CATEGORY_SOURCE_ADMIN])
+    ).execution_options(yield_per=1000)
+    for description, category in query:
+        yield description, category
+
+
+_classifier_lock = threading.Lock()
+
+
+def get_local_classifier():
+    """
+    Returns the app's classifier, loading CLASSIFIER_MODEL_PATH when it exists
+    and falling back to the keyword-seeded model otherwise.
+    """
+    classifier = current_app.extensions.get('local_classifier')
+    if classifier is None:
+        with _classifier_lock:
+            classifier = current_app.extensions.get('local_classifier')
+            if classifier is None:
+                threshold = current_app.config['CLASSIFIER_CONFIDENCE']
+                path = current_app.config['CLASSIFIER_MODEL_PATH']
+                if path and os.path.exists(path):
+                    with open(path) as f:
+                        classifier = LocalClassifier.from_json(json.load(f), threshold=threshold)
+                else:
+                    classifier = LocalClassifier(threshold=threshold)
+                current_app.extensions['local_classifier'] = classifier
+    return classifier
+
+
+classifier_cli = AppGroup('classifier', help="Local issue classifier commands.")
+
+
+@classifier_cli.command('train')
+@click.option('--output', default=None, help="Where to write the model. Defaults to CLASSIFIER_MODEL_PATH.")
+def train_command(output):
+    """Trains the local classifier from the issues table."""
+    output = output or current_app.config['CLASSIFIER_MODEL_PATH']
+    if not output:
+        raise click.UsageError("Pass --output or set CLASSIFIER_MODEL_PATH.")
+    classifier = LocalClassifier(threshold=current_app.config['CLASSIFIER_CONFIDENCE'])
+    classifier.train(training_rows_from_database())
+    with open(output, 'w') as f:
+        json.dump(classifier.to_json(), f)
+    click.echo(f"Trained on {classifier.trained_documents} issue(s), written to {output}.")
@@ -0,0 +1,130 @@
+import threading
+import time
+from urllib.parse import urlparse
+from sqlalchemy import event
+from sqlalchemy.pool import NullPool, QueuePool
+from ..extensions import db
+
+
+def resolve_pool_mode(database_url, mode):
+    """
+    'queue' or 'null' for Postgres URLs, 'default' for SQLite (left to SQLAlchemy).
+    'auto' means 'null' for Neon's pooled '-pooler' endpoints, whose PgBouncer
+    already pools server-side, and 'queue' otherwise.
+    """
+    if not database_url or database_url.startswith('sqlite'):
+        return 'default'
+    if mode == 'auto':
+        return 'null' if '-pooler' in (urlparse(database_url).hostname or '') else 'queue'
+    if mode not in ('queue', 'null'):
+        raise ValueError(f"Unknown DB_POOL_MODE '{mode}'")
+    return mode
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the DB_* settings."""
+    mode = resolve_pool_mode(config['SQLALCHEMY_DATABASE_URI'], config['DB_POOL_MODE'])
+    if mode == 'default':
+        # SQLite stands in for Postgres locally; its pools have no size or overflow
+        return {}
+    options = {'connect_args': {'connect_timeout': config['DB_CONNECT_TIMEOUT']}}
+    if mode == 'null':
+        options['poolclass'] = NullPool
+        return options
+    options.update({
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        # Reuse the most recent connection so idle ones age out through pool_recycle
+        'pool_use_lifo': True,
+    })
+    return options
+
+
+class PoolMetrics:
+    """Counters of one engine's pool: new connections, checkouts and time spent waiting for one."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self._lock = threading.Lock()
+        self.counters = {'connects': 0, 'checkouts': 0, 'invalidations': 0, 'timeouts': 0, 'waits': 0}
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.counters['waits'] += 1
+            if timed_out:
+                self.counters['timeouts'] += 1
+
+    def stats(self, pool):
+        with self._lock:
+            stats = dict(self.counters)
+            waits = stats['waits']
+            stats.update({
+                'mode': self.mode,
+                'poolClass': type(pool).__name__,
+                'waitMsTotal': round(self.wait_total * 1000, 3),
+                'waitMsMax': round(self.wait_max * 1000, 3),
+                'waitMsAvg': round(self.wait_total * 1000 / waits, 3) if waits else 0.0,
+            })
+        if isinstance(pool, QueuePool):
+            stats.update({
+                'size': pool.size(),
+                'checkedOut': pool.checkedout(),
+                'checkedIn': pool.checkedin(),
+                'overflow': pool.overflow(),
+            })
+        return stats
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited to its PoolMetrics."""
+
+    metrics = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def install_pool_metrics(app):
+    """Hooks PoolMetrics into the app's engine. Call after db.init_app()."""
+    with app.app_context():
+        engine = db.engine
+        metrics = PoolMetrics(resolve_pool_mode(app.config['SQLALCHEMY_DATABASE_URI'], app.config['DB_POOL_MODE']))
+        event.listen(engine, 'connect', lambda *args: metrics.count('connects'))
+        event.listen(engine, 'checkout', lambda *args: metrics.count('checkouts'))
+        event.listen(engine, 'invalidate', lambda *args: metrics.count('invalidations'))
+        if isinstance(engine.pool, InstrumentedQueuePool):
+            engine.pool.metrics = metrics
+        app.extensions['pool_metrics'] = metrics
+
+
+def pool_stats():
+    """Current pool stats of the app's engine, or None if metrics were not installed."""
+    from flask import current_app
+    metrics = current_app.extensions.get('pool_metrics')
+    return metrics.stats(db.engine.pool) if metrics is not None else None
@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import defaultdict
+from flask import current_app
+from sqlalchemy import func
+from ..extensions import db
+from ..models import Issue, IssueStatus
+from .worker_locator import get_worker_locator, haversine_meters
+
+# Issues that still need a worker's attention count towards their load
+OPEN_STATUSES = (IssueStatus.Pending, IssueStatus.InProgress)
+
+# Size in degrees of the grid cells bulk dispatch shares candidate lookups across (~1km)
+BULK_CELL_DEGREES = 0.01
+
+
+class WorkerLoadCounters:
+    """
+    Per-process cache of how many open issues each worker holds.
+
+    Loaded with one GROUP BY on first use and then adjusted in place as routes
+    assign issues or change their status. Reloaded every refresh_seconds so that
+    changes made by other processes are eventually reflected.
+    """
+
+    def __init__(self, refresh_seconds=60):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._counts = None
+        self._loaded_at = None
+
+    def _load(self):
+        rows = db.session.query(Issue.assigned_to_id, func.count(Issue.id)).filter(
+            Issue.assigned_to_id.isnot(None),
+            Issue.status.in_(OPEN_STATUSES)
+        ).group_by(Issue.assigned_to_id).all()
+        self.replace_all({worker_id: count for worker_id, count in rows})
+
+    def replace_all(self, counts):
+        """Replaces the counters with a {worker_id: open_issue_count} mapping."""
+        with self._lock:
+            self._counts = defaultdict(int, counts)
+            self._loaded_at = time.monotonic()
+
+    def snapshot(self):
+        """Returns a copy of the current {worker_id: open_issue_count} mapping."""
+        with self._lock:
+            expired = self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds
+        if expired:
+            self._load()
+        with self._lock:
+            return defaultdict(int, self._counts)
+
+    def invalidate(self):
+        with self._lock:
+            self._counts = None
+            self._loaded_at = None
+
+    def record_transition(self, old_worker_id, old_status, new_worker_id, new_status):
+        """
+        Adjusts the counters after an issue moved from (old_worker_id, old_status)
+        to (new_worker_id, new_status). Pass None for the old side of a new issue.
+        """
+        with self._lock:
+            if self._counts is None:
+                # Not loaded yet, the first read will count from the database
+                return
+            if old_worker_id is not None and old_status in OPEN_STATUSES:
+                self._counts[old_worker_id] = max(0, self._counts[old_worker_id] - 1)
+            if new_worker_id is not None and new_status in OPEN_STATUSES:
+                self._counts[new_worker_id] += 1
+
+
+class DispatchEngine:
+    """
+    Picks a worker for an issue by weighing distance against current workload.
+
+    The score of a candidate is its distance in meters plus load_penalty_meters for
+    every open issue it already holds; the lowest score wins. Only the
+    candidate_count nearest workers are considered.
+    """
+
+    def __init__(self, locator, loads, candidate_count=10, load_penalty_meters=1000):
+        self.locator = locator
+        self.loads = loads
+        self.candidate_count = candidate_count
+        self.load_penalty_meters = load_penalty_meters
+
+    def score(self, distance, load):
+        return distance + self.load_penalty_meters * load
+
+    def pick_worker(self, lat, lng):
+        """Returns the locator dict of the best worker for a new issue at (lat, lng), or None."""
+        candidates = self.locator.nearest(lat, lng, k=self.candidate_count)
+        if not candidates:
+            return None
+        loads = self.loads.snapshot()
+        return min(candidates, key=lambda worker: self.score(worker["distance"], loads[worker["id"]]))
+
+    def assign_bulk(self, issues, release_current=False):
+        """
+        Assigns a batch of issues in a single in-memory pass.
+
+        issues is an iterable of (issue_id, lat, lng, assigned_to_id) tuples, oldest
+        first. When release_current is True the issues' current assignments are
+        removed from the workload first, so the batch is rebalanced from scratch.
+        Issues in the same ~1km grid cell share one candidate lookup, and a running
+        copy of the workload is updated after every pick so the batch spreads out.
+        Returns a list of (issue_id, worker) pairs, where worker is a candidate dict.
+        """
+        issues = list(issues)
+        loads = self.loads.snapshot()
+        if release_current:
+            for _, _, _, worker_id in issues:
+                if worker_id is not None:
+                    loads[worker_id] = max(0, loads[worker_id] - 1)
+
+        candidates_by_cell = {}
+        assignments = []
+        for issue_id, lat, lng, _ in issues:
+            cell = (round(lat / BULK_CELL_DEGREES), round(lng / BULK_CELL_DEGREES))
+            candidates = candidates_by_cell.get(cell)
+            if candidates is None:
+                # Ask for extra candidates so the shared list still holds each issue's true neighbours
+                candidates = self.locator.nearest(
+                    cell[0] * BULK_CELL_DEGREES, cell[1] * BULK_CELL_DEGREES, k=self.candidate_count * 2
+                )
+                candidates_by_cell[cell] = candidates
+            if not candidates:
+                continue
+
+            best, best_score, best_distance = None, None, None
+            for worker in candidates:
+                distance = haversine_meters(lat, lng, worker["lat"], worker["lng"])
+                worker_score = self.score(distance, loads[worker["id"]])
+                if best is None or worker_score < best_score:
+                    best, best_score, best_distance = worker, worker_score, distance
+            loads[best["id"]] += 1
+            assignments.append((issue_id, dict(best, distance=best_distance)))
+        return assignments
+
+
+def get_dispatch_engine():
+    """
+    Returns the app's dispatch engine, creating it on first use from the DISPATCH_* settings.
+    """
+    engine = current_app.extensions.get('dispatch_engine')
+    if engine is None:
+        engine = DispatchEngine(
+            get_worker_locator(),
+            WorkerLoadCounters(refresh_seconds=current_app.config['DISPATCH_LOAD_REFRESH_SECONDS']),
+            candidate_count=current_app.config['DISPATCH_CANDIDATES'],
+            load_penalty_meters=current_app.config['DISPATCH_LOAD_PENALTY_METERS']
+        )
+        current_app.extensions['dispatch_engine'] = engine
+    return engine
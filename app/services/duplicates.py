@@ -0,0 +1,79 @@
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select
+from ..extensions import db
+from ..models import Issue
+from ..utils.geohash import radius_box
+from ..utils.issue_map import box_filter
+from .classifier import get_local_classifier
+from .dispatch import OPEN_STATUSES
+from .worker_locator import haversine_meters
+
+# Words that say nothing about the problem itself. Nearby reports share the street name anyway
+IGNORED_WORDS = frozenset("""
+    a an the and or of to in on at near by along outside from with for is are was there this that it its
+    has have been very big huge large small please again still some here
+    street st road rd avenue ave boulevard blvd lane ln drive dr way highway hwy corner
+""".split())
+
+DuplicateMatch = namedtuple('DuplicateMatch', ['public_id', 'similarity', 'meters'])
+
+
+def trigrams(text):
+    """
+    Character trigrams of each word, padded the way pg_trgm does ('  w', ' wo', 'wor', 'ord', 'rd '),
+    so word order and small spelling differences barely matter.
+    """
+    grams = set()
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if word in IGNORED_WORDS:
+            continue
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a, b):
+    """Jaccard similarity of two trigram sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def find_duplicate(description, lat, lng):
+    """
+    Looks for an open issue reported within DUPLICATE_RADIUS_METERS and the last
+    DUPLICATE_WINDOW_DAYS whose description or title reads like this one. Returns
+    the best DuplicateMatch at or above DUPLICATE_SIMILARITY, or None.
+
+    When the local classifier is confident about the report's category, issues
+    already categorized as something else are not considered. Candidates come from
+    the geohash index as a handful of narrow rows, so the check costs one small
+    query and no model calls.
+    """
+    config = current_app.config
+    radius = config['DUPLICATE_RADIUS_METERS']
+    since = datetime.utcnow() - timedelta(days=config['DUPLICATE_WINDOW_DAYS'])
+    rows = db.session.execute(
+        select(Issue.public_id, Issue.title, Issue.description, Issue.category, Issue.processing_state,
+               Issue.location_lat, Issue.location_lng)
+        .where(box_filter(*radius_box(lat, lng, radius)), Issue.status.in_(OPEN_STATUSES), Issue.created_at >= since)
+        .limit(config['MAP_MAX_CANDIDATES'])
+    )
+
+    prediction = get_local_classifier().confident_prediction(description) if config['CLASSIFIER_ENABLED'] else None
+    grams = trigrams(description)
+    best = None
+    for row in rows:
+        meters = haversine_meters(lat, lng, row.location_lat, row.location_lng)
+        if meters > radius:
+            continue
+        # Placeholders of the async pipeline do not have their real category yet
+        if prediction and row.processing_state is None and row.category not in (prediction.category, "Other"):
+            continue
+        score = max(similarity(grams, trigrams(row.description)), similarity(grams, trigrams(row.title)))
+        if score >= config['DUPLICATE_SIMILARITY'] and (best is None or (score, -meters) > (best.similarity, -best.meters)):
+            best = DuplicateMatch(row.public_id, score, meters)
+    return best
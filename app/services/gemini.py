@@ -0,0 +1,47 @@
+import threading
+from flask import current_app
+from .classifier import CATEGORIES
+
+_gemini_lock = threading.Lock()
+
+
+def get_gemini_model():
+    """
+    Returns the app's Gemini model. The SDK is imported and configured on first
+    use, so instances that never categorize an issue (logins, listings) don't
+    load it during their cold start.
+    """
+    model = current_app.extensions.get('gemini_model')
+    if model is None:
+        with _gemini_lock:
+            model = current_app.extensions.get('gemini_model')
+            if model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=current_app.config['GEMINI_API_KEY'])
+                model = genai.GenerativeModel(current_app.config['GEMINI_MODEL'])
+                current_app.extensions['gemini_model'] = model
+    return model
+
+
+_schema = None
+
+
+def issue_category_schema():
+    """The pydantic model Gemini's JSON answer must match, built on first use for the same reason."""
+    global _schema
+    if _schema is None:
+        from typing import Literal
+        from pydantic import BaseModel
+
+        class IssueCategorySchema(BaseModel):
+            category: Literal[tuple(CATEGORIES)]
+            title: str
+
+        _schema = IssueCategorySchema
+    return _schema
+
+
+def categorization_config():
+    """GenerationConfig forcing Gemini to answer with issue_category_schema() JSON."""
+    import google.generativeai as genai
+    return genai.GenerationConfig(response_schema=issue_category_schema())
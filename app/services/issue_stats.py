@@ -0,0 +1,163 @@
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+import click
+from flask.cli import AppGroup
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from ..extensions import db
+from ..models import Issue, IssueStatsBucket, User
+
+# What one issue contributes to the rollup: the buckets it is counted in, and its rating
+IssueStatsSnapshot = namedtuple('IssueStatsSnapshot', ['buckets', 'rating'])
+
+
+def week_of(created_at):
+    """Monday of the week created_at falls in, as an ISO date."""
+    day = created_at.date()
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def stats_buckets(created_at, status, category, assigned_to_id):
+    return (
+        ('total', ''),
+        ('status', status.value),
+        ('category', category),
+        ('worker', str(assigned_to_id or '')),
+        ('week', week_of(created_at)),
+    )
+
+
+def issue_stats_snapshot(issue):
+    """Captures what an issue currently counts towards. Take one before and one after changing it."""
+    return IssueStatsSnapshot(
+        stats_buckets(issue.created_at, issue.status, issue.category, issue.assigned_to_id),
+        issue.rating
+    )
+
+
+def _contribution(deltas, snapshot, sign):
+    for key in snapshot.buckets:
+        delta = deltas[key]
+        delta[0] += sign
+        if snapshot.rating is not None:
+            delta[1] += sign * snapshot.rating
+            delta[2] += sign
+
+
+def _apply(deltas):
+    """Adds the non-zero deltas to their buckets with one upsert, inside the session's transaction."""
+    rows = [
+        {'dimension': dimension, 'bucket': bucket, 'issue_count': count, 'rating_sum': rating_sum, 'rating_count': rating_count}
+        # Sorted so concurrent transactions lock shared buckets in the same order and cannot deadlock
+        for (dimension, bucket), (count, rating_sum, rating_count) in sorted(deltas.items())
+        if count or rating_sum or rating_count
+    ]
+    if not rows:
+        return
+    table = IssueStatsBucket.__table__
+    dialect = db.session.get_bind().dialect.name
+    upsert = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}.get(dialect)
+    if upsert is None:
+        raise NotImplementedError(f"issue_stats needs INSERT ... ON CONFLICT, which {dialect} does not provide")
+    statement = upsert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.dimension, table.c.bucket],
+        set_={
+            'issue_count': table.c.issue_count + statement.excluded.issue_count,
+            'rating_sum': table.c.rating_sum + statement.excluded.rating_sum,
+            'rating_count': table.c.rating_count + statement.excluded.rating_count,
+        }
+    )
+    db.session.execute(statement, rows)
+
+
+def record_issue_change(before, after):
+    """
+    Moves an issue's contribution from the `before` snapshot to the `after` one.
+    Pass before=None for a new issue. Runs in the caller's transaction, so call it
+    before committing the change itself.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0])
+    if before is not None:
+        _contribution(deltas, before, -1)
+    if after is not None:
+        _contribution(deltas, after, +1)
+    _apply(deltas)
+
+
+def record_reassignments(changes):
+    """Moves (old_worker_id, new_worker_id, rating) issues between worker buckets in one pass."""
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for old_worker_id, new_worker_id, rating in changes:
+        _contribution(deltas, IssueStatsSnapshot((('worker', str(old_worker_id or '')),), rating), -1)
+        _contribution(deltas, IssueStatsSnapshot((('worker', str(new_worker_id or '')),), rating), +1)
+    _apply(deltas)
+
+
+def rebuild_issue_stats():
+    """Recomputes the whole rollup from the issues table and returns how many issues it counted."""
+    deltas = defaultdict(lambda: [0, 0, 0])
+    counted = 0
+    rows = db.session.execute(
+        select(Issue.created_at, Issue.status, Issue.category, Issue.assigned_to_id, Issue.rating)
+        .execution_options(yield_per=5000)
+    )
+    for created_at, status, category, assigned_to_id, rating in rows:
+        _contribution(deltas, IssueStatsSnapshot(stats_buckets(created_at, status, category, assigned_to_id), rating), +1)
+        counted += 1
+    db.session.execute(delete(IssueStatsBucket))
+    _apply(deltas)
+    return counted
+
+
+def _average(rating_sum, rating_count):
+    return round(rating_sum / rating_count, 2) if rating_count else None
+
+
+def read_issue_stats(since=None):
+    """
+    Builds the dashboard summary from the rollup. Reads one row per bucket, never
+    the issues themselves. `since` (an ISO date) limits the weekly series.
+    """
+    grouped = defaultdict(dict)
+    for row in db.session.scalars(select(IssueStatsBucket).where(IssueStatsBucket.issue_count > 0)):
+        grouped[row.dimension][row.bucket] = row
+
+    total = grouped['total'].get('')
+    worker_ids = [int(bucket) for bucket in grouped['worker'] if bucket]
+    workers = {user.id: user for user in User.query.filter(User.id.in_(worker_ids))} if worker_ids else {}
+
+    by_worker = []
+    for bucket, row in grouped['worker'].items():
+        worker = workers.get(int(bucket)) if bucket else None
+        by_worker.append({
+            'workerId': worker.email if worker else None,
+            'workerName': f"{worker.first_name} {worker.last_name}" if worker else None,
+            'count': row.issue_count,
+            'averageRating': _average(row.rating_sum, row.rating_count)
+        })
+    by_worker.sort(key=lambda entry: -entry['count'])
+
+    return {
+        'total': total.issue_count if total else 0,
+        'averageRating': _average(total.rating_sum, total.rating_count) if total else None,
+        'byStatus': {bucket: row.issue_count for bucket, row in grouped['status'].items()},
+        'byCategory': {bucket: row.issue_count for bucket, row in grouped['category'].items()},
+        'byWorker': by_worker,
+        'byWeek': [
+            {'week': bucket, 'count': row.issue_count, 'averageRating': _average(row.rating_sum, row.rating_count)}
+            for bucket, row in sorted(grouped['week'].items())
+            if since is None or bucket >= since
+        ],
+    }
+
+
+stats_cli = AppGroup('stats', help="Issue statistics rollup commands.")
+
+
+@stats_cli.command('rebuild')
+def rebuild_command():
+    """Recomputes the issue_stats rollup from scratch."""
+    counted = rebuild_issue_stats()
+    db.session.commit()
+    click.echo(f"Rebuilt issue statistics from {counted} issue(s).")
@@ -0,0 +1,209 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+# Job name -> handler(payload, final_attempt). Handlers register themselves with @job(...)
+JOB_HANDLERS = {}
+
+
+def job(name):
+    """Registers the decorated function as the handler for jobs called `name`."""
+    def decorator(f):
+        JOB_HANDLERS[name] = f
+        return f
+    return decorator
+
+
+class JobQueue:
+    """
+    Runs registered job handlers outside the request that enqueued them.
+    Payloads must be JSON-serializable; handlers run inside an app context.
+    final_attempt tells a handler whether the queue will retry it if it raises,
+    so it only gives up on state it needs for a retry when there will be none.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def enqueue(self, name, payload):
+        raise NotImplementedError
+
+    def _execute(self, name, payload, final_attempt=True):
+        handler = JOB_HANDLERS[name]
+        with self.app.app_context():
+            handler(payload, final_attempt)
+
+
+class ThreadJobQueue(JobQueue):
+    """
+    In-process queue backed by a thread pool. Jobs are lost if the process exits
+    before they run, so it suits long-lived servers such as gunicorn.
+    """
+
+    def __init__(self, app, workers=2):
+        super().__init__(app)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+
+    def enqueue(self, name, payload):
+        # Round-trip through JSON so both backends accept exactly the same payloads
+        payload = json.loads(json.dumps(payload))
+        self._executor.submit(self._run, name, payload)
+
+    def _run(self, name, payload):
+        try:
+            self._execute(name, payload)
+        except Exception as e:
+            print(f"Job '{name}' failed: {e}")
+            traceback.print_exc()
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Durable queue stored in a SQLite file. Jobs survive restarts, and any process
+    pointing at the same file can drain it, including `flask jobs work`.
+    Failed jobs, and jobs left 'running' for longer than stale_seconds (e.g.
+    because the process died), are picked up again, up to max_attempts times.
+    After that they stay in the table in the 'failed' state with their last error.
+    """
+
+    def __init__(self, app, path, workers=1, poll_seconds=1.0, stale_seconds=300, max_attempts=3, start_workers=True):
+        super().__init__(app)
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self.stale_seconds = stale_seconds
+        self.max_attempts = max_attempts
+        self._wakeup = threading.Event()
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+        if start_workers:
+            for i in range(workers):
+                threading.Thread(target=self._work_forever, name=f'sqlite-job-{i}', daemon=True).start()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def enqueue(self, name, payload):
+        self._connection().execute(
+            "INSERT INTO jobs (name, payload, updated_at) VALUES (?, ?, ?)",
+            (name, json.dumps(payload), time.time())
+        )
+        self._wakeup.set()
+
+    def _claim(self):
+        connection = self._connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # A stale job whose last attempt died with its process will not be retried
+            connection.execute("""
+                UPDATE jobs SET state = 'failed', error = coalesce(error, 'Worker died during the last attempt'), updated_at = ?
+                WHERE state = 'running' AND updated_at < ? AND attempts >= ?
+            """, (now, now - self.stale_seconds, self.max_attempts))
+            row = connection.execute("""
+                SELECT id, name, payload, attempts + 1 FROM jobs
+                WHERE attempts < ?
+                  AND (state = 'queued' OR (state = 'running' AND updated_at < ?))
+                ORDER BY id LIMIT 1
+            """, (self.max_attempts, now - self.stale_seconds)).fetchone()
+            if row:
+                connection.execute(
+                    "UPDATE jobs SET state = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (now, row[0])
+                )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return row
+
+    def run_pending(self, max_jobs=None):
+        """Runs queued jobs in the calling thread until none are left. Returns how many ran."""
+        ran = 0
+        while max_jobs is None or ran < max_jobs:
+            row = self._claim()
+            if row is None:
+                break
+            job_id, name, payload, attempt = row
+            final_attempt = attempt >= self.max_attempts
+            try:
+                self._execute(name, json.loads(payload), final_attempt)
+                self._connection().execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            except Exception as e:
+                print(f"Job {job_id} '{name}' failed (attempt {attempt} of {self.max_attempts}): {e}")
+                traceback.print_exc()
+                self._connection().execute(
+                    "UPDATE jobs SET state = ?, error = ?, updated_at = ? WHERE id = ?",
+                    ('failed' if final_attempt else 'queued', str(e), time.time(), job_id)
+                )
+            ran += 1
+        return ran
+
+    def _work_forever(self):
+        while True:
+            try:
+                if not self.run_pending():
+                    self._wakeup.wait(self.poll_seconds)
+                    self._wakeup.clear()
+            except Exception as e:
+                print(f"Job worker error: {e}")
+                time.sleep(self.poll_seconds)
+
+
+def get_job_queue():
+    """
+    Returns the app's job queue, creating it on first use from JOB_QUEUE_BACKEND.
+    """
+    queue = current_app.extensions.get('job_queue')
+    if queue is None:
+        app = current_app._get_current_object()
+        backend = current_app.config['JOB_QUEUE_BACKEND']
+        if backend == 'thread':
+            queue = ThreadJobQueue(app, workers=current_app.config['JOB_WORKERS'])
+        elif backend == 'sqlite':
+            queue = SQLiteJobQueue(app, current_app.config['JOB_QUEUE_PATH'], workers=current_app.config['JOB_WORKERS'])
+        else:
+            raise ValueError(f"Unknown JOB_QUEUE_BACKEND '{backend}'")
+        current_app.extensions['job_queue'] = queue
+    return queue
+
+
+jobs_cli = AppGroup('jobs', help="Background job queue commands.")
+
+
+@jobs_cli.command('work')
+@click.option('--once', is_flag=True, help="Drain the queue once and exit instead of polling forever.")
+def work_command(once):
+    """Runs jobs from the SQLite job queue in this process."""
+    app = current_app._get_current_object()
+    queue = SQLiteJobQueue(app, app.config['JOB_QUEUE_PATH'], start_workers=False)
+    if once:
+        click.echo(f"Ran {queue.run_pending()} job(s).")
+        return
+    queue._work_forever()
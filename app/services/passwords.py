@@ -0,0 +1,148 @@
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from ..extensions import bcrypt
+from .profiling import timed
+
+BCRYPT_ROUNDS_PATTERN = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when every hashing slot stays taken for longer than the wait timeout."""
+
+
+def _hash(password, rounds):
+    return bcrypt.generate_password_hash(password, rounds).decode('utf-8')
+
+
+def _check(password_hash, password):
+    return bcrypt.check_password_hash(password_hash, password)
+
+
+def rounds_of(password_hash):
+    """Returns the work factor a bcrypt hash was made with, or None if it is not a bcrypt hash."""
+    match = BCRYPT_ROUNDS_PATTERN.match(password_hash or '')
+    return int(match.group(1)) if match else None
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a pool of worker processes, so hashing uses every core and a
+    burst of logins doesn't hold the GIL of the process serving requests.
+
+    At most max_pending hashes are queued or running at once. A caller waits up
+    to wait_seconds for a slot and then gets PasswordHasherBusy, which routes
+    turn into 503 instead of piling up behind a saturated CPU. With workers=0,
+    or where processes cannot be started (e.g. no /dev/shm on serverless),
+    hashing runs on the calling thread under the same limit, and hash_many
+    spreads a batch over threads instead (bcrypt releases the GIL). Workers are
+    spawned, so they re-import the __main__ module: entry points must be
+    guarded by `if __name__ == '__main__'`, as gunicorn's and flask's are.
+    """
+
+    def __init__(self, rounds=12, workers=0, max_pending=16, wait_seconds=2.0):
+        self.rounds = rounds
+        self.wait_seconds = wait_seconds
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._threads = None
+        self._threads_lock = threading.Lock()
+        if workers > 0:
+            try:
+                # spawn rather than fork, the parent has job and upload threads running
+                self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            except (OSError, NotImplementedError) as e:
+                print(f"Password hashing pool unavailable, hashing inline: {e}")
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.wait_seconds):
+            raise PasswordHasherBusy()
+        try:
+            with timed('bcrypt'):
+                executor = self._executor
+                if executor is not None:
+                    try:
+                        return executor.submit(fn, *args).result()
+                    except BrokenProcessPool as e:
+                        # Worker processes could not start or died; hashing inline is slower but keeps logins working
+                        print(f"Password hashing pool broken, hashing inline from now on: {e}")
+                        self._executor = None
+                return fn(*args)
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(_hash, password, self.rounds)
+
+    def hash_many(self, passwords):
+        """
+        Hashes a batch in parallel and returns the hashes in order. Waits for slots
+        instead of failing, but never takes more than half of them, so logins keep
+        getting through while a bulk import runs.
+        """
+        with timed('bcrypt'):
+            return self._hash_many(passwords)
+
+    def _batch_executor(self):
+        """The process pool, or a thread pool sized to hash_many's share of the slots when there is none."""
+        if self._executor is not None:
+            return self._executor
+        with self._threads_lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=max(1, self.max_pending // 2), thread_name_prefix='bcrypt')
+            return self._threads
+
+    def _hash_many(self, passwords):
+        executor = self._batch_executor()
+        share = threading.BoundedSemaphore(max(1, self.max_pending // 2))
+
+        def release(_):
+            self._slots.release()
+            share.release()
+
+        futures = []
+        try:
+            for password in passwords:
+                share.acquire()
+                self._slots.acquire()
+                try:
+                    future = executor.submit(_hash, password, self.rounds)
+                except BaseException:
+                    release(None)
+                    raise
+                future.add_done_callback(release)
+                futures.append(future)
+            return [future.result() for future in futures]
+        except BrokenProcessPool as e:
+            print(f"Password hashing pool broken, hashing in threads from now on: {e}")
+            self._executor = None
+            for future in futures:
+                future.cancel()
+            return self._hash_many(passwords)
+
+    def verify(self, password_hash, password):
+        return self._run(_check, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True when the hash was made with a different work factor than the configured one."""
+        return rounds_of(password_hash) != self.rounds
+
+
+def get_password_hasher():
+    """
+    Returns the app's password hasher, creating it on first use from the BCRYPT_LOG_ROUNDS and PASSWORD_HASH_* settings.
+    """
+    hasher = current_app.extensions.get('password_hasher')
+    if hasher is None:
+        hasher = PasswordHasher(
+            rounds=current_app.config['BCRYPT_LOG_ROUNDS'],
+            workers=current_app.config['PASSWORD_HASH_WORKERS'],
+            max_pending=current_app.config['PASSWORD_HASH_MAX_PENDING'],
+            wait_seconds=current_app.config['PASSWORD_HASH_WAIT_SECONDS']
+        )
+        current_app.extensions['password_hasher'] = hasher
+    return hasher
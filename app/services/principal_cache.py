@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from ..extensions import db
+from ..models import User
+
+PRINCIPAL_FIELDS = ('id', 'email', 'first_name', 'last_name', 'mobile_number', 'role', 'location_lat', 'location_lng')
+
+
+class Principal:
+    """
+    Detached, read-only snapshot of the authenticated User.
+
+    It has the same column attributes as User, so role checks, ownership checks
+    and to_dict() work unchanged. Routes that modify the user or need its
+    password hash must call load() to get the real row.
+    """
+
+    __slots__ = PRINCIPAL_FIELDS
+
+    def __init__(self, user):
+        for field in PRINCIPAL_FIELDS:
+            object.__setattr__(self, field, getattr(user, field))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Principal is read-only, call load() to modify the user")
+
+    def to_dict(self):
+        return User.to_dict(self)
+
+    def load(self):
+        """Fetches the User row this snapshot was taken from."""
+        return db.session.get(User, self.id)
+
+
+class PrincipalCache:
+    """
+    Bounded LRU of user id -> Principal, so token_required can skip the users
+    query. Entries expire after ttl_seconds, which also bounds how long another
+    instance can serve a stale profile; this instance drops an entry as soon
+    as invalidate() is called for its user.
+    """
+
+    def __init__(self, max_entries=4096, ttl_seconds=30):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # Bumped by invalidate() so a lookup racing with it does not store a stale snapshot
+        self._generation = 0
+        self.counters = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0}
+
+    def get(self, user_id):
+        """Returns the Principal of user_id, querying the users table on a miss. None if there is no such user."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and now - entry[1] <= self.ttl_seconds:
+                self._entries.move_to_end(user_id)
+                self.counters['hits'] += 1
+                return entry[0]
+            self.counters['misses'] += 1
+            generation = self._generation
+
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        principal = Principal(user)
+        if self.ttl_seconds > 0:
+            with self._lock:
+                if generation != self._generation:
+                    return principal
+                self._entries[user_id] = (principal, now)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.counters['evictions'] += 1
+        return principal
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._generation += 1
+            self.counters['invalidations'] += 1
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            counters['entries'] = len(self._entries)
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_rate'] = counters['hits'] / lookups if lookups else 0.0
+        return counters
+
+
+def get_principal_cache():
+    """
+    Returns the app's principal cache, creating it on first use from the PRINCIPAL_CACHE_* settings.
+    """
+    cache = current_app.extensions.get('principal_cache')
+    if cache is None:
+        cache = PrincipalCache(
+            max_entries=current_app.config['PRINCIPAL_CACHE_SIZE'],
+            ttl_seconds=current_app.config['PRINCIPAL_CACHE_TTL_SECONDS']
+        )
+        current_app.extensions['principal_cache'] = cache
+    return cache
@@ -0,0 +1,253 @@
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from ..extensions import db
+from .database import pool_stats
+
+# Upper bounds in seconds, the Prometheus client defaults
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# Pool stats exported as gauges, and the counters among them
+POOL_GAUGES = {'size': 'size', 'checkedOut': 'checked_out', 'checkedIn': 'checked_in', 'overflow': 'overflow'}
+POOL_COUNTERS = {'connects': 'connects', 'checkouts': 'checkouts', 'invalidations': 'invalidations', 'timeouts': 'timeouts'}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, **extra):
+    pairs = list(zip(names, values)) + list(extra.items())
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in pairs)
+
+
+def _sample(name, labels, value):
+    return f"{name}{{{labels}}} {value}" if labels else f"{name} {value}"
+
+
+class Histogram:
+    """A Prometheus histogram with one series per tuple of label values."""
+
+    def __init__(self, name, documentation, label_names, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        with self._lock:
+            snapshot = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(_sample(f"{self.name}_bucket", _labels(self.label_names, labels, le=bound), cumulative))
+            lines.append(_sample(f"{self.name}_bucket", _labels(self.label_names, labels, le='+Inf'), count))
+            lines.append(_sample(f"{self.name}_sum", _labels(self.label_names, labels), round(total, 6)))
+            lines.append(_sample(f"{self.name}_count", _labels(self.label_names, labels), count))
+        return lines
+
+
+class RequestTiming:
+    """Per-request totals of each span, kept in flask.g while the request runs."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans = {}
+        self.profiler = None
+
+    def add(self, span, seconds):
+        calls, total = self.spans.get(span, (0, 0.0))
+        self.spans[span] = (calls + 1, total + seconds)
+
+    def server_timing(self, total_seconds):
+        entries = [f"total;dur={total_seconds * 1000:.1f}"]
+        for span, (calls, seconds) in self.spans.items():
+            entries.append(f'{span};dur={seconds * 1000:.1f};desc="{calls}x"')
+        return ', '.join(entries)
+
+
+class RequestMetrics:
+    """
+    Latency histograms of requests, SQL statements, Gemini calls, photo uploads and
+    bcrypt, plus sampled cProfile dumps of slow requests.
+
+    A `sample_rate` share of requests runs under cProfile, one at a time per process
+    (Python 3.12+ allows only one active profiler). Those that take at least
+    `slow_request_ms` are dumped to `profile_dir`, of which the newest `keep_profiles`
+    files are kept. Load a dump with `python -m pstats <file>` or snakeviz.
+    """
+
+    def __init__(self, sample_rate=0.0, slow_request_ms=500, profile_dir=None, keep_profiles=50):
+        self.sample_rate = sample_rate
+        self.slow_request_ms = slow_request_ms
+        self.profile_dir = profile_dir
+        self.keep_profiles = keep_profiles
+        self._profiler_lock = threading.Lock()
+        self._profiles_lock = threading.Lock()
+        self.profiles_written = 0
+        self.request_duration = Histogram(
+            'civic_http_request_duration_seconds', 'Time to handle a request.',
+            ('method', 'endpoint', 'status'), DURATION_BUCKETS)
+        self.request_statements = Histogram(
+            'civic_http_request_sql_statements', 'SQL statements executed per request.',
+            ('method', 'endpoint'), STATEMENT_BUCKETS)
+        self.span_duration = Histogram(
+            'civic_span_duration_seconds', 'Duration of each SQL statement, Gemini call, upload batch and bcrypt hash or check.',
+            ('span',), DURATION_BUCKETS)
+
+    def record(self, span, seconds):
+        self.span_duration.observe((span,), seconds)
+        timing = g.get('request_timing') if has_app_context() else None
+        if timing is not None:
+            timing.add(span, seconds)
+
+    def start_request(self):
+        timing = RequestTiming()
+        if self.sample_rate and random.random() < self.sample_rate and self._profiler_lock.acquire(blocking=False):
+            timing.profiler = cProfile.Profile()
+            timing.profiler.enable()
+        return timing
+
+    def stop_profiler(self, timing):
+        """Returns the request's profiler, stopped, or None if it was not sampled."""
+        profiler, timing.profiler = timing.profiler, None
+        if profiler is not None:
+            profiler.disable()
+            self._profiler_lock.release()
+        return profiler
+
+    def finish_request(self, timing, response):
+        seconds = time.perf_counter() - timing.start
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        profiler = self.stop_profiler(timing)
+
+        self.request_duration.observe((request.method, endpoint, str(response.status_code)), seconds)
+        self.request_statements.observe((request.method, endpoint), timing.spans.get('db', (0, 0.0))[0])
+        if profiler is not None and seconds * 1000 >= self.slow_request_ms:
+            self.dump_profile(profiler, endpoint, seconds)
+        return timing.server_timing(seconds)
+
+    def dump_profile(self, profiler, endpoint, seconds):
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', endpoint).strip('_') or 'root'
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{request.method}-{slug}-{int(seconds * 1000)}ms-{uuid.uuid4().hex[:8]}.prof"
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profiler.dump_stats(os.path.join(self.profile_dir, name))
+            with self._profiles_lock:
+                self.profiles_written += 1
+                profiles = sorted(entry for entry in os.listdir(self.profile_dir) if entry.endswith('.prof'))
+                for stale in profiles[:max(0, len(profiles) - self.keep_profiles)]:
+                    os.remove(os.path.join(self.profile_dir, stale))
+        except OSError as e:
+            print(f"Could not write profile {name}: {e}")
+
+    def render(self):
+        lines = self.request_duration.render() + self.request_statements.render() + self.span_duration.render()
+        lines += [
+            "# HELP civic_profiles_written_total cProfile dumps of slow requests written to PROFILE_DIR.",
+            "# TYPE civic_profiles_written_total counter",
+            f"civic_profiles_written_total {self.profiles_written}",
+        ]
+        return lines
+
+
+@contextmanager
+def timed(span):
+    """Records the time spent in the block as `span` when profiling is enabled."""
+    metrics = current_app.extensions.get('request_metrics') if has_app_context() else None
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.record(span, time.perf_counter() - start)
+
+
+def _pool_lines():
+    stats = pool_stats()
+    if stats is None:
+        return []
+    labels = _labels(('mode',), (stats['mode'],))
+    lines = []
+    for key, name in POOL_GAUGES.items():
+        if key in stats:
+            lines += [f"# TYPE civic_db_pool_{name} gauge", _sample(f"civic_db_pool_{name}", labels, stats[key])]
+    for key, name in POOL_COUNTERS.items():
+        lines += [f"# TYPE civic_db_pool_{name}_total counter", _sample(f"civic_db_pool_{name}_total", labels, stats[key])]
+    lines += ["# TYPE civic_db_pool_wait_seconds_total counter", _sample("civic_db_pool_wait_seconds_total", labels, stats['waitMsTotal'] / 1000)]
+    return lines
+
+
+def render_metrics():
+    """This instance's metrics in the Prometheus text exposition format."""
+    metrics = current_app.extensions.get('request_metrics')
+    lines = (metrics.render() if metrics is not None else []) + _pool_lines()
+    return '\n'.join(lines) + '\n'
+
+
+def init_profiling(app):
+    """Registers the request hooks and SQL event listeners. Call after install_pool_metrics()."""
+    metrics = RequestMetrics(
+        sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+        slow_request_ms=app.config['PROFILE_SLOW_REQUEST_MS'],
+        profile_dir=app.config['PROFILE_DIR'],
+        keep_profiles=app.config['PROFILE_KEEP']
+    )
+    app.extensions['request_metrics'] = metrics
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_statement(conn, cursor, statement, parameters, context, executemany):
+        context.profiling_start = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def end_statement(conn, cursor, statement, parameters, context, executemany):
+        metrics.record('db', time.perf_counter() - context.profiling_start)
+
+    @app.before_request
+    def start_request_timing():
+        g.request_timing = metrics.start_request()
+
+    @app.after_request
+    def add_server_timing(response):
+        timing = g.pop('request_timing', None)
+        if timing is not None:
+            response.headers['Server-Timing'] = metrics.finish_request(timing, response)
+            # The frontend is on another origin; browsers hide Server-Timing from it without this
+            response.headers['Timing-Allow-Origin'] = '*'
+        return response
+
+    @app.teardown_request
+    def stop_request_profiler(error=None):
+        # after_request is skipped when the response itself fails; never leave a profiler running
+        timing = g.pop('request_timing', None)
+        if timing is not None:
+            metrics.stop_profiler(timing)
@@ -0,0 +1,208 @@
+import os
+import re
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from ..extensions import db
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+THIS_FILE = os.path.abspath(__file__)
+
+_STRING_LITERALS = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERALS = re.compile(r"\b\d+(?:\.\d+)?\b")
+# psycopg2 (%(name)s, %s), asyncpg ($1), named (:name, but not ::casts) and qmark placeholders
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):(?!:)\w+|\?")
+_PLACEHOLDER_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_SELECT_LIST = re.compile(r"^SELECT .+? FROM ")
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in strict mode when a request or block runs more statements than allowed, or an N+1 pattern."""
+
+
+def statement_shape(statement):
+    """The statement with literals, placeholders and IN lists collapsed, so repeats of one query compare equal."""
+    shape = _STRING_LITERALS.sub('?', statement)
+    shape = _PLACEHOLDERS.sub('?', shape)
+    shape = _NUMBER_LITERALS.sub('?', shape)
+    shape = _PLACEHOLDER_LISTS.sub('(?, ...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+def statement_origin(depth=3):
+    """The innermost `depth` frames of app code on the stack, e.g. 'app/models.py:310 in to_dict < ...'."""
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(APP_DIR) and os.path.abspath(frame.filename) != THIS_FILE
+    ]
+    root = os.path.dirname(APP_DIR)
+    return ' < '.join(
+        f"{os.path.relpath(frame.filename, root)}:{frame.lineno} in {frame.name}"
+        for frame in reversed(frames[-depth:])
+    ) or 'outside the app'
+
+
+class QueryLog:
+    """Statements of one request (or inspect_queries() block), grouped by shape."""
+
+    def __init__(self, n_plus_one_threshold):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.statements = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+        # Where each repeated shape was first seen repeating, taken once per shape
+        self.origins = {}
+
+    def record(self, statement, seconds):
+        shape = statement_shape(statement)
+        self.statements += 1
+        self.seconds += seconds
+        self.shapes[shape] += 1
+        if self.shapes[shape] == self.n_plus_one_threshold + 1:
+            self.origins[shape] = statement_origin()
+
+    def n_plus_one_suspects(self):
+        """[(shape, count, origin)] of the shapes that ran more than n_plus_one_threshold times."""
+        return [
+            (shape, count, self.origins.get(shape, 'unknown'))
+            for shape, count in self.shapes.most_common()
+            if count > self.n_plus_one_threshold
+        ]
+
+    def problems(self, budget):
+        """Human-readable findings: the budget overrun and every N+1 suspect."""
+        problems = []
+        if budget and self.statements > budget:
+            problems.append(f"{self.statements} statements, over the budget of {budget}")
+        for shape, count, origin in self.n_plus_one_suspects():
+            # The column list is the same for every query of a table; what tells them apart comes after FROM
+            problems.append(f"N+1 suspect, {count} x {_SELECT_LIST.sub('SELECT ... FROM ', shape)[:200]} (from {origin})")
+        return problems
+
+
+class QueryInspector:
+    """
+    Groups each request's SQL statements by shape and reports, for development
+    and staging:
+
+    - shapes repeated more than n_plus_one_threshold times, usually a lazy load
+      in a loop, with the app frames that issued them;
+    - any statement slower than slow_query_ms, with its parameters and origin,
+      in requests as well as background jobs and CLI commands;
+    - requests over `budget` statements (0 means no budget).
+
+    Findings are printed. In strict mode they raise QueryBudgetExceeded at the
+    end of the request instead, which fails the test that made it. Tests can
+    also wrap calls in inspect_queries() for a budget of their own.
+    """
+
+    def __init__(self, n_plus_one_threshold=5, slow_query_ms=100, budget=0, strict=False):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.slow_query_ms = slow_query_ms
+        self.budget = budget
+        self.strict = strict
+        # inspect_queries() blocks currently open, by thread
+        self._local = threading.local()
+
+    def active_logs(self):
+        logs = list(getattr(self._local, 'blocks', ()))
+        request_log = g.get('query_log') if has_app_context() else None
+        if request_log is not None:
+            logs.append(request_log)
+        return logs
+
+    def record(self, statement, parameters, seconds):
+        for log in self.active_logs():
+            log.record(statement, seconds)
+        if self.slow_query_ms and seconds * 1000 >= self.slow_query_ms:
+            print(f"Slow query ({seconds * 1000:.1f} ms) from {statement_origin()}: "
+                  f"{_WHITESPACE.sub(' ', statement)[:500]} -- parameters: {repr(parameters)[:200]}")
+
+    def report(self, log, label, budget, strict):
+        problems = log.problems(budget)
+        if not problems:
+            return
+        message = f"{label}: " + '; '.join(problems)
+        if strict:
+            raise QueryBudgetExceeded(message)
+        print(f"Query inspector, {message}")
+
+    @contextmanager
+    def collect(self, log):
+        """Adds the statements this thread runs in the block to log."""
+        blocks = self._local.__dict__.setdefault('blocks', [])
+        blocks.append(log)
+        try:
+            yield log
+        finally:
+            blocks.remove(log)
+
+
+def get_query_inspector():
+    """Returns the app's query inspector, or None when QUERY_INSPECTOR_ENABLED is off."""
+    return current_app.extensions.get('query_inspector')
+
+
+@contextmanager
+def inspect_queries(budget=0, n_plus_one_threshold=None):
+    """
+    Yields a QueryLog of the statements this thread runs in the block, e.g. around
+    test client calls. On exit, raises QueryBudgetExceeded if there were more than
+    `budget` of them (0 means no budget) or a shape ran more than
+    n_plus_one_threshold times. Works whether or not QUERY_INSPECTOR_ENABLED is on.
+    """
+    inspector = get_query_inspector()
+    listeners = ()
+    if inspector is None:
+        inspector = QueryInspector(slow_query_ms=0)
+        listeners = _listen(db.engine, inspector)
+    log = QueryLog(inspector.n_plus_one_threshold if n_plus_one_threshold is None else n_plus_one_threshold)
+    try:
+        with inspector.collect(log):
+            yield log
+    finally:
+        for name, listener in listeners:
+            event.remove(db.engine, name, listener)
+    inspector.report(log, 'inspect_queries', budget, strict=True)
+
+
+def _listen(engine, inspector):
+    def start_statement(conn, cursor, statement, parameters, context, executemany):
+        context.inspector_start = time.perf_counter()
+
+    def end_statement(conn, cursor, statement, parameters, context, executemany):
+        inspector.record(statement, parameters, time.perf_counter() - context.inspector_start)
+
+    listeners = (('before_cursor_execute', start_statement), ('after_cursor_execute', end_statement))
+    for name, listener in listeners:
+        event.listen(engine, name, listener)
+    return listeners
+
+
+def init_query_inspector(app):
+    """Registers the SQL event listeners and request hooks. Call after db.init_app()."""
+    inspector = QueryInspector(
+        n_plus_one_threshold=app.config['QUERY_N_PLUS_ONE_THRESHOLD'],
+        slow_query_ms=app.config['SLOW_QUERY_MS'],
+        budget=app.config['QUERY_BUDGET'],
+        strict=app.config['QUERY_INSPECTOR_STRICT']
+    )
+    app.extensions['query_inspector'] = inspector
+    with app.app_context():
+        _listen(db.engine, inspector)
+
+    @app.before_request
+    def start_query_log():
+        g.query_log = QueryLog(inspector.n_plus_one_threshold)
+
+    @app.after_request
+    def check_query_log(response):
+        log = g.pop('query_log', None)
+        if log is not None:
+            inspector.report(log, f"{request.method} {request.path}", inspector.budget, inspector.strict)
+        return response
@@ -0,0 +1,187 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+
+class ResponseCache:
+    """
+    Caches rendered responses by key for a short TTL.
+
+    get_or_compute() is single-flight: when an entry is missing or expired,
+    one thread per process recomputes it while the others wait for that
+    result instead of all hitting the database at once. invalidate() bumps a
+    generation that is part of every key, so all entries go stale together.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        self._counters_lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'computes': 0, 'invalidations': 0}
+
+    def _count(self, name):
+        with self._counters_lock:
+            self.counters[name] += 1
+
+    def _load(self, key):
+        raise NotImplementedError
+
+    def _store(self, key, value, ttl_seconds):
+        raise NotImplementedError
+
+    def generation(self):
+        raise NotImplementedError
+
+    def invalidate(self):
+        self._count('invalidations')
+
+    def get_or_compute(self, key, compute, ttl_seconds):
+        """Returns the cached value of key, calling compute() to fill it at most once per process at a time."""
+        key = f"{self.generation()}:{key}"
+        value = self._load(key)
+        if value is not None:
+            self._count('hits')
+            return value
+
+        with self._flights_lock:
+            lock = self._flights.setdefault(key, threading.Lock())
+        try:
+            with lock:
+                # Whoever held the lock before us may have filled the entry already
+                value = self._load(key)
+                if value is not None:
+                    self._count('hits')
+                    return value
+                self._count('misses')
+                value = compute()
+                self._count('computes')
+                self._store(key, value, ttl_seconds)
+        finally:
+            # Also when compute() raises, or the per-key locks would pile up
+            with self._flights_lock:
+                self._flights.pop(key, None)
+        return value
+
+    def stats(self):
+        with self._counters_lock:
+            counters = dict(self.counters)
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_rate'] = counters['hits'] / lookups if lookups else 0.0
+        return counters
+
+
+class MemoryResponseCache(ResponseCache):
+    """
+    Per-process cache. Invalidation only reaches the process that made the change; the TTL bounds the rest.
+    When full, the least recently used entry is evicted, so a burst of map tiles
+    pushes out other tiles rather than the recent feed every request reads.
+    """
+
+    def __init__(self, max_entries=256):
+        super().__init__()
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _load(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _store(self, key, value, ttl_seconds):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generation(self):
+        return self._generation
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+        super().invalidate()
+
+
+class SQLiteResponseCache(ResponseCache):
+    """
+    Cache in a SQLite file, shared by every worker process on the host (e.g. all
+    gunicorn workers), including the generation, so one invalidation reaches all.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)")
+        connection.execute("CREATE TABLE IF NOT EXISTS generation (id INTEGER PRIMARY KEY CHECK (id = 0), value INTEGER NOT NULL)")
+        connection.execute("INSERT OR IGNORE INTO generation (id, value) VALUES (0, 0)")
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def _load(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM responses WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def _store(self, key, value, ttl_seconds):
+        connection = self._connection()
+        now = time.time()
+        connection.execute(
+            "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, pickle.dumps(value), now + ttl_seconds)
+        )
+        connection.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+
+    def generation(self):
+        return self._connection().execute("SELECT value FROM generation WHERE id = 0").fetchone()[0]
+
+    def invalidate(self):
+        connection = self._connection()
+        connection.execute("UPDATE generation SET value = value + 1 WHERE id = 0")
+        connection.execute("DELETE FROM responses")
+        super().invalidate()
+
+
+def get_response_cache():
+    """
+    Returns the app's response cache, creating it on first use from RESPONSE_CACHE_BACKEND,
+    or None when response caching is turned off.
+    """
+    if current_app.config['RESPONSE_CACHE_BACKEND'] == 'none':
+        return None
+    cache = current_app.extensions.get('response_cache')
+    if cache is None:
+        backend = current_app.config['RESPONSE_CACHE_BACKEND']
+        if backend == 'memory':
+            cache = MemoryResponseCache()
+        elif backend == 'sqlite':
+            cache = SQLiteResponseCache(current_app.config['RESPONSE_CACHE_PATH'])
+        else:
+            raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND '{backend}'")
+        current_app.extensions['response_cache'] = cache
+    return cache
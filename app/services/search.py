@@ -0,0 +1,119 @@
+import base64
+import json
+import re
+import click
+from flask.cli import AppGroup
+from sqlalchemy import select, and_, or_, func, literal_column, table, column, Float
+from sqlalchemy.orm import selectinload
+from ..extensions import db
+from ..models import Issue, SEARCH_VECTOR_SQL, search_document
+from ..utils.pagination import InvalidCursor
+
+
+class InvalidSearchQuery(ValueError):
+    pass
+
+
+def encode_search_cursor(rank, issue_id):
+    raw = json.dumps([rank, issue_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_search_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        rank, issue_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return float(rank), int(issue_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor.")
+
+
+def _postgres_matches(query):
+    """(issue id, rank) of matching issues, read from the GIN index over to_tsvector(search_document)."""
+    vector = literal_column(SEARCH_VECTOR_SQL)
+    tsquery = func.websearch_to_tsquery(literal_column("'english'"), query)
+    # ts_rank_cd is a float4; the cursor's rank comes back as a float8 parameter, and
+    # comparing the two would skip or repeat rows on page boundaries
+    rank = func.ts_rank_cd(vector, tsquery).cast(Float)
+    return select(Issue.id.label('id'), rank.label('rank')).where(vector.op('@@')(tsquery))
+
+
+def _sqlite_matches(query):
+    """(issue id, rank) of matching issues, read from the issues_fts FTS5 table."""
+    words = re.findall(r"\w+", query)
+    if not words:
+        raise InvalidSearchQuery("'q' must contain at least one word")
+    # Every word must match; quoting keeps FTS5 operators in user input literal
+    fts_query = " ".join(f'"{word}"' for word in words)
+    fts = table('issues_fts', column('rowid'))
+    # bm25() is lower for better matches, so negate it to rank like ts_rank_cd
+    return (
+        select(Issue.id.label('id'), (-func.bm25(literal_column('issues_fts'))).label('rank'))
+        .join_from(Issue, fts, fts.c.rowid == Issue.id)
+        .where(literal_column('issues_fts').op('MATCH')(fts_query))
+    )
+
+
+def search_issues(query, filters=(), limit=50, cursor=None):
+    """
+    Full-text search over issue titles, descriptions and comments, best match first.
+    Returns (issues, next_cursor) like paginate_issues, keyset-paginated on (rank, id).
+
+    Matching ids and ranks come from the dialect's inverted index; only the page of
+    winners is then loaded and serialized.
+    """
+    query = (query or '').strip()
+    if not query:
+        raise InvalidSearchQuery("'q' is required")
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        matches = _postgres_matches(query)
+    elif dialect == 'sqlite':
+        matches = _sqlite_matches(query)
+    else:
+        raise NotImplementedError(f"Full-text search is not available on {dialect}")
+    # bm25() is only allowed next to its MATCH, so ordering and the keyset run on a subquery
+    matches = matches.where(*filters).subquery()
+
+    page = select(matches.c.id, matches.c.rank)
+    if cursor:
+        rank, issue_id = decode_search_cursor(cursor)
+        page = page.where(or_(matches.c.rank < rank, and_(matches.c.rank == rank, matches.c.id < issue_id)))
+    rows = db.session.execute(page.order_by(matches.c.rank.desc(), matches.c.id.desc()).limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_search_cursor(rows[-1].rank, rows[-1].id)
+    issues = {issue.id: issue for issue in Issue.query_for_serialization().filter(Issue.id.in_([row.id for row in rows]))} if rows else {}
+    return [issues[row.id] for row in rows if row.id in issues], next_cursor
+
+
+def rebuild_search_index(batch_size=1000):
+    """Re-renders every issue's search_document and, on SQLite, rebuilds issues_fts from it. Returns the issue count."""
+    count = 0
+    query = Issue.query.options(selectinload(Issue.comments)).order_by(Issue.id)
+    last_id = 0
+    while True:
+        batch = query.filter(Issue.id > last_id).limit(batch_size).all()
+        if not batch:
+            break
+        for issue in batch:
+            issue.search_document = search_document(issue.title, issue.description, [comment.text for comment in issue.comments])
+        db.session.commit()
+        count += len(batch)
+        last_id = batch[-1].id
+    if db.session.get_bind().dialect.name == 'sqlite':
+        db.session.execute(db.text("INSERT INTO issues_fts (issues_fts) VALUES ('rebuild')"))
+        db.session.commit()
+    return count
+
+
+search_cli = AppGroup('search', help="Full-text search index commands.")
+
+
+@search_cli.command('rebuild')
+def rebuild_command():
+    """Recomputes search documents of all issues and rebuilds the search index."""
+    count = rebuild_search_index()
+    click.echo(f"Rebuilt the search index of {count} issue(s).")
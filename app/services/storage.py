@@ -0,0 +1,141 @@
+import os
+import shutil
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+
+# Copy uploads in 1 MiB chunks so the local backend never holds a whole file in memory
+CHUNK_SIZE = 1024 * 1024
+
+# Buffered uploads stay in memory up to this size and spill to a temp file beyond it
+UPLOAD_BUFFER_MAX_MEMORY = 4 * 1024 * 1024
+
+
+class UploadFailed(Exception):
+    """Raised when some of a report's photos could not be stored; filenames lists which."""
+
+    def __init__(self, filenames, cause=None):
+        super().__init__(f"Upload of {', '.join(filenames)} failed: {cause!r}")
+        self.filenames = filenames
+        self.cause = cause
+
+
+def buffer_upload(stream):
+    """
+    Copies an upload stream into a spooled temp file owned by the caller. Werkzeug
+    closes request streams when the request ends, which an upload still running on
+    the pool (e.g. one past its deadline) must not depend on.
+    """
+    buffer = tempfile.SpooledTemporaryFile(max_size=UPLOAD_BUFFER_MAX_MEMORY)
+    shutil.copyfileobj(stream, buffer, CHUNK_SIZE)
+    buffer.seek(0)
+    return buffer
+
+
+def delete_quietly(storage, url):
+    """storage.delete() for cleanup paths, where a failure is only logged."""
+    try:
+        storage.delete(url)
+    except Exception as e:
+        print(f"Could not delete uploaded file {url}: {e!r}")
+
+
+def put_buffered(storage, filename, buffer, content_type=None):
+    """storage.put() for a buffer_upload() result, closing the buffer once it is done."""
+    with buffer:
+        return storage.put(filename, buffer, content_type)
+
+
+class BlobStorage:
+    """
+    Stores an uploaded file and returns the public URL it can be fetched from.
+    """
+
+    def put(self, filename, stream, content_type=None):
+        raise NotImplementedError
+
+    def delete(self, url):
+        """Removes a file stored by put(), given the URL it returned."""
+        raise NotImplementedError
+
+
+class VercelBlobStorage(BlobStorage):
+    """
+    Uploads to Vercel Blob. The SDK only accepts bytes, so each file is read into
+    memory once; files over multipart_threshold bytes use multipart upload.
+    """
+
+    def __init__(self, timeout=10, multipart_threshold=8 * 1024 * 1024):
+        self.timeout = timeout
+        self.multipart_threshold = multipart_threshold
+
+    def put(self, filename, stream, content_type=None):
+        # Imported here so cold starts that upload nothing don't load the SDK
+        import vercel_blob
+        data = stream.read()
+        response = vercel_blob.put(filename, data, {
+                "addRandomSuffix": "true",
+            }, timeout=self.timeout, multipart=len(data) > self.multipart_threshold)
+        return response["url"]  # This is the public file URL
+
+    def delete(self, url):
+        import vercel_blob
+        vercel_blob.delete(url)
+
+
+class LocalFileStorage(BlobStorage):
+    """
+    Streams uploads into a directory on disk. Meant for development and for
+    benchmarking the upload path offline.
+    """
+
+    def __init__(self, root, base_url=None):
+        self.root = root
+        self.base_url = (base_url or 'file://' + os.path.abspath(root)).rstrip('/')
+        os.makedirs(root, exist_ok=True)
+
+    def put(self, filename, stream, content_type=None):
+        stem, ext = os.path.splitext(filename)
+        # Mirror Vercel's addRandomSuffix so names never collide
+        name = f"{stem}-{uuid.uuid4().hex[:8]}{ext}"
+        with open(os.path.join(self.root, name), 'wb') as out:
+            shutil.copyfileobj(stream, out, CHUNK_SIZE)
+        return f"{self.base_url}/{name}"
+
+    def delete(self, url):
+        name = url[len(self.base_url) + 1:] if url.startswith(self.base_url + '/') else ''
+        if not name or '/' in name:
+            raise ValueError(f"Not a URL of this storage: {url}")
+        try:
+            os.remove(os.path.join(self.root, name))
+        except FileNotFoundError:
+            pass
+
+
+def get_blob_storage():
+    """
+    Returns the app's blob storage, creating it on first use from BLOB_STORAGE_BACKEND.
+    """
+    storage = current_app.extensions.get('blob_storage')
+    if storage is None:
+        backend = current_app.config['BLOB_STORAGE_BACKEND']
+        if backend == 'vercel':
+            storage = VercelBlobStorage(timeout=current_app.config['UPLOAD_TIMEOUT_SECONDS'])
+        elif backend == 'local':
+            storage = LocalFileStorage(current_app.config['LOCAL_BLOB_DIR'], current_app.config['LOCAL_BLOB_BASE_URL'])
+        else:
+            raise ValueError(f"Unknown BLOB_STORAGE_BACKEND '{backend}'")
+        current_app.extensions['blob_storage'] = storage
+    return storage
+
+
+def get_upload_executor():
+    """
+    Returns the bounded thread pool shared by all uploads in this process.
+    """
+    executor = current_app.extensions.get('upload_executor')
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=current_app.config['UPLOAD_MAX_WORKERS'], thread_name_prefix='upload')
+        current_app.extensions['upload_executor'] = executor
+    return executor
@@ -0,0 +1,260 @@
+import heapq
+import math
+import threading
+import time
+from collections import namedtuple
+from flask import current_app
+from sqlalchemy import text
+from ..extensions import db
+from ..models import User, UserRole
+
+EARTH_RADIUS_METERS = 6371008.8
+
+WorkerEntry = namedtuple('WorkerEntry', ['id', 'first_name', 'last_name', 'lat', 'lng', 'xyz'])
+
+
+def haversine_meters(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def to_unit_vector(lat, lng):
+    """
+    Projects a lat/lng onto the unit sphere. Straight-line (chord) distance between
+    these vectors grows monotonically with great-circle distance, which lets a plain
+    Euclidean k-d tree answer exact nearest-neighbour queries on the globe.
+    """
+    phi, lam = math.radians(lat), math.radians(lng)
+    cos_phi = math.cos(phi)
+    return (cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi))
+
+
+def chord_to_meters(chord_squared):
+    return 2 * EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(chord_squared) / 2))
+
+
+def _squared_distance(a, b):
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
+
+class KDTree:
+    """
+    3-d tree over WorkerEntry.xyz. Nodes are [entry, axis, left, right] lists.
+    Built balanced; later inserts are attached as leaves.
+    """
+
+    def __init__(self, entries):
+        self.root = self._build(list(entries), 0)
+
+    def insert(self, entry):
+        if self.root is None:
+            self.root = [entry, 0, None, None]
+            return
+        node = self.root
+        while True:
+            axis = node[1]
+            side = 2 if entry.xyz[axis] < node[0].xyz[axis] else 3
+            if node[side] is None:
+                node[side] = [entry, (axis + 1) % 3, None, None]
+                return
+            node = node[side]
+
+    def _build(self, entries, depth):
+        if not entries:
+            return None
+        axis = depth % 3
+        entries.sort(key=lambda entry: entry.xyz[axis])
+        mid = len(entries) // 2
+        return [
+            entries[mid],
+            axis,
+            self._build(entries[:mid], depth + 1),
+            self._build(entries[mid + 1:], depth + 1)
+        ]
+
+    def nearest(self, point, k, accept):
+        """
+        Returns up to k (squared chord distance, entry) pairs closest to point,
+        skipping entries for which accept(entry) is False.
+        """
+        # Max-heap of the best k so far, stored as (-distance, tiebreak, entry)
+        best = []
+        counter = 0
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            entry, axis, left, right = node
+            if accept(entry):
+                dist = _squared_distance(point, entry.xyz)
+                if len(best) < k:
+                    heapq.heappush(best, (-dist, counter, entry))
+                    counter += 1
+                elif dist < -best[0][0]:
+                    heapq.heapreplace(best, (-dist, counter, entry))
+                    counter += 1
+
+            diff = point[axis] - entry.xyz[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            # Visit the far side only if the splitting plane is closer than the current k-th best
+            if far is not None and (len(best) < k or diff * diff < -best[0][0]):
+                stack.append(far)
+            stack.append(near)
+        return sorted(((-neg_dist, entry) for neg_dist, _, entry in best), key=lambda pair: pair[0])
+
+
+class WorkerLocator:
+    """
+    Finds the Workers closest to a point. Backends only need to implement nearest();
+    the upsert/remove hooks let in-memory backends follow worker changes incrementally.
+    """
+
+    def nearest(self, lat, lng, k=1):
+        """Returns up to k dicts of {id, firstName, lastName, lat, lng, distance (meters)}, closest first."""
+        raise NotImplementedError
+
+    def upsert_worker(self, user):
+        pass
+
+    def remove_worker(self, worker_id):
+        pass
+
+
+class InMemoryWorkerLocator(WorkerLocator):
+    """
+    Keeps every located Worker in a k-d tree built from the database on first use.
+
+    Workers created or moved afterwards are inserted into the tree as new leaves,
+    and their previous entry is left behind and skipped at query time. Once those
+    inserts outnumber a quarter of the index the tree is rebuilt balanced. The whole
+    index is also reloaded every refresh_seconds so changes made by other processes
+    are eventually picked up.
+    """
+
+    def __init__(self, refresh_seconds=300, rebuild_threshold=1024):
+        self.refresh_seconds = refresh_seconds
+        self.rebuild_threshold = rebuild_threshold
+        self._lock = threading.RLock()
+        self._workers = {}
+        self._tree = None
+        self._inserts_since_build = 0
+        self._loaded_at = None
+
+    def _is_current(self, entry):
+        return self._workers.get(entry.id) is entry
+
+    def _load_from_database(self):
+        rows = db.session.query(
+            User.id, User.first_name, User.last_name, User.location_lat, User.location_lng
+        ).filter(
+            User.role == UserRole.Worker,
+            User.location_lat.isnot(None),
+            User.location_lng.isnot(None)
+        ).all()
+        self.replace_all(rows)
+
+    def replace_all(self, rows):
+        """Rebuilds the index from (id, first_name, last_name, lat, lng) rows."""
+        entries = {}
+        for worker_id, first_name, last_name, lat, lng in rows:
+            entries[worker_id] = WorkerEntry(worker_id, first_name, last_name, lat, lng, to_unit_vector(lat, lng))
+        with self._lock:
+            self._workers = entries
+            self._tree = KDTree(entries.values())
+            self._inserts_since_build = 0
+            self._loaded_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        with self._lock:
+            expired = self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds
+        if expired:
+            self._load_from_database()
+
+    def _rebuild(self):
+        self._tree = KDTree(self._workers.values())
+        self._inserts_since_build = 0
+
+    def upsert_worker(self, user):
+        if user.role != UserRole.Worker or user.location_lat is None or user.location_lng is None:
+            self.remove_worker(user.id)
+            return
+        entry = WorkerEntry(user.id, user.first_name, user.last_name, user.location_lat, user.location_lng,
+                            to_unit_vector(user.location_lat, user.location_lng))
+        with self._lock:
+            if self._loaded_at is None:
+                # Nothing loaded yet, the first query will read this worker from the database
+                return
+            self._workers[entry.id] = entry
+            self._tree.insert(entry)
+            self._inserts_since_build += 1
+            if self._inserts_since_build > max(self.rebuild_threshold, len(self._workers) // 4):
+                self._rebuild()
+
+    def remove_worker(self, worker_id):
+        with self._lock:
+            self._workers.pop(worker_id, None)
+
+    def nearest(self, lat, lng, k=1):
+        self._ensure_fresh()
+        point = to_unit_vector(lat, lng)
+        with self._lock:
+            # Tree entries of workers that moved or were removed since the last build are skipped
+            candidates = self._tree.nearest(point, k, self._is_current)
+        return [{
+            "id": entry.id,
+            "firstName": entry.first_name,
+            "lastName": entry.last_name,
+            "lat": entry.lat,
+            "lng": entry.lng,
+            "distance": chord_to_meters(dist)
+        } for dist, entry in candidates]
+
+
+class PostGISWorkerLocator(WorkerLocator):
+    """Asks PostGIS for the nearest workers with ST_Distance on every call."""
+
+    def nearest(self, lat, lng, k=1):
+        sql = text("""
+            SELECT id, first_name, last_name, location_lat, location_lng,
+                   ST_Distance(
+                       geography(ST_MakePoint(:lng, :lat)),
+                       geography(ST_MakePoint(location_lng, location_lat))
+                   ) AS distance
+            FROM users
+            WHERE role = 'Worker'
+              AND location_lat IS NOT NULL
+              AND location_lng IS NOT NULL
+            ORDER BY distance ASC
+            LIMIT :k;
+        """)
+        rows = db.session.execute(sql, {"lat": lat, "lng": lng, "k": k}).fetchall()
+        return [{
+            "id": row.id,
+            "firstName": row.first_name,
+            "lastName": row.last_name,
+            "lat": row.location_lat,
+            "lng": row.location_lng,
+            "distance": row.distance
+        } for row in rows]
+
+
+def get_worker_locator():
+    """
+    Returns the app's worker locator, creating it on first use from WORKER_LOCATOR_BACKEND.
+    """
+    locator = current_app.extensions.get('worker_locator')
+    if locator is None:
+        backend = current_app.config['WORKER_LOCATOR_BACKEND']
+        if backend == 'memory':
+            locator = InMemoryWorkerLocator(refresh_seconds=current_app.config['WORKER_INDEX_REFRESH_SECONDS'])
+        elif backend == 'postgis':
+            locator = PostGISWorkerLocator()
+        else:
+            raise ValueError(f"Unknown WORKER_LOCATOR_BACKEND '{backend}'")
+        current_app.extensions['worker_locator'] = locator
+    return locator
@@ -0,0 +1,41 @@
+import hashlib
+from flask import request, make_response
+
+
+def issue_etag(public_id, version):
+    """Strong ETag of one issue's representation."""
+    return f'{public_id}-{version}'
+
+
+def collection_etag(*parts):
+    """Strong ETag of a list response, from whatever identifies its contents (counts, versions, query string)."""
+    return hashlib.sha256('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:32]
+
+
+def not_modified(etag, last_modified=None, use_modified_since=True):
+    """
+    True when the client's cached copy is current. If-None-Match takes precedence;
+    If-Modified-Since is only consulted without it, at one second resolution.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if use_modified_since and last_modified and request.if_modified_since:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+def conditional_response(etag, last_modified, build, cache_control='no-cache', use_modified_since=True):
+    """
+    Returns 304 when the client already has this version, without calling build().
+    Otherwise returns build()'s (body, status) with ETag, Last-Modified and
+    Cache-Control set, so the next poll can be conditional.
+    """
+    if not_modified(etag, last_modified, use_modified_since):
+        response = make_response('', 304)
+    else:
+        response = make_response(build())
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = cache_control
+    return response
@@ -2,6 +2,7 @@ from functools import wraps
 from flask import request, jsonify, current_app
 import jwt
 from ..models import User, UserRole # Assuming your User model is in app/models.py
+from ..services.principal_cache import get_principal_cache
 
 def token_required(f):
     @wraps(f)
@@ -22,8 +23,9 @@ def token_required(f):
         try:
             # Decode the token using the app's SECRET_KEY
             data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-            # Find the user based on the 'sub' (subject) claim in the token
-            current_user = User.query.get(data['sub'])
+            # Find the user based on the 'sub' (subject) claim in the token. This is a cached,
+            # read-only snapshot; routes that modify the user fetch the row with load()
+            current_user = get_principal_cache().get(data['sub'])
             if not current_user:
                 return jsonify({'message': 'User not found.'}), 404
         except jwt.ExpiredSignatureError:
@@ -0,0 +1,118 @@
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Precision stored in issues.geohash, about 5 m x 5 m
+GEOHASH_PRECISION = 9
+
+
+def _bits(precision):
+    """(latitude bits, longitude bits) of a geohash of this length. Longitude gets the odd bit."""
+    total = 5 * precision
+    return total // 2, total - total // 2
+
+
+def _index(value, low, high, bits):
+    cells = 1 << bits
+    return min(cells - 1, max(0, int((value - low) / (high - low) * cells)))
+
+
+def _from_indices(lat_index, lng_index, precision):
+    lat_bits, lng_bits = _bits(precision)
+    code = 0
+    # Interleave starting with the most significant longitude bit
+    for i in range(5 * precision):
+        if i % 2 == 0:
+            lng_bits -= 1
+            code = (code << 1) | ((lng_index >> lng_bits) & 1)
+        else:
+            lat_bits -= 1
+            code = (code << 1) | ((lat_index >> lat_bits) & 1)
+    chars = []
+    for _ in range(precision):
+        chars.append(BASE32[code & 31])
+        code >>= 5
+    return "".join(reversed(chars))
+
+
+def encode(lat, lng, precision=GEOHASH_PRECISION):
+    lat_bits, lng_bits = _bits(precision)
+    return _from_indices(_index(lat, -90.0, 90.0, lat_bits), _index(lng, -180.0, 180.0, lng_bits), precision)
+
+
+def bounds(geohash):
+    """(south, west, north, east) of a geohash cell."""
+    lat_low, lat_high, lng_low, lng_high = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for char in geohash:
+        value = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                middle = (lng_low + lng_high) / 2
+                lng_low, lng_high = (middle, lng_high) if bit else (lng_low, middle)
+            else:
+                middle = (lat_low + lat_high) / 2
+                lat_low, lat_high = (middle, lat_high) if bit else (lat_low, middle)
+            even = not even
+    return lat_low, lng_low, lat_high, lng_high
+
+
+def _spans(south, west, north, east, precision):
+    lat_bits, lng_bits = _bits(precision)
+    rows = range(_index(south, -90.0, 90.0, lat_bits), _index(north, -90.0, 90.0, lat_bits) + 1)
+    cols = range(_index(west, -180.0, 180.0, lng_bits), _index(east, -180.0, 180.0, lng_bits) + 1)
+    return rows, cols
+
+
+def cell_count(south, west, north, east, precision):
+    """How many geohash cells of this length the box touches."""
+    rows, cols = _spans(south, west, north, east, precision)
+    return len(rows) * len(cols)
+
+
+def cover(south, west, north, east, max_cells=16):
+    """
+    Returns the geohash cells, at the finest precision that needs no more than
+    max_cells of them, that together cover the box. The box must not cross the
+    antimeridian (split it first).
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        rows, cols = _spans(south, west, north, east, precision)
+        if len(rows) * len(cols) <= max_cells or precision == 1:
+            return [_from_indices(row, col, precision) for row in rows for col in cols]
+
+
+def successor(prefix):
+    """
+    The smallest geohash that sorts after every hash starting with prefix, or None
+    if there is none, so `prefix <= geohash < successor(prefix)` is an index range scan.
+    """
+    chars = list(prefix)
+    while chars:
+        position = BASE32.index(chars[-1])
+        if position < len(BASE32) - 1:
+            chars[-1] = BASE32[position + 1]
+            return "".join(chars)
+        chars.pop()
+    return None
+
+
+def radius_box(lat, lng, radius_meters):
+    """(south, west, north, east) of the box around a circle, clamped to valid coordinates."""
+    lat_delta = math.degrees(radius_meters / 6371008.8)
+    # Near the poles the circle spans every longitude
+    cos_lat = math.cos(math.radians(min(89.0, abs(lat) + lat_delta)))
+    lng_delta = min(180.0, lat_delta / cos_lat)
+    return max(-90.0, lat - lat_delta), lng - lng_delta, min(90.0, lat + lat_delta), lng + lng_delta
+
+
+def split_antimeridian(south, west, north, east):
+    """Splits a box whose longitudes run past ±180 (or west > east) into boxes that don't."""
+    if west < -180.0:
+        west += 360.0
+    if east > 180.0:
+        east -= 360.0
+    if west <= east:
+        return [(south, west, north, east)]
+    return [(south, west, north, 180.0), (south, -180.0, north, east)]
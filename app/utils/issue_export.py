@@ -0,0 +1,153 @@
+import csv
+import io
+import json
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from ..extensions import db
+from ..models import Issue, Comment, User, IssueStatus
+
+CSV_COLUMNS = [
+    'id', 'title', 'description', 'category', 'status', 'createdAt', 'lat', 'lng',
+    'reporterId', 'reporterName', 'assignedTo', 'assignedToName', 'rating', 'processingState', 'updatedAt', 'photoUrls'
+]
+
+# Flush the response roughly every this many characters rather than once per row
+CHUNK_CHARS = 64 * 1024
+
+
+class InvalidExportFilter(ValueError):
+    pass
+
+
+def parse_export_filters(args):
+    """Reads ?since=, ?until= (ISO dates or datetimes, UTC), ?status= and ?category= into column filters."""
+    filters = []
+    for name, compare in (('since', Issue.created_at.__ge__), ('until', Issue.created_at.__lt__)):
+        value = args.get(name)
+        if value:
+            try:
+                filters.append(compare(datetime.fromisoformat(value.rstrip('Z'))))
+            except ValueError:
+                raise InvalidExportFilter(f"'{name}' must be an ISO 8601 date or datetime")
+
+    status = args.get('status')
+    if status:
+        try:
+            filters.append(Issue.status == (IssueStatus[status] if status in IssueStatus.__members__ else IssueStatus(status)))
+        except ValueError:
+            raise InvalidExportFilter(f"Unknown status '{status}'")
+
+    if args.get('category'):
+        filters.append(Issue.category == args['category'])
+    return filters
+
+
+def export_statement(filters):
+    """
+    Flat Core SELECT of issues with their reporter and worker names, oldest first.
+    Rows are plain tuples, so nothing piles up in the session's identity map.
+    """
+    reporter = aliased(User)
+    worker = aliased(User)
+    return (
+        select(
+            Issue.public_id, Issue.title, Issue.description, Issue.category, Issue.status, Issue.created_at,
+            Issue.location_lat, Issue.location_lng, Issue.rating, Issue.processing_state, Issue.updated_at, Issue.photo_urls,
+            reporter.email.label('reporter_email'), reporter.first_name.label('reporter_first_name'),
+            reporter.last_name.label('reporter_last_name'), worker.email.label('worker_email'),
+            worker.first_name.label('worker_first_name'), worker.last_name.label('worker_last_name'),
+        )
+        .join(reporter, Issue.reporter_id == reporter.id)
+        .outerjoin(worker, Issue.assigned_to_id == worker.id)
+        .where(*filters)
+        .order_by(Issue.created_at, Issue.id)
+    )
+
+
+def _comments_by_issue(public_ids):
+    """One query for the comments of a batch of issues, in the shape of Comment.to_dict()."""
+    rows = db.session.execute(
+        select(Comment.id, Comment.issue_id, Comment.text, Comment.created_at, User.email, User.first_name, User.last_name)
+        .join(User, Comment.author_id == User.id)
+        .where(Comment.issue_id.in_(public_ids))
+        .order_by(Comment.issue_id, Comment.created_at)
+    )
+    comments = defaultdict(list)
+    for row in rows:
+        comments[row.issue_id].append({
+            'id': row.id,
+            'text': row.text,
+            'createdAt': row.created_at.isoformat() + 'Z',
+            'authorId': row.email,
+            'authorName': f"{row.first_name} {row.last_name}"
+        })
+    return comments
+
+
+def _record(row):
+    """The fields of Issue.to_dict(), built from an export row."""
+    return {
+        'id': row.public_id,
+        'title': row.title,
+        'description': row.description,
+        'category': row.category,
+        'photoUrls': row.photo_urls or [],
+        'location': {'lat': row.location_lat, 'lng': row.location_lng},
+        'status': row.status.value,
+        'createdAt': row.created_at.isoformat() + 'Z',
+        'reporterId': row.reporter_email,
+        'reporterName': f"{row.reporter_first_name} {row.reporter_last_name}",
+        'assignedTo': row.worker_email,
+        'assignedToName': f"{row.worker_first_name} {row.worker_last_name}" if row.worker_email else None,
+        'rating': row.rating,
+        'processingState': row.processing_state,
+        'updatedAt': row.updated_at.isoformat() + 'Z'
+    }
+
+
+def _csv_row(record):
+    return [
+        record['id'], record['title'], record['description'], record['category'], record['status'],
+        record['createdAt'], record['location']['lat'], record['location']['lng'], record['reporterId'],
+        record['reporterName'], record['assignedTo'], record['assignedToName'], record['rating'],
+        record['processingState'], record['updatedAt'], ' '.join(record['photoUrls'])
+    ]
+
+
+def generate_issue_export(filters, fmt='ndjson', with_comments=False, batch_size=1000):
+    """
+    Yields the export as text chunks. Issues are read batch_size rows at a time
+    through a server-side cursor (yield_per), and the comments of each batch are
+    fetched with one extra query, so memory use does not depend on table size.
+    """
+    result = db.session.execute(export_statement(filters).execution_options(yield_per=batch_size))
+
+    buffer = io.StringIO()
+    writer = None
+    if fmt == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_COLUMNS + (['comments'] if with_comments else []))
+
+    for rows in result.partitions():
+        comments = _comments_by_issue([row.public_id for row in rows]) if with_comments else None
+        for row in rows:
+            record = _record(row)
+            if fmt == 'csv':
+                line = _csv_row(record)
+                if with_comments:
+                    line.append(json.dumps(comments.get(row.public_id, [])))
+                writer.writerow(line)
+            else:
+                if with_comments:
+                    record['comments'] = comments.get(row.public_id, [])
+                buffer.write(json.dumps(record))
+                buffer.write('\n')
+            if buffer.tell() >= CHUNK_CHARS:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,212 @@
+import heapq
+import math
+from flask import request, current_app
+from sqlalchemy import select, and_, or_, func, case
+from ..extensions import db
+from ..models import Issue
+from ..services.response_cache import get_response_cache
+from ..services.worker_locator import haversine_meters
+from .geohash import GEOHASH_PRECISION, bounds, cell_count, cover, successor, radius_box, split_antimeridian
+
+
+class InvalidMapQuery(ValueError):
+    pass
+
+
+def read_float(name, low, high, default=None):
+    """Reads a numeric query parameter that must fall within [low, high]."""
+    value = request.args.get(name)
+    if value is None or value == '':
+        if default is None:
+            raise InvalidMapQuery(f"'{name}' is required")
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        raise InvalidMapQuery(f"'{name}' must be a number")
+    if not low <= number <= high:
+        raise InvalidMapQuery(f"'{name}' must be between {low} and {high}")
+    return number
+
+
+def read_limit():
+    """?limit= for map queries, defaulting to ISSUES_PAGE_SIZE and capped at MAP_MAX_RESULTS."""
+    max_results = current_app.config['MAP_MAX_RESULTS']
+    try:
+        limit = int(request.args.get('limit', current_app.config['ISSUES_PAGE_SIZE']))
+    except ValueError:
+        raise InvalidMapQuery("'limit' must be an integer")
+    return max(1, min(limit, max_results))
+
+
+def geohash_filter(cells):
+    """One index range scan per cell: prefix <= geohash < successor(prefix)."""
+    ranges = []
+    for cell in cells:
+        upper = successor(cell)
+        ranges.append(and_(Issue.geohash >= cell, Issue.geohash < upper) if upper else Issue.geohash >= cell)
+    return or_(*ranges)
+
+
+def box_filter(south, west, north, east):
+    """
+    Matches issues inside the box. The geohash ranges let the database read only
+    the index entries of the covering cells; the coordinate comparisons then drop
+    what those cells hold outside the box.
+    """
+    boxes = []
+    for s, w, n, e in split_antimeridian(south, west, north, east):
+        boxes.append(and_(
+            geohash_filter(cover(s, w, n, e)),
+            Issue.location_lat.between(s, n),
+            Issue.location_lng.between(w, e),
+        ))
+    return or_(*boxes)
+
+
+def approximate_distance_order(lat, lng):
+    """
+    SQL expression that sorts issues by distance from (lat, lng): squared
+    equirectangular degrees, longitude scaled by cos(lat) and wrapped across the
+    antimeridian. Exact enough to pick candidates; haversine ranks them afterwards.
+    """
+    d_lat = Issue.location_lat - lat
+    d_lng = Issue.location_lng - lng
+    d_lng = case((d_lng > 180, d_lng - 360), (d_lng < -180, d_lng + 360), else_=d_lng)
+    scale = math.cos(math.radians(lat)) ** 2
+    return d_lat * d_lat + d_lng * d_lng * scale
+
+
+def nearest_in_box(south, west, north, east, lat, lng, limit, filters=(), radius=None):
+    """
+    Returns ([(issue, meters)], truncated): the `limit` issues in the box nearest to
+    (lat, lng), optionally only those within `radius` meters.
+
+    The database orders the box's matches by approximate distance and returns only
+    the nearest 2 * limit + 1 as bare (id, lat, lng) tuples; the spare rows absorb
+    the approximation when they are ranked by haversine distance in Python. Only the
+    winners are loaded and serialized, so a dense box costs a sort in the database,
+    not a transfer of everything in it.
+    """
+    read = 2 * limit + 1
+    rows = db.session.execute(
+        select(Issue.id, Issue.location_lat, Issue.location_lng)
+        .where(box_filter(south, west, north, east), *filters)
+        .order_by(approximate_distance_order(lat, lng), Issue.id)
+        .limit(read)
+    ).all()
+
+    distances = [(haversine_meters(lat, lng, row.location_lat, row.location_lng), row.id) for row in rows]
+    # Rows come nearest first, so unread rows are only relevant if the last one read still qualifies
+    truncated = len(rows) == read and (radius is None or distances[-1][0] <= radius)
+    if radius is not None:
+        distances = [entry for entry in distances if entry[0] <= radius]
+    nearest = heapq.nsmallest(limit + 1, distances)
+    truncated = truncated or len(nearest) > limit
+    nearest = nearest[:limit]
+
+    issues = {issue.id: issue for issue in Issue.query_for_serialization().filter(Issue.id.in_([issue_id for _, issue_id in nearest]))} if nearest else {}
+    return [(issues[issue_id], meters) for meters, issue_id in nearest if issue_id in issues], truncated
+
+
+def issues_in_box(south, west, north, east, limit, filters=()):
+    """Issues inside the box, nearest to its center first."""
+    center_lng = (west + east) / 2 if west <= east else (west + east + 360) / 2
+    if center_lng > 180:
+        center_lng -= 360
+    return nearest_in_box(south, west, north, east, (south + north) / 2, center_lng, limit, filters)
+
+
+def issues_near(lat, lng, radius, limit, filters=()):
+    """Issues within `radius` meters of (lat, lng), nearest first."""
+    south, west, north, east = radius_box(lat, lng, radius)
+    return nearest_in_box(south, west, north, east, lat, lng, limit, filters, radius=radius)
+
+
+def precision_for_zoom(zoom):
+    """
+    Geohash length whose cells are about a quarter of a 256 px web map tile wide
+    at this zoom level, i.e. one cluster per ~64 px.
+    """
+    return max(1, min(GEOHASH_PRECISION - 1, round((zoom + 2) * 2 / 5)))
+
+
+def cluster_precision(south, west, north, east, zoom):
+    """precision_for_zoom(), made coarser until the box holds at most MAP_MAX_CLUSTERS cells."""
+    max_clusters = current_app.config['MAP_MAX_CLUSTERS']
+    boxes = split_antimeridian(south, west, north, east)
+    precision = precision_for_zoom(zoom)
+    while precision > 1 and sum(cell_count(*box, precision) for box in boxes) > max_clusters:
+        precision -= 1
+    return precision
+
+
+def _tile_clusters(tile, precision):
+    """Clusters of one tile (a geohash prefix), aggregated by the database in one GROUP BY."""
+    cell = func.substr(Issue.geohash, 1, precision)
+    rows = db.session.execute(
+        select(cell, Issue.status, Issue.category, func.count(Issue.id), func.sum(Issue.location_lat), func.sum(Issue.location_lng))
+        .where(geohash_filter([tile]))
+        .group_by(cell, Issue.status, Issue.category)
+    )
+    clusters = {}
+    for geohash, status, category, count, lat_sum, lng_sum in rows:
+        cluster = clusters.setdefault(geohash, {'geohash': geohash, 'count': 0, 'latSum': 0.0, 'lngSum': 0.0, 'byStatus': {}, 'byCategory': {}})
+        cluster['count'] += count
+        cluster['latSum'] += lat_sum
+        cluster['lngSum'] += lng_sum
+        cluster['byStatus'][status.value] = cluster['byStatus'].get(status.value, 0) + count
+        cluster['byCategory'][category] = cluster['byCategory'].get(category, 0) + count
+
+    result = []
+    for cluster in clusters.values():
+        count = cluster['count']
+        result.append({
+            'geohash': cluster['geohash'],
+            'count': count,
+            'lat': round(cluster.pop('latSum') / count, 6),
+            'lng': round(cluster.pop('lngSum') / count, 6),
+            'byStatus': cluster['byStatus'],
+            'byCategory': cluster['byCategory'],
+        })
+    return result
+
+
+def clusters_in_box(south, west, north, east, zoom):
+    """
+    Issue counts per geohash cell for the visible map area, with their centroid and
+    a breakdown by status and category. The payload is bounded by MAP_MAX_CLUSTERS
+    whatever the number of issues.
+
+    Clusters are computed and cached per tile: a covering geohash cell of the box, cut
+    to the cluster precision. Panning at the same zoom therefore reuses the tiles it
+    already has, and only clusters whose cell overlaps the box are returned.
+    """
+    precision = cluster_precision(south, west, north, east, zoom)
+    boxes = split_antimeridian(south, west, north, east)
+    tiles = sorted({cell[:precision] for box in boxes for cell in cover(*box)})
+
+    cache = get_response_cache()
+    ttl = current_app.config['MAP_CLUSTER_CACHE_TTL_SECONDS']
+    clusters = []
+    for tile in tiles:
+        compute = lambda tile=tile: _tile_clusters(tile, precision)
+        clusters.extend(cache.get_or_compute(f"clusters:{precision}:{tile}", compute, ttl) if cache else compute())
+
+    def overlaps(cluster):
+        cell_south, cell_west, cell_north, cell_east = bounds(cluster['geohash'])
+        return any(cell_south <= n and s <= cell_north and cell_west <= e and w <= cell_east for s, w, n, e in boxes)
+
+    visible = [cluster for cluster in clusters if overlaps(cluster)]
+    return {
+        "precision": precision,
+        "total": sum(cluster['count'] for cluster in visible),
+        "clusters": visible
+    }
+
+
+def map_response(results, truncated):
+    return {
+        "issues": [dict(issue.to_dict(), distance=round(meters, 1)) for issue, meters in results],
+        "truncated": truncated
+    }
@@ -0,0 +1,87 @@
+import base64
+import json
+from datetime import datetime
+from flask import request, current_app
+from sqlalchemy import or_, and_
+from ..models import Issue
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(issue):
+    """
+    Encodes the (created_at, id) position of an issue into an opaque cursor string.
+    """
+    raw = json.dumps([issue.created_at.isoformat(), issue.id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor produced by encode_cursor back into (created_at, id).
+    Raises InvalidCursor if the string was tampered with or is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, issue_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(issue_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor.")
+
+
+def wants_all_issues():
+    """True when the client explicitly opted into the legacy unpaginated response (?all=true)."""
+    return request.args.get('all', '').lower() in ['true', '1', 'yes']
+
+
+def get_page_size():
+    """
+    Reads the 'limit' query parameter, falling back to ISSUES_PAGE_SIZE and
+    capping it at ISSUES_MAX_PAGE_SIZE.
+    """
+    default_size = current_app.config['ISSUES_PAGE_SIZE']
+    max_size = current_app.config['ISSUES_MAX_PAGE_SIZE']
+    try:
+        limit = int(request.args.get('limit', default_size))
+    except ValueError:
+        limit = default_size
+    return max(1, min(limit, max_size))
+
+
+def page_variant():
+    """
+    Identifies the page issue_list_response() renders for this request, from the
+    normalized ?all, ?limit and ?cursor only, so unrelated query parameters don't
+    split cache entries or ETags.
+    """
+    if wants_all_issues():
+        return "all"
+    return f"limit={get_page_size()}&cursor={request.args.get('cursor', '')}"
+
+
+def paginate_issues(query):
+    """
+    Applies keyset pagination on (created_at, id), newest first, to an Issue query.
+
+    The position comes from the 'cursor' query parameter rather than an OFFSET,
+    so every page is a single index range scan no matter how deep the client is.
+    Returns (issues, next_cursor); next_cursor is None on the last page.
+    """
+    limit = get_page_size()
+    cursor = request.args.get('cursor')
+
+    if cursor:
+        created_at, issue_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Issue.created_at < created_at,
+            and_(Issue.created_at == created_at, Issue.id < issue_id)
+        ))
+
+    # Fetch one extra row to find out whether another page exists
+    issues = query.order_by(Issue.created_at.desc(), Issue.id.desc()).limit(limit + 1).all()
+    if len(issues) > limit:
+        issues = issues[:limit]
+        return issues, encode_cursor(issues[-1])
+    return issues, None
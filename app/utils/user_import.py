@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+from sqlalchemy import insert, select
+from ..extensions import db
+from ..models import User, UserRole
+from ..services.passwords import get_password_hasher
+
+REQUIRED_FIELDS = ['email', 'password', 'firstName', 'lastName', 'mobileNumber', 'role']
+
+
+class InvalidImportRow(ValueError):
+    """A row that cannot become a user. The message is reported back for that row."""
+
+
+def iter_import_records(stream, fmt):
+    """
+    Yields (row_number, record) from a binary stream of CSV (with a header row) or
+    of one JSON object per line, reading it incrementally. record is a dict, or an
+    InvalidImportRow for lines that could not be parsed.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        # Data rows are numbered from 1, like the JSON lines
+        for row_number, record in enumerate(csv.DictReader(text), start=1):
+            yield row_number, record
+        return
+
+    row_number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+            yield row_number, record
+        except ValueError as e:
+            yield row_number, InvalidImportRow(f"Invalid JSON: {e}")
+
+
+def _location(record):
+    """Accepts create_user's {"location": {"lat", "lng"}} or flat lat/lng CSV columns."""
+    location = record.get('location')
+    if isinstance(location, dict):
+        lat, lng = location.get('lat'), location.get('lng')
+    else:
+        lat, lng = record.get('lat'), record.get('lng')
+    if lat in (None, '') or lng in (None, ''):
+        return None, None
+    try:
+        return float(lat), float(lng)
+    except (TypeError, ValueError):
+        raise InvalidImportRow("Invalid location")
+
+
+def user_values(record):
+    """Validates a record the way create_user does and returns the users row for it, minus the password hash."""
+    if isinstance(record, InvalidImportRow):
+        raise record
+    if not all(record.get(field) for field in REQUIRED_FIELDS):
+        raise InvalidImportRow("Missing required fields")
+    try:
+        role = UserRole[record['role']]
+    except KeyError:
+        raise InvalidImportRow("Invalid role specified")
+    if role not in [UserRole.Worker, UserRole.Service]:
+        raise InvalidImportRow("Can only create users with Worker or Service role")
+
+    lat, lng = _location(record) if role == UserRole.Worker else (None, None)
+    return {
+        'email': str(record['email']).strip().lower(),
+        'first_name': record['firstName'],
+        'last_name': record['lastName'],
+        'mobile_number': str(record['mobileNumber']),
+        'role': role,
+        'location_lat': lat,
+        'location_lng': lng,
+    }
+
+
+def import_users(records, batch_size=500):
+    """
+    Creates users from (row_number, record) pairs in batches of batch_size: one
+    query finds the emails of a batch that already exist, the passwords are
+    hashed in parallel and the rows are inserted with a single executemany.
+    Everything runs in the session's transaction, the caller commits.
+
+    Returns (results, created) where results has one {row, email, status[, message]}
+    per record and created holds the inserted rows, with their ids, for follow-up work.
+    """
+    hasher = get_password_hasher()
+    results, created = [], []
+    seen_emails = set()
+
+    def flush(batch):
+        emails = [values['email'] for _, values, _ in batch]
+        existing = set(db.session.scalars(select(User.email).where(User.email.in_(emails))))
+        accepted = []
+        for row_number, values, password in batch:
+            if values['email'] in existing:
+                results.append({'row': row_number, 'email': values['email'], 'status': 'error',
+                                'message': "User with this email already exists"})
+            else:
+                accepted.append((row_number, values, password))
+        if not accepted:
+            return
+
+        hashes = hasher.hash_many([password for _, _, password in accepted])
+        rows = [dict(values, password_hash=password_hash) for (_, values, _), password_hash in zip(accepted, hashes)]
+        ids = dict(db.session.execute(insert(User).returning(User.email, User.id), rows).all())
+        for (row_number, values, _), row in zip(accepted, rows):
+            row['id'] = ids[values['email']]
+            created.append(row)
+            results.append({'row': row_number, 'email': values['email'], 'status': 'created'})
+
+    batch = []
+    for row_number, record in records:
+        try:
+            values = user_values(record)
+            if values['email'] in seen_emails:
+                raise InvalidImportRow("Duplicate email in this import")
+        except InvalidImportRow as e:
+            email = record.get('email') if isinstance(record, dict) else None
+            results.append({'row': row_number, 'email': email, 'status': 'error', 'message': str(e)})
+            continue
+        seen_emails.add(values['email'])
+        batch.append((row_number, values, str(record['password'])))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    results.sort(key=lambda result: result['row'])
+    return results, created
@@ -0,0 +1,321 @@
+"""
+Load test of the main API endpoints, with machine-readable results to diff
+between commits.
+
+Boots create_app() against SQLite (or --database-url, e.g. a local Postgres),
+seeds users, issues and comments, and replaces Gemini and Vercel Blob with
+stand-ins that answer after a fixed latency. Then, one endpoint at a time,
+--clients threads send --requests requests in total as the users who would:
+
+    login          POST /api/auth/login/                citizens
+    create_issue   POST /api/issues/ with one photo     citizens
+    list_issues    GET  /api/issues/?limit=50           the admin
+    get_issue      GET  /api/issues/<id>/               the admin
+    comment        POST /api/issues/<id>/comments/      each issue's reporter
+    status_update  PUT  /api/issues/<id>/status/        each issue's worker
+
+For each endpoint it reports throughput, p50/p95/p99 latency, errors and SQL
+statements per request, counted by the query inspector. --output writes the
+results as JSON with sorted keys, and --compare prints the change against an
+earlier run:
+
+    python -m benchmarks.api --output before.json
+    git checkout my-branch
+    python -m benchmarks.api --compare before.json --output after.json
+
+Requests and data come from --seed, so two runs send the same requests. App
+output is silenced unless --verbose is given.
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+from benchmarks.common import CATEGORIES, add_database_argument, boot_app, percentile, random_location, seed
+
+ENDPOINTS = ('login', 'create_issue', 'list_issues', 'get_issue', 'comment', 'status_update')
+STATUS_VALUES = ('Pending', 'In Progress', 'For Review', 'Resolved')
+# A statement shape repeated more often than this in one request is listed as an N+1 suspect
+N_PLUS_ONE_THRESHOLD = 5
+
+# Half the reports are clear enough for the local classifier, the rest go to the Gemini stand-in
+CLEAR_REPORTS = (
+    "Deep pothole in the road on {street}, cars swerve around it",
+    "Overflowing garbage bins and trash bags on {street}",
+    "Streetlight is out on {street}, the whole block is dark at night",
+    "Graffiti sprayed on the wall of the underpass at {street}",
+)
+VAGUE_REPORTS = (
+    "Something looks wrong near {street}, please have a look",
+    "Problem at {street} since last week",
+    "Residents on {street} keep complaining about this",
+)
+
+
+class FakeGeminiModel:
+    """Stands in for genai.GenerativeModel: waits `latency` seconds, then returns a valid categorization."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def generate_content(self, contents, generation_config=None):
+        time.sleep(self.latency)
+        prompt = contents[-1]
+        category = CATEGORIES[sum(map(ord, prompt)) % len(CATEGORIES)]
+        return SimpleNamespace(text=json.dumps({'category': category, 'title': f'{category} reported'}))
+
+
+class FakeBlobStorage:
+    """Stands in for Vercel Blob: reads the upload, waits `latency` seconds and returns a URL."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def put(self, filename, stream, content_type=None):
+        stream.read()
+        time.sleep(self.latency)
+        return f"https://blob.bench.local/{filename}"
+
+
+def make_token(app, user_id):
+    import jwt
+    now = datetime.datetime.now()
+    return 'Bearer ' + jwt.encode({'sub': user_id, 'iat': now, 'exp': now + datetime.timedelta(days=1)},
+                                  app.config['SECRET_KEY'], algorithm='HS256')
+
+
+class Scenario:
+    """The accounts and issues the requests are made with, and one request builder per endpoint."""
+
+    def __init__(self, app, ids, photo_bytes):
+        from sqlalchemy import select
+        from app.extensions import db
+        from app.models import Issue, User
+
+        self.app = app
+        self.photo = b'\xff\xd8' + bytes(photo_bytes)
+        admin_id = db.session.scalar(select(User.id).where(User.role == 'Admin'))
+        self.admin = make_token(app, admin_id)
+        emails = dict(db.session.execute(select(User.id, User.email).where(User.id.in_(ids['citizen_ids'][:500]))).all())
+        self.citizens = [(emails[user_id], make_token(app, user_id)) for user_id in ids['citizen_ids'][:500]]
+
+        # A fixed sample of issues, with the reporter and worker allowed to comment on and update each
+        rows = db.session.execute(
+            select(Issue.public_id, Issue.reporter_id, Issue.assigned_to_id).order_by(Issue.public_id).limit(2000)
+        ).all()
+        tokens = {}
+        token = lambda user_id: tokens.setdefault(user_id, make_token(app, user_id))
+        self.issues = [row.public_id for row in rows]
+        self.reported = [(row.public_id, token(row.reporter_id)) for row in rows]
+        self.assigned = [(row.public_id, token(row.assigned_to_id)) for row in rows if row.assigned_to_id]
+
+    def login(self, client, rng):
+        email, _ = rng.choice(self.citizens)
+        return client.post('/api/auth/login/', json={'email': email, 'password': 'benchmark'})
+
+    def create_issue(self, client, rng):
+        _, token = rng.choice(self.citizens)
+        lat, lng = random_location(rng)
+        template = rng.choice(CLEAR_REPORTS + VAGUE_REPORTS)
+        data = {
+            'description': template.format(street=f"{rng.randint(1, 9999)} {rng.choice(['Main', 'Oak', 'Elm', 'Park'])} Street"),
+            'location': json.dumps({'lat': lat, 'lng': lng}),
+            'photos': (io.BytesIO(self.photo), 'photo.jpg'),
+        }
+        return client.post('/api/issues/', data=data, headers={'Authorization': token}, content_type='multipart/form-data')
+
+    def list_issues(self, client, rng):
+        return client.get('/api/issues/?limit=50', headers={'Authorization': self.admin})
+
+    def get_issue(self, client, rng):
+        return client.get(f'/api/issues/{rng.choice(self.issues)}/', headers={'Authorization': self.admin})
+
+    def comment(self, client, rng):
+        issue_id, token = rng.choice(self.reported)
+        return client.post(f'/api/issues/{issue_id}/comments/', json={'text': f'Still there as of today ({rng.randint(1, 10**6)})'},
+                           headers={'Authorization': token})
+
+    def status_update(self, client, rng):
+        issue_id, token = rng.choice(self.assigned)
+        return client.put(f'/api/issues/{issue_id}/status/', json={'status': rng.choice(STATUS_VALUES)},
+                          headers={'Authorization': token})
+
+
+def drive(app, send, clients, requests, seed_value):
+    """Sends `requests` requests over `clients` threads. Returns (elapsed, [(ms, status, statements)], suspects)."""
+    from app.services.query_inspector import QueryLog, get_query_inspector
+
+    inspector = get_query_inspector()
+    results, suspects = [], set()
+    lock = threading.Lock()
+
+    def client_loop(index):
+        client = app.test_client()
+        rng = random.Random(seed_value * 1000 + index)
+        local, local_suspects = [], set()
+        for _ in range(requests // clients + (index < requests % clients)):
+            with inspector.collect(QueryLog(N_PLUS_ONE_THRESHOLD)) as log:
+                start = time.perf_counter()
+                status = send(client, rng).status_code
+                elapsed = (time.perf_counter() - start) * 1000
+            local.append((elapsed, status, log.statements))
+            local_suspects.update(shape for shape, _, _ in log.n_plus_one_suspects())
+        with lock:
+            results.extend(local)
+            suspects.update(local_suspects)
+
+    threads = [threading.Thread(target=client_loop, args=(index,)) for index in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, results, suspects
+
+
+def summarize(elapsed, results, suspects):
+    latencies = [ms for ms, _, _ in results]
+    statements = [count for _, _, count in results]
+    statuses = {}
+    for _, status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'requests': len(results),
+        'errors': sum(count for status, count in statuses.items() if not status.startswith('2')),
+        'statuses': statuses,
+        'throughputRps': round(len(results) / elapsed, 2),
+        'latencyMs': {
+            'mean': round(statistics.fmean(latencies), 2),
+            'p50': round(percentile(latencies, 50), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'max': round(max(latencies), 2),
+        },
+        'queriesPerRequest': {
+            'mean': round(statistics.fmean(statements), 2),
+            'max': max(statements),
+        },
+        'nPlusOneSuspects': sorted(suspects),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def change(before, after):
+    if not before:
+        return '     n/a'
+    return f"{(after - before) / before:>+8.1%}"
+
+
+def print_table(endpoints, baseline=None):
+    header = f"{'endpoint':<15}{'req/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'queries':>9}{'errors':>8}"
+    if baseline:
+        header += f"{'Δ req/s':>10}{'Δ p50':>10}{'Δ p99':>10}{'Δ queries':>11}"
+    print(header)
+    for name, result in endpoints.items():
+        latency = result['latencyMs']
+        line = (f"{name:<15}{result['throughputRps']:>9.1f}{latency['p50']:>7.1f} ms{latency['p95']:>7.1f} ms"
+                f"{latency['p99']:>7.1f} ms{result['queriesPerRequest']['mean']:>9.1f}{result['errors']:>8}")
+        before = (baseline or {}).get(name)
+        if before:
+            line += (f"{change(before['throughputRps'], result['throughputRps']):>10}"
+                     f"{change(before['latencyMs']['p50'], latency['p50']):>10}"
+                     f"{change(before['latencyMs']['p99'], latency['p99']):>10}"
+                     f"{change(before['queriesPerRequest']['mean'], result['queriesPerRequest']['mean']):>11}")
+        print(line)
+    for name, result in endpoints.items():
+        for shape in result['nPlusOneSuspects']:
+            print(f"N+1 suspect in {name}: {shape[:160]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_database_argument(parser)
+    parser.add_argument('--users', type=int, default=2000, help="Citizens to seed.")
+    parser.add_argument('--workers', type=int, default=200)
+    parser.add_argument('--issues', type=int, default=20000)
+    parser.add_argument('--comments', type=int, default=3, help="Comments per seeded issue.")
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400, help="Requests per endpoint.")
+    parser.add_argument('--warmup', type=int, default=20, help="Uncounted requests per endpoint before measuring.")
+    parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument('--gemini-latency-ms', type=float, default=800)
+    parser.add_argument('--blob-latency-ms', type=float, default=150)
+    parser.add_argument('--photo-kb', type=int, default=256)
+    parser.add_argument('--rounds', type=int, default=10, help="bcrypt work factor of the seeded accounts.")
+    parser.add_argument('--pipeline', choices=('sync', 'async'), default='sync', help="ISSUE_PIPELINE_MODE.")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help="Write the results as JSON to this file.")
+    parser.add_argument('--compare', default=None, help="JSON from an earlier run to show the change against.")
+    parser.add_argument('--verbose', action='store_true', help="Keep the app's own output.")
+    args = parser.parse_args()
+
+    os.environ['BCRYPT_LOG_ROUNDS'] = str(args.rounds)
+    os.environ['ISSUE_PIPELINE_MODE'] = args.pipeline
+    # The inspector counts statements per request; its own reports are left to this script
+    os.environ['QUERY_INSPECTOR_ENABLED'] = 'true'
+    os.environ['QUERY_N_PLUS_ONE_THRESHOLD'] = str(10**9)
+    os.environ['SLOW_QUERY_MS'] = '0'
+    app = boot_app(args.database_url)
+    ids = seed(citizens=args.users, workers=args.workers, issues=args.issues, comments_per_issue=args.comments,
+               seed_value=args.seed)
+
+    from sqlalchemy import update
+    from app.extensions import db
+    from app.models import User
+    from app.services.passwords import PasswordHasher
+
+    # Every account gets a hash at the configured work factor, so logins don't trigger rehashing
+    db.session.execute(update(User).values(password_hash=PasswordHasher(rounds=args.rounds).hash('benchmark')))
+    db.session.commit()
+
+    app.extensions['gemini_model'] = FakeGeminiModel(args.gemini_latency_ms / 1000)
+    app.extensions['blob_storage'] = FakeBlobStorage(args.blob_latency_ms / 1000)
+    scenario = Scenario(app, ids, args.photo_kb * 1024)
+
+    endpoints = {}
+    for name in args.endpoints:
+        print(f"Running {name}...", file=sys.stderr)
+        with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO()):
+            # Not counted: starts the password pool, loads the classifier and fills connection pools
+            drive(app, getattr(scenario, name), args.clients, args.warmup, args.seed + 1)
+            endpoints[name] = summarize(*drive(app, getattr(scenario, name), args.clients, args.requests, args.seed))
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'database': db.engine.dialect.name,
+            'settings': {key: value for key, value in sorted(vars(args).items()) if key not in ('output', 'compare', 'verbose', 'database_url')},
+        },
+        'endpoints': endpoints,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['endpoints']
+    print_table(endpoints, baseline)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Offline evaluation of the local fast-path classifier.
+
+Reads (description, category) pairs from the issues table of --database-url, or
+generates a labelled synthetic corpus when there are none, holds out a share of
+them, and reports for the keyword-seeded model and for a model trained on the
+rest: accuracy against the stored categories, accuracy of the confident
+predictions only, the fraction of Gemini calls avoided, and per-call latency.
+
+    python -m benchmarks.classifier_eval --database-url postgresql://... --threshold 0.75
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import add_database_argument, boot_app, percentile
+
+SUBJECTS = {
+    "Pothole": ["a deep pothole", "a big hole in the asphalt", "cracked pavement", "a sinkhole", "potholes"],
+    "Garbage": ["overflowing trash bins", "piles of garbage", "illegally dumped rubbish", "litter everywhere", "an overflowing bin"],
+    "Streetlight": ["a broken streetlight", "the lamp post", "a flickering street lamp", "the lights", "an unlit lamppost"],
+    "Graffiti": ["graffiti", "spray paint tags", "vandalism with spray paint", "offensive graffiti", "a defaced mural"],
+    "Flooding": ["flooding", "a clogged drain", "a flooded underpass", "water pooling from the sewer", "a huge puddle"],
+    "Damaged Signage": ["a bent stop sign", "a knocked over street sign", "a faded road sign", "the signpost", "a missing sign"],
+    "Other": ["a fallen tree branch", "an abandoned car", "loud noise every night", "a dead animal", "a broken bench"],
+}
+PLACES = ["on Main Street", "near the school", "at the corner of Elm Road", "outside the library",
+          "along 5th Avenue", "in front of my house", "by the park", "on the bridge"]
+TAILS = ["", "Please fix it soon.", "It has been like this for weeks.", "It is dangerous for kids.",
+         "Cars keep swerving around it.", "Nobody has responded yet."]
+
+
+def synthetic_rows(count, rng):
+    """Template-built reports; a tenth mention two categories to keep the task honest."""
+    rows = []
+    for _ in range(count):
+        category = rng.choice(list(SUBJECTS))
+        text = f"There is {rng.choice(SUBJECTS[category])} {rng.choice(PLACES)}."
+        if rng.random() < 0.1:
+            other = rng.choice([c for c in SUBJECTS if c != category])
+            text += f" Also {rng.choice(SUBJECTS[other])} nearby."
+        rows.append((f"{text} {rng.choice(TAILS)}".strip(), category))
+    return rows
+
+
+def evaluate(label, classifier, rows):
+    correct = confident = confident_correct = 0
+    samples = []
+    for description, category in rows:
+        start = time.perf_counter()
+        prediction = classifier.predict(description)
+        samples.append((time.perf_counter() - start) * 1e6)
+        # Same rule as confident_prediction(), without predicting twice
+        accepted = prediction.category != "Other" and prediction.confidence >= classifier.threshold
+        correct += prediction.category == category
+        if accepted:
+            confident += 1
+            confident_correct += prediction.category == category
+
+    total = len(rows)
+    print(f"{label:<14}{correct / total:>10.1%}"
+          f"{confident_correct / confident if confident else 0:>14.1%}"
+          f"{confident / total:>14.1%}"
+          f"{percentile(samples, 50):>10.0f} us{percentile(samples, 99):>8.0f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_database_argument(parser)
+    parser.add_argument('--synthetic', type=int, default=5000, help="Reports to generate when the database has none.")
+    parser.add_argument('--holdout', type=float, default=0.2)
+    parser.add_argument('--threshold', type=float, default=0.75)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    boot_app(args.database_url)
+    from app.services.classifier import LocalClassifier, training_rows_from_database
+
+    rng = random.Random(args.seed)
+    rows = list(training_rows_from_database())
+    source = "issues table"
+    if not rows:
+        rows = synthetic_rows(args.synthetic, rng)
+        source = "synthetic corpus"
+    rng.shuffle(rows)
+    split = int(len(rows) * (1 - args.holdout))
+    train, test = rows[:split], rows[split:]
+
+    print(f"{len(rows)} labelled reports from the {source}: {len(train)} train, {len(test)} test, "
+          f"threshold {args.threshold}\n")
+    print(f"{'model':<14}{'accuracy':>10}{'confident acc':>14}{'LLM avoided':>14}{'p50':>13}{'p99':>11}")
+
+    evaluate("seeded", LocalClassifier(threshold=args.threshold), test)
+    trained = LocalClassifier(threshold=args.threshold)
+    start = time.perf_counter()
+    trained.train(train)
+    elapsed = time.perf_counter() - start
+    evaluate("trained", trained, test)
+    print(f"\nTraining on {len(train)} reports took {elapsed * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
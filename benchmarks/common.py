@@ -0,0 +1,153 @@
+"""
+Shared helpers for the benchmark scripts in this directory.
+
+Every script boots the real application through create_app() against the
+database given by --database-url (a throwaway SQLite file by default), so
+run them from the repository root, e.g. `python -m benchmarks.query_plans`.
+"""
+import math
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+CATEGORIES = ["Pothole", "Garbage", "Streetlight", "Graffiti", "Flooding", "Damaged Signage", "Other"]
+STATUSES = ["Pending", "InProgress", "ForReview", "Resolved"]
+
+# Roughly the extent of a mid-sized city, so distances look realistic
+CITY_CENTER = (40.7128, -74.0060)
+CITY_SPAN_DEGREES = 0.25
+
+
+def add_database_argument(parser):
+    parser.add_argument(
+        '--database-url',
+        default=None,
+        help="Database to benchmark against. Defaults to a fresh SQLite file in the temp directory."
+    )
+
+
+def boot_app(database_url=None):
+    """
+    Creates the Flask app against database_url, pushes an app context and makes
+    sure the schema exists. Returns the app.
+    """
+    if not database_url:
+        database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='civic-bench-'), 'bench.db')
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('SECRET_KEY', 'benchmark-secret')
+
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    app.app_context().push()
+    db.create_all()
+    return app
+
+
+def random_location(rng):
+    return (
+        CITY_CENTER[0] + rng.uniform(-CITY_SPAN_DEGREES, CITY_SPAN_DEGREES),
+        CITY_CENTER[1] + rng.uniform(-CITY_SPAN_DEGREES, CITY_SPAN_DEGREES),
+    )
+
+
+def seed(citizens=1000, workers=200, issues=10000, comments_per_issue=2, days=730, seed_value=42, batch_size=5000):
+    """
+    Bulk-inserts a synthetic but realistically shaped dataset and returns a dict
+    with the ids that were created. Skips seeding if the users table is not empty.
+    """
+    from sqlalchemy import insert, select, func
+    from app.extensions import db
+    from app.models import User, Issue, Comment
+
+    if db.session.scalar(select(func.count()).select_from(User)):
+        return {
+            'citizen_ids': db.session.scalars(select(User.id).where(User.role == 'Citizen')).all(),
+            'worker_ids': db.session.scalars(select(User.id).where(User.role == 'Worker')).all(),
+        }
+
+    rng = random.Random(seed_value)
+    # A single low-cost hash is enough, nobody logs in with these accounts
+    from app.extensions import bcrypt
+    password_hash = bcrypt.generate_password_hash('benchmark', rounds=4).decode('utf-8')
+
+    user_rows = [{
+        'email': f'citizen{i}@bench.local', 'password_hash': password_hash,
+        'first_name': 'Citizen', 'last_name': str(i), 'mobile_number': f'555{i:07d}', 'role': 'Citizen',
+    } for i in range(citizens)]
+    for i in range(workers):
+        lat, lng = random_location(rng)
+        user_rows.append({
+            'email': f'worker{i}@bench.local', 'password_hash': password_hash,
+            'first_name': 'Worker', 'last_name': str(i), 'mobile_number': f'777{i:07d}', 'role': 'Worker',
+            'location_lat': lat, 'location_lng': lng,
+        })
+    user_rows.append({
+        'email': 'admin@bench.local', 'password_hash': password_hash,
+        'first_name': 'Admin', 'last_name': 'Bench', 'mobile_number': '5550000000', 'role': 'Admin',
+    })
+    db.session.execute(insert(User), user_rows)
+    db.session.commit()
+
+    citizen_ids = db.session.scalars(select(User.id).where(User.role == 'Citizen')).all()
+    worker_ids = db.session.scalars(select(User.id).where(User.role == 'Worker')).all()
+
+    now = datetime.utcnow()
+    issue_rows, comment_rows = [], []
+
+    def flush():
+        if issue_rows:
+            db.session.execute(insert(Issue), issue_rows)
+        if comment_rows:
+            db.session.execute(insert(Comment), comment_rows)
+        issue_rows.clear()
+        comment_rows.clear()
+
+    for i in range(issues):
+        # Multiplying by an odd constant is a bijection mod 2**32, so ids never collide
+        public_id = f'{(i * 2654435761 + seed_value) % 2**32:08x}'
+        reporter_id = rng.choice(citizen_ids)
+        worker_id = rng.choice(worker_ids) if worker_ids and rng.random() < 0.8 else None
+        created_at = now - timedelta(seconds=rng.randint(0, days * 86400))
+        lat, lng = random_location(rng)
+        category = rng.choice(CATEGORIES)
+        issue_rows.append({
+            'public_id': public_id, 'title': f'{category} report', 'description': f'Synthetic {category.lower()} report',
+            'category': category, 'photo_urls': [], 'location_lat': lat, 'location_lng': lng,
+            'status': rng.choice(STATUSES), 'created_at': created_at,
+            'reporter_id': reporter_id, 'reporter_name': f'Citizen {reporter_id}',
+            'assigned_to_id': worker_id, 'assigned_to_name': f'Worker {worker_id}' if worker_id else None,
+        })
+        for c in range(comments_per_issue):
+            comment_rows.append({
+                'text': 'Synthetic comment', 'created_at': created_at + timedelta(hours=c + 1),
+                'author_id': reporter_id, 'author_name': f'Citizen {reporter_id}', 'issue_id': public_id,
+            })
+        if len(issue_rows) >= batch_size:
+            flush()
+    flush()
+    db.session.commit()
+    return {'citizen_ids': citizen_ids, 'worker_ids': worker_ids}
+
+
+def time_call(fn, repeat=20):
+    """Runs fn `repeat` times and returns (median_ms, min_ms)."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), min(samples)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
@@ -0,0 +1,84 @@
+"""
+Measures the throughput of the load-aware dispatch engine and how evenly it
+spreads work, compared with always picking the nearest worker.
+
+    python -m benchmarks.dispatch --issues 100000 --workers 500
+"""
+import argparse
+import random
+import statistics
+import time
+from collections import Counter
+
+from benchmarks.common import CITY_CENTER, CITY_SPAN_DEGREES
+from app.models import IssueStatus
+from app.services.dispatch import DispatchEngine, WorkerLoadCounters
+from app.services.worker_locator import InMemoryWorkerLocator
+
+
+def hotspot_point(rng, hotspots):
+    """Most reports cluster around a few hotspots, the rest are spread over the city."""
+    if rng.random() < 0.7:
+        lat, lng = rng.choice(hotspots)
+        return lat + rng.gauss(0, 0.005), lng + rng.gauss(0, 0.005)
+    return (CITY_CENTER[0] + rng.uniform(-CITY_SPAN_DEGREES, CITY_SPAN_DEGREES),
+            CITY_CENTER[1] + rng.uniform(-CITY_SPAN_DEGREES, CITY_SPAN_DEGREES))
+
+
+def describe(label, assignments, seconds):
+    loads = Counter(worker["id"] for _, worker in assignments)
+    counts = sorted(loads.values())
+    distances = [worker["distance"] for _, worker in assignments]
+    print(f"{label}")
+    print(f"    throughput:        {len(assignments) / seconds:,.0f} issues/s ({seconds:.2f}s)")
+    print(f"    workers used:      {len(loads)}")
+    print(f"    load max / median: {counts[-1]} / {statistics.median(counts):.0f}")
+    print(f"    distance p50:      {statistics.median(distances):,.0f} m")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--issues', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=500)
+    parser.add_argument('--hotspots', type=int, default=5)
+    parser.add_argument('--load-penalty', type=float, default=1000)
+    parser.add_argument('--single', type=int, default=5000,
+                        help="Number of issues to run through the one-at-a-time pick_worker path.")
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    hotspots = [hotspot_point(rng, [CITY_CENTER]) for _ in range(args.hotspots)]
+    workers = [(i, 'Worker', str(i),
+                CITY_CENTER[0] + rng.uniform(-CITY_SPAN_DEGREES, CITY_SPAN_DEGREES),
+                CITY_CENTER[1] + rng.uniform(-CITY_SPAN_DEGREES, CITY_SPAN_DEGREES))
+               for i in range(args.workers)]
+    issues = [(i, *hotspot_point(rng, hotspots), None) for i in range(args.issues)]
+
+    locator = InMemoryWorkerLocator(refresh_seconds=float('inf'))
+    locator.replace_all(workers)
+
+    def make_engine(penalty):
+        loads = WorkerLoadCounters(refresh_seconds=float('inf'))
+        loads.replace_all({})
+        return DispatchEngine(locator, loads, load_penalty_meters=penalty)
+
+    start = time.perf_counter()
+    nearest_only = make_engine(0).assign_bulk(issues)
+    describe("nearest worker only (bulk)", nearest_only, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    balanced = make_engine(args.load_penalty).assign_bulk(issues)
+    describe(f"load-aware, {args.load_penalty:.0f} m per open issue (bulk)", balanced, time.perf_counter() - start)
+
+    engine = make_engine(args.load_penalty)
+    single = []
+    start = time.perf_counter()
+    for issue_id, lat, lng, _ in issues[:args.single]:
+        worker = engine.pick_worker(lat, lng)
+        engine.loads.record_transition(None, None, worker["id"], IssueStatus.Pending)
+        single.append((issue_id, worker))
+    describe(f"load-aware, one issue at a time ({args.single} issues)", single, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
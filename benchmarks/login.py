@@ -0,0 +1,84 @@
+"""
+Login throughput under concurrency: N client threads hammer POST /api/auth/login/
+with bcrypt hashing on the request threads, in the process pool, and in the
+pool with a tight concurrency limit that sheds load with 503s.
+
+    python -m benchmarks.login --clients 16 --logins 200 --rounds 12
+"""
+import argparse
+import os
+import threading
+import time
+
+from benchmarks.common import add_database_argument, boot_app, percentile, seed
+
+
+def hammer(app, emails, clients, logins):
+    """Runs `logins` logins spread over `clients` threads. Returns (elapsed, latencies_ms, status counts)."""
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+    per_client = logins // clients
+
+    def client_loop(offset):
+        client = app.test_client()
+        for i in range(per_client):
+            email = emails[(offset * per_client + i) % len(emails)]
+            start = time.perf_counter()
+            status = client.post('/api/auth/login/', json={'email': email, 'password': 'benchmark'}).status_code
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    threads = [threading.Thread(target=client_loop, args=(c,)) for c in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_database_argument(parser)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    os.environ['BCRYPT_LOG_ROUNDS'] = str(args.rounds)
+    app = boot_app(args.database_url)
+    seed(citizens=100, workers=0, issues=0)
+
+    from sqlalchemy import update
+    from app.extensions import db
+    from app.models import User
+    from app.services.passwords import PasswordHasher
+
+    # Give every account a hash at the benchmarked work factor so logins don't trigger rehashing
+    password_hash = PasswordHasher(rounds=args.rounds).hash('benchmark')
+    db.session.execute(update(User).values(password_hash=password_hash))
+    db.session.commit()
+    emails = db.session.scalars(db.select(User.email)).all()
+
+    modes = (
+        ("request threads", dict(workers=0, max_pending=args.clients)),
+        ("process pool", dict(workers=args.workers, max_pending=args.clients)),
+        ("pool, shedding", dict(workers=args.workers, max_pending=args.workers, wait_seconds=0.05)),
+    )
+    print(f"{args.logins} logins from {args.clients} clients, bcrypt rounds {args.rounds}, {args.workers} hashing workers\n")
+    print(f"{'hashing':<18}{'logins/s':>10}{'p50':>12}{'p99':>12}   statuses")
+    for label, options in modes:
+        hasher = PasswordHasher(rounds=args.rounds, **options)
+        app.extensions['password_hasher'] = hasher
+        # Start the worker processes before timing
+        hasher.verify(password_hash, 'benchmark')
+        elapsed, latencies, statuses = hammer(app, emails, args.clients, args.logins)
+        ok = statuses.get(200, 0)
+        print(f"{label:<18}{ok / elapsed:>10.1f}{percentile(latencies, 50):>9.0f} ms{percentile(latencies, 99):>9.0f} ms"
+              f"   {dict(sorted(statuses.items()))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Times the public map queries against the geohash index: GET /api/issues/public/nearby
+at several radii and /public/bbox at several viewport sizes, next to a full scan
+that ranks every issue's coordinates in Python the way it would without the index.
+Then times /public/clusters at several zoom levels, cold and from the cache, and
+reports the payload size.
+
+    python -m benchmarks.map_queries --issues 200000
+    python -m benchmarks.map_queries --database-url postgresql://localhost/civic_bench
+"""
+import argparse
+import heapq
+import random
+
+from benchmarks.common import CITY_SPAN_DEGREES, add_database_argument, boot_app, random_location, seed, time_call
+
+RADII_METERS = [250, 1000, 5000]
+# Half-height of the viewport in degrees, roughly zoom 17, 15 and 13
+VIEWPORTS = [0.002, 0.01, 0.04]
+CLUSTER_ZOOMS = [4, 8, 10, 12]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_database_argument(parser)
+    parser.add_argument('--issues', type=int, default=100000)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = boot_app(args.database_url)
+    seed(citizens=500, workers=50, issues=args.issues, comments_per_issue=0)
+
+    from sqlalchemy import select
+    from app.extensions import db
+    from app.models import Issue
+    from app.services.worker_locator import haversine_meters
+
+    client = app.test_client()
+    rng = random.Random(7)
+    center = random_location(rng)
+
+    def full_scan(lat, lng, radius):
+        rows = db.session.execute(select(Issue.id, Issue.location_lat, Issue.location_lng)).all()
+        distances = ((haversine_meters(lat, lng, row[1], row[2]), row[0]) for row in rows)
+        return heapq.nsmallest(args.limit, (entry for entry in distances if entry[0] <= radius))
+
+    print(f"{'query':<24}{'returned':>10}{'indexed':>12}{'full scan':>12}")
+    for radius in RADII_METERS:
+        url = f'/api/issues/public/nearby/?lat={center[0]}&lng={center[1]}&radius={radius}&limit={args.limit}'
+        returned = len(client.get(url).get_json()['issues'])
+        indexed_ms, _ = time_call(lambda: client.get(url), args.repeat)
+        scan_ms, _ = time_call(lambda: full_scan(center[0], center[1], radius), max(1, args.repeat // 4))
+        print(f"{f'nearby {radius} m':<24}{returned:>10}{indexed_ms:>9.1f} ms{scan_ms:>9.1f} ms")
+
+    for half in VIEWPORTS:
+        south, north = center[0] - half, center[0] + half
+        west, east = center[1] - half * 1.5, center[1] + half * 1.5
+        url = f'/api/issues/public/bbox/?south={south}&west={west}&north={north}&east={east}&limit={args.limit}'
+        returned = len(client.get(url).get_json()['issues'])
+        indexed_ms, _ = time_call(lambda: client.get(url), args.repeat)
+        print(f"{f'bbox ±{half}°':<24}{returned:>10}{indexed_ms:>9.1f} ms{'':>12}")
+
+    from app.services.response_cache import get_response_cache
+    south, north = center[0] - CITY_SPAN_DEGREES, center[0] + CITY_SPAN_DEGREES
+    west, east = center[1] - CITY_SPAN_DEGREES, center[1] + CITY_SPAN_DEGREES
+    print(f"\n{'clusters':<24}{'clusters':>10}{'bytes':>10}{'cold':>12}{'cached':>12}")
+    for zoom in CLUSTER_ZOOMS:
+        url = f'/api/issues/public/clusters/?south={south}&west={west}&north={north}&east={east}&zoom={zoom}'
+
+        def cold():
+            cache = get_response_cache()
+            if cache is not None:
+                cache.invalidate()
+            return client.get(url)
+
+        response = cold()
+        cold_ms, _ = time_call(cold, max(1, args.repeat // 4))
+        cached_ms, _ = time_call(lambda: client.get(url), args.repeat)
+        print(f"{f'zoom {zoom}':<24}{len(response.get_json()['clusters']):>10}{len(response.data):>10}{cold_ms:>9.1f} ms{cached_ms:>9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Measures the overhead token_required adds to every authenticated request, with
+the principal cache disabled (one users query per request, as before) and
+enabled, across a population of users sending tokens at random.
+
+    python -m benchmarks.principal_cache --requests 20000 --users 500
+"""
+import argparse
+import datetime
+import random
+import time
+
+from sqlalchemy import event
+
+from benchmarks.common import add_database_argument, boot_app, percentile, seed
+
+
+def run(app, tokens, requests, rng):
+    from app.extensions import db
+    from app.utils.decorators import token_required
+
+    @token_required
+    def view(current_user):
+        return current_user.id
+
+    queries = [0]
+
+    def count(*args):
+        queries[0] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    samples = []
+    try:
+        for _ in range(requests):
+            headers = {'Authorization': 'Bearer ' + rng.choice(tokens)}
+            with app.test_request_context(headers=headers):
+                start = time.perf_counter()
+                view()
+                samples.append((time.perf_counter() - start) * 1e6)
+                # Like the end of a real request, so nothing is served from the session's identity map
+                db.session.remove()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    return samples, queries[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_database_argument(parser)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=500)
+    args = parser.parse_args()
+
+    app = boot_app(args.database_url)
+    ids = seed(citizens=args.users, workers=0, issues=0)
+
+    import jwt
+    now = datetime.datetime.now()
+    tokens = [jwt.encode({'sub': user_id, 'iat': now, 'exp': now + datetime.timedelta(days=1)},
+                         app.config['SECRET_KEY'], algorithm='HS256')
+              for user_id in ids['citizen_ids'][:args.users]]
+
+    from app.services.principal_cache import PrincipalCache
+
+    print(f"{args.requests} requests from {len(tokens)} users\n")
+    print(f"{'principal cache':<18}{'p50':>10}{'p99':>12}{'queries':>10}{'hit rate':>10}")
+    for label, ttl in (("disabled", 0), ("enabled", 30)):
+        cache = PrincipalCache(max_entries=app.config['PRINCIPAL_CACHE_SIZE'], ttl_seconds=ttl)
+        app.extensions['principal_cache'] = cache
+        samples, queries = run(app, tokens, args.requests, random.Random(1))
+        print(f"{label:<18}{percentile(samples, 50):>7.0f} us{percentile(samples, 99):>9.0f} us"
+              f"{queries:>10}{cache.stats()['hit_rate']:>10.1%}")
+
+
+if __name__ == '__main__':
+    main()
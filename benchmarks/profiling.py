@@ -0,0 +1,58 @@
+"""
+Measures what the profiling middleware costs per request: the same public
+endpoints are timed with PROFILING_ENABLED off, on, and on with every request
+running under cProfile (PROFILE_SAMPLE_RATE=1). The response cache is off so
+each request reaches the database.
+
+    python -m benchmarks.profiling --issues 5000 --requests 300
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks.common import CITY_CENTER, add_database_argument, boot_app, seed, time_call
+
+ENDPOINTS = (
+    ("recent feed", '/api/issues/public/recent/'),
+    ("nearby", f'/api/issues/public/nearby/?lat={CITY_CENTER[0]}&lng={CITY_CENTER[1]}&radius=2000'),
+)
+
+VARIANTS = (
+    ("off", {'PROFILING_ENABLED': 'false'}),
+    ("on", {'PROFILING_ENABLED': 'true', 'PROFILE_SAMPLE_RATE': '0'}),
+    ("cProfile", {'PROFILING_ENABLED': 'true', 'PROFILE_SAMPLE_RATE': '1'}),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_database_argument(parser)
+    parser.add_argument('--issues', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+
+    os.environ['RESPONSE_CACHE_BACKEND'] = 'none'
+    # Only requests slower than this are dumped; keep the dumps out of the way
+    os.environ['PROFILE_SLOW_REQUEST_MS'] = '1000'
+    os.environ['PROFILE_DIR'] = tempfile.mkdtemp(prefix='civic-bench-profiles-')
+    boot_app(args.database_url)
+    seed(citizens=200, workers=50, issues=args.issues, days=7)
+
+    from app import create_app
+
+    print(f"{'endpoint':<14}" + "".join(f"{label:>14}" for label, _ in VARIANTS))
+    clients = []
+    for _, env in VARIANTS:
+        os.environ.update(env)
+        clients.append(create_app().test_client())
+    for label, path in ENDPOINTS:
+        cells = []
+        for client in clients:
+            client.get(path)
+            median, _ = time_call(lambda: client.get(path), args.requests)
+            cells.append(f"{median:>11.2f} ms")
+        print(f"{label:<14}" + "".join(cells))
+
+
+if __name__ == '__main__':
+    main()
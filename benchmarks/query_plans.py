@@ -0,0 +1,139 @@
+"""
+Seeds a large synthetic dataset and compares query plans and timings of the
+hot issue/comment/worker queries with and without the secondary indexes
+declared on the models (see migration b7e2c91d4f3a).
+
+    python -m benchmarks.query_plans --issues 200000
+    python -m benchmarks.query_plans --database-url postgresql://localhost/civic_bench
+"""
+import argparse
+import json
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from benchmarks.common import add_database_argument, boot_app, seed, time_call
+
+PAGE = 51  # default page size plus the look-ahead row
+
+QUERIES = {
+    'all_issues_page': (
+        "SELECT * FROM issues ORDER BY created_at DESC, id DESC LIMIT :limit"
+    ),
+    'reported_issues_page': (
+        "SELECT * FROM issues WHERE reporter_id = :reporter_id "
+        "ORDER BY created_at DESC, id DESC LIMIT :limit"
+    ),
+    'assigned_issues_page': (
+        "SELECT * FROM issues WHERE assigned_to_id = :worker_id "
+        "ORDER BY created_at DESC, id DESC LIMIT :limit"
+    ),
+    'recent_public_issues': (
+        "SELECT * FROM issues WHERE created_at >= :since "
+        "ORDER BY created_at DESC, id DESC LIMIT :limit"
+    ),
+    'pending_issues_page': (
+        "SELECT * FROM issues WHERE status = 'Pending' "
+        "ORDER BY created_at DESC LIMIT :limit"
+    ),
+    'comments_for_page': (
+        "SELECT * FROM comments WHERE issue_id IN "
+        "(SELECT public_id FROM issues ORDER BY created_at DESC, id DESC LIMIT :limit) "
+        "ORDER BY issue_id, created_at"
+    ),
+    'workers_with_location': (
+        "SELECT id, location_lat, location_lng FROM users "
+        "WHERE role = 'Worker' AND location_lat IS NOT NULL AND location_lng IS NOT NULL"
+    ),
+}
+
+
+def managed_indexes():
+    from app.models import Issue, Comment, User
+    return [index for table in (Issue.__table__, Comment.__table__, User.__table__) for index in table.indexes]
+
+
+def explain(connection, sql, params):
+    if connection.dialect.name == 'postgresql':
+        rows = connection.execute(text("EXPLAIN (ANALYZE, BUFFERS) " + sql), params).fetchall()
+        return [row[0] for row in rows]
+    rows = connection.execute(text("EXPLAIN QUERY PLAN " + sql), params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def analyze(connection):
+    connection.execute(text("ANALYZE"))
+
+
+def run_round(connection, params, repeat):
+    results = {}
+    for name, sql in QUERIES.items():
+        statement = text(sql)
+        median_ms, min_ms = time_call(lambda: connection.execute(statement, params).fetchall(), repeat)
+        results[name] = {
+            'median_ms': round(median_ms, 3),
+            'min_ms': round(min_ms, 3),
+            'plan': explain(connection, sql, params),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_database_argument(parser)
+    parser.add_argument('--issues', type=int, default=100000)
+    parser.add_argument('--citizens', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=500)
+    parser.add_argument('--comments-per-issue', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help="Print the full report as JSON.")
+    args = parser.parse_args()
+
+    boot_app(args.database_url)
+    from app.extensions import db
+
+    print(f"Seeding {args.issues} issues...")
+    ids = seed(citizens=args.citizens, workers=args.workers, issues=args.issues,
+               comments_per_issue=args.comments_per_issue)
+    rng = random.Random(7)
+    params = {
+        'limit': PAGE,
+        'reporter_id': rng.choice(ids['citizen_ids']),
+        'worker_id': rng.choice(ids['worker_ids']),
+        'since': datetime.utcnow() - timedelta(days=7),
+    }
+
+    report = {}
+    with db.engine.connect() as connection:
+        for index in managed_indexes():
+            index.drop(bind=connection, checkfirst=True)
+        analyze(connection)
+        connection.commit()
+        report['before'] = run_round(connection, params, args.repeat)
+
+        for index in managed_indexes():
+            index.create(bind=connection, checkfirst=True)
+        analyze(connection)
+        connection.commit()
+        report['after'] = run_round(connection, params, args.repeat)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"\n{'query':<24}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+    for name in QUERIES:
+        before, after = report['before'][name]['median_ms'], report['after'][name]['median_ms']
+        speedup = before / after if after else float('inf')
+        print(f"{name:<24}{before:>14.3f}{after:>14.3f}{speedup:>9.1f}x")
+    for label in ('before', 'after'):
+        print(f"\n--- query plans {label} ---")
+        for name in QUERIES:
+            print(f"{name}:")
+            for line in report[label][name]['plan']:
+                print(f"    {line}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Load test for the public recent-issues feed: concurrent clients request
+GET /api/issues/public/recent/ for a fixed time with each response cache
+backend, and requests/sec and latency are reported.
+
+By default the app is driven in process through Flask's test client. Pass
+--url to load a running deployment instead (its cache settings then apply).
+
+    python -m benchmarks.recent_feed --issues 5000 --clients 16 --seconds 10
+    python -m benchmarks.recent_feed --url https://example.vercel.app/api/issues/public/recent/
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.common import add_database_argument, boot_app, percentile, seed
+
+
+def hammer(make_get, clients, seconds):
+    """Calls the function make_get() returns from `clients` threads for `seconds`. Returns (requests, latencies_ms, errors)."""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client_loop():
+        get = make_get()
+        local = []
+        failed = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status = get()
+            local.append((time.perf_counter() - start) * 1000)
+            failed += status != 200
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client_loop) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies), latencies, errors[0]
+
+
+def report(label, requests, latencies, errors, seconds):
+    print(f"{label:<12}{requests / seconds:>10.0f}{percentile(latencies, 50):>9.1f} ms{percentile(latencies, 99):>9.1f} ms{errors:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_database_argument(parser)
+    parser.add_argument('--url', default=None, help="Load a running server instead of the in-process app.")
+    parser.add_argument('--issues', type=int, default=5000, help="Issues to seed, all within the 7-day window.")
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{'cache':<12}{'req/s':>10}{'p50':>12}{'p99':>12}{'errors':>8}")
+    if args.url:
+        import requests
+
+        def make_get():
+            session = requests.Session()
+            return lambda: session.get(args.url).status_code
+
+        report("remote", *hammer(make_get, args.clients, args.seconds), args.seconds)
+        return
+
+    app = boot_app(args.database_url)
+    seed(citizens=200, workers=50, issues=args.issues, days=7)
+
+    from app.services.response_cache import MemoryResponseCache, SQLiteResponseCache
+
+    def make_get():
+        client = app.test_client()
+        return lambda: client.get('/api/issues/public/recent/').status_code
+
+    cache_path = os.path.join(tempfile.mkdtemp(prefix='civic-bench-'), 'responses.sqlite3')
+    backends = (
+        ("none", None),
+        ("memory", MemoryResponseCache()),
+        ("sqlite", SQLiteResponseCache(cache_path)),
+    )
+    for label, cache in backends:
+        app.config['RESPONSE_CACHE_BACKEND'] = 'none' if cache is None else label
+        app.extensions['response_cache'] = cache
+        report(label, *hammer(make_get, args.clients, args.seconds), args.seconds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Grows an issue corpus in steps and times GET /api/issues/search at each size,
+for a rare, a medium and a common word, next to a LIKE '%word%' scan over
+title and description. Descriptions are drawn from a Zipf-distributed
+vocabulary so term frequencies look like real text.
+
+    python -m benchmarks.search --steps 10000 50000 200000
+    python -m benchmarks.search --database-url postgresql://localhost/civic_bench
+"""
+import argparse
+import random
+import string
+
+from benchmarks.common import add_database_argument, boot_app, random_location, seed, time_call
+
+VOCABULARY_SIZE = 5000
+
+
+def make_vocabulary(rng):
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))))
+    return sorted(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_database_argument(parser)
+    parser.add_argument('--steps', type=int, nargs='+', default=[10000, 50000, 200000],
+                        help="Corpus sizes to measure at.")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = boot_app(args.database_url)
+    ids = seed(citizens=100, workers=0, issues=0)
+
+    from sqlalchemy import insert, select, func, or_
+    from app.extensions import db
+    from app.models import Issue, User
+
+    rng = random.Random(11)
+    vocabulary = make_vocabulary(rng)
+    weights = [1 / (rank + 1) for rank in range(VOCABULARY_SIZE)]
+    # Rank 2 is in most descriptions, rank 200 in a few percent, rank 4000 in a handful
+    probes = {'common': vocabulary[2], 'medium': vocabulary[200], 'rare': vocabulary[4000]}
+    admin = db.session.scalar(select(User).where(User.email == 'admin@bench.local'))
+
+    import datetime
+    import jwt
+    token = jwt.encode({'sub': admin.id, 'iat': datetime.datetime.now(), 'exp': datetime.datetime.now() + datetime.timedelta(hours=1)},
+                       app.config['SECRET_KEY'], algorithm='HS256')
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    print(f"{'issues':>9}{'word':>8}{'matches':>9}{'index':>12}{'LIKE scan':>12}")
+    count = 0
+    for target in sorted(args.steps):
+        rows = []
+        while count < target:
+            lat, lng = random_location(rng)
+            words = rng.choices(vocabulary, weights, k=12)
+            rows.append({
+                'public_id': f'{count:08x}', 'title': ' '.join(words[:3]).capitalize(), 'description': ' '.join(words),
+                'category': 'Other', 'photo_urls': [], 'location_lat': lat, 'location_lng': lng, 'status': 'Pending',
+                'reporter_id': rng.choice(ids['citizen_ids']), 'reporter_name': 'Citizen',
+            })
+            count += 1
+            if len(rows) >= 5000:
+                db.session.execute(insert(Issue), rows)
+                rows.clear()
+        if rows:
+            db.session.execute(insert(Issue), rows)
+        db.session.commit()
+
+        for label, word in probes.items():
+            url = f'/api/issues/search/?q={word}&limit=50'
+            like = f'%{word}%'
+            matches = db.session.scalar(select(func.count()).select_from(Issue).where(or_(Issue.title.like(like), Issue.description.like(like))))
+            index_ms, _ = time_call(lambda: client.get(url, headers=headers), args.repeat)
+            scan_ms, _ = time_call(lambda: db.session.execute(
+                select(Issue.id).where(or_(Issue.title.like(like), Issue.description.like(like))).order_by(Issue.id.desc()).limit(50)
+            ).all(), args.repeat)
+            print(f"{count:>9}{label:>8}{matches:>9}{index_ms:>9.1f} ms{scan_ms:>9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Measures cold starts the way a fresh serverless instance sees them. Each run is
+a new interpreter that imports the app, calls create_app() and serves one
+request, timing each step. Also lists the slowest imports from
+`python -X importtime`.
+
+Doubles as a regression guard: exits non-zero when a module from --forbid was
+imported by the time the first response was sent, or when the median cold
+start exceeds --max-cold-start-ms.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --path /api/issues/public/recent/ --method GET --max-cold-start-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Heavy SDKs a request that does not need them must not load
+DEFAULT_FORBIDDEN = ['google.generativeai', 'vercel_blob', 'pydantic', 'alembic', 'requests']
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+method, path = sys.argv[1], sys.argv[2]
+response = app.test_client().open(path, method=method, json={'email': 'nobody@example.com', 'password': 'x'} if method == 'POST' else None)
+done = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_response_ms': (done - created) * 1000,
+    'status': response.status_code,
+    'modules': sorted(sys.modules),
+}))
+"""
+
+
+def child_env(database_url):
+    env = dict(os.environ)
+    env.update({'DATABASE_URL': database_url, 'SECRET_KEY': env.get('SECRET_KEY', 'benchmark-secret'), 'PASSWORD_HASH_WORKERS': '0'})
+    env.pop('FLASK_RUN_FROM_CLI', None)
+    return env
+
+
+def slowest_imports(env, limit):
+    """The slowest imports of `from app import create_app; create_app()`, by cumulative microseconds."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'from app import create_app; create_app()'],
+        env=env, capture_output=True, text=True
+    )
+    totals = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nesting is two spaces per level after the separator's own space. Keep the top
+        # two levels: the app and what it imports, and what create_app() imports later
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            totals.append((int(cumulative), name.strip()))
+    return sorted(totals, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=None, help="Defaults to a fresh SQLite file with the schema created.")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--method', default='POST')
+    parser.add_argument('--path', default='/api/auth/login/')
+    parser.add_argument('--top', type=int, default=15, help="How many of the slowest imports to list.")
+    parser.add_argument('--forbid', nargs='*', default=DEFAULT_FORBIDDEN)
+    parser.add_argument('--max-cold-start-ms', type=float, default=None)
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if not database_url:
+        database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='civic-bench-'), 'bench.db')
+        subprocess.run(
+            [sys.executable, '-c', 'from app import create_app\nfrom app.extensions import db\n'
+                                   'app = create_app()\nwith app.app_context(): db.create_all()'],
+            env=child_env(database_url), check=True
+        )
+    env = child_env(database_url)
+
+    runs = []
+    for _ in range(args.runs):
+        result = subprocess.run([sys.executable, '-c', CHILD, args.method, args.path], env=env, capture_output=True, text=True, check=True)
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    print(f"{args.method} {args.path} -> {runs[0]['status']}, median of {args.runs} fresh processes")
+    for key in ('import_ms', 'create_app_ms', 'first_response_ms'):
+        print(f"  {key:<20}{statistics.median(run[key] for run in runs):>9.1f} ms")
+    cold_start = statistics.median(run['import_ms'] + run['create_app_ms'] + run['first_response_ms'] for run in runs)
+    print(f"  {'cold start':<20}{cold_start:>9.1f} ms")
+
+    print(f"\nSlowest imports (cumulative):")
+    for microseconds, name in slowest_imports(env, args.top):
+        print(f"  {name:<40}{microseconds / 1000:>9.1f} ms")
+
+    failures = []
+    loaded = set(runs[0]['modules'])
+    for module in args.forbid:
+        if module in loaded:
+            failures.append(f"{module} was imported before the first response")
+    if args.max_cold_start_ms is not None and cold_start > args.max_cold_start_ms:
+        failures.append(f"cold start {cold_start:.0f} ms exceeds {args.max_cold_start_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Compares the old one-at-a-time, read-everything upload loop with the concurrent
+upload_files_to_storage(), which buffers each photo in a spooled temp file, using
+the local filesystem backend plus an optional simulated network latency per upload.
+
+    python -m benchmarks.uploads --photos 6 --size-mb 4 --latency-ms 300
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+
+from werkzeug.datastructures import FileStorage
+
+from benchmarks.common import boot_app
+
+
+class SlowStorage:
+    """Wraps a storage backend and sleeps before every put, like a remote blob store would."""
+
+    def __init__(self, storage, latency_seconds):
+        self.storage = storage
+        self.latency_seconds = latency_seconds
+
+    def put(self, filename, stream, content_type=None):
+        time.sleep(self.latency_seconds)
+        return self.storage.put(filename, stream, content_type)
+
+
+def make_uploads(paths):
+    return [FileStorage(stream=open(path, 'rb'), filename=os.path.basename(path), content_type='image/jpeg')
+            for path in paths]
+
+
+def sequential_upload(storage, files):
+    """The previous implementation: read each file fully, then upload it, one after another."""
+    urls = []
+    for file in files:
+        data = file.read()
+        urls.append(storage.put(file.filename, io.BytesIO(data), file.content_type))
+    return urls
+
+
+def measure(label, fn, files):
+    tracemalloc.start()
+    start = time.perf_counter()
+    urls = fn(files)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    for file in files:
+        file.close()
+    print(f"{label:<28}{elapsed * 1000:>10.0f} ms{peak / 2**20:>12.1f} MiB peak{len(urls):>6} urls")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--photos', type=int, default=6)
+    parser.add_argument('--size-mb', type=float, default=4)
+    parser.add_argument('--latency-ms', type=float, default=300)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='civic-upload-bench-')
+    os.environ['BLOB_STORAGE_BACKEND'] = 'local'
+    os.environ['LOCAL_BLOB_DIR'] = os.path.join(workdir, 'blobs')
+    os.environ['UPLOAD_MAX_WORKERS'] = str(args.workers)
+    os.environ['UPLOAD_TIMEOUT_SECONDS'] = '120'
+    app = boot_app()
+
+    from app.routes.issues import upload_files_to_storage
+    from app.services.storage import get_blob_storage
+
+    storage = SlowStorage(get_blob_storage(), args.latency_ms / 1000)
+    app.extensions['blob_storage'] = storage
+
+    paths = []
+    for i in range(args.photos):
+        path = os.path.join(workdir, f'photo{i}.jpg')
+        with open(path, 'wb') as f:
+            f.write(os.urandom(int(args.size_mb * 2**20)))
+        paths.append(path)
+
+    print(f"{args.photos} photos x {args.size_mb} MiB, {args.latency_ms:.0f} ms latency, {args.workers} upload workers\n")
+    measure("sequential, whole-file", lambda files: sequential_upload(storage, files), make_uploads(paths))
+    measure("concurrent, buffered", upload_files_to_storage, make_uploads(paths))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Measures nearest-worker lookups against the in-memory k-d tree locator and
+checks every answer against a brute-force haversine scan.
+
+    python -m benchmarks.worker_locator --workers 50000 --queries 10000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks.common import CITY_CENTER, CITY_SPAN_DEGREES
+from app.services.worker_locator import InMemoryWorkerLocator, haversine_meters
+
+
+class FakeWorker:
+    """Stands in for a User row in upsert_worker()."""
+
+    def __init__(self, worker_id, lat, lng):
+        from app.models import UserRole
+        self.id = worker_id
+        self.first_name = 'Worker'
+        self.last_name = str(worker_id)
+        self.location_lat = lat
+        self.location_lng = lng
+        self.role = UserRole.Worker
+
+
+def random_point(rng, span):
+    return (CITY_CENTER[0] + rng.uniform(-span, span), CITY_CENTER[1] + rng.uniform(-span, span))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=10000)
+    parser.add_argument('--k', type=int, default=1)
+    parser.add_argument('--verify', type=int, default=200, help="Number of queries checked against brute force.")
+    parser.add_argument('--span', type=float, default=CITY_SPAN_DEGREES * 4,
+                        help="Half-width in degrees of the square workers are scattered over.")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    rows = [(i, 'Worker', str(i), *random_point(rng, args.span)) for i in range(args.workers)]
+    locator = InMemoryWorkerLocator(refresh_seconds=float('inf'))
+
+    start = time.perf_counter()
+    locator.replace_all(rows)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    queries = [random_point(rng, args.span) for _ in range(args.queries)]
+    samples = []
+    for lat, lng in queries:
+        start = time.perf_counter()
+        locator.nearest(lat, lng, k=args.k)
+        samples.append((time.perf_counter() - start) * 1e6)
+
+    mismatches = 0
+    for lat, lng in queries[:args.verify]:
+        expected = min(rows, key=lambda row: haversine_meters(lat, lng, row[3], row[4]))
+        if locator.nearest(lat, lng, k=1)[0]['id'] != expected[0]:
+            mismatches += 1
+
+    # Incremental updates: move 1% of the workers and query again
+    moved = max(1, args.workers // 100)
+    start = time.perf_counter()
+    for worker_id in rng.sample(range(args.workers), moved):
+        locator.upsert_worker(FakeWorker(worker_id, *random_point(rng, args.span)))
+    upsert_us = (time.perf_counter() - start) * 1e6 / moved
+    after_update = []
+    for lat, lng in queries[:1000]:
+        start = time.perf_counter()
+        locator.nearest(lat, lng, k=args.k)
+        after_update.append((time.perf_counter() - start) * 1e6)
+
+    samples.sort()
+    print(f"workers:               {args.workers}")
+    print(f"index build:           {build_ms:.1f} ms")
+    print(f"nearest (k={args.k}) p50:    {statistics.median(samples):.1f} us")
+    print(f"nearest (k={args.k}) p99:    {samples[int(len(samples) * 0.99) - 1]:.1f} us")
+    print(f"after {moved} moves p50:  {statistics.median(after_update):.1f} us")
+    print(f"upsert:                {upsert_us:.1f} us per worker")
+    print(f"brute-force mismatches: {mismatches}/{min(args.verify, len(queries))}")
+
+
+if __name__ == '__main__':
+    main()
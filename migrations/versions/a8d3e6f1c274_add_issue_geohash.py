@@ -0,0 +1,78 @@
+"""Add issues.geohash for map queries
+
+Revision ID: a8d3e6f1c274
+Revises: f0c4d2a9b613
+Create Date: 2026-10-17 16:05:12.604219
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d3e6f1c274'
+down_revision = 'f0c4d2a9b613'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode(lat, lng, precision=9):
+    """Same geohashes as app.utils.geohash.encode at the stored precision, frozen here for the backfill."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    code, bits = 0, 0
+    chars = []
+    while len(chars) < precision:
+        interval, value = (lng_range, lng) if bits % 2 == 0 else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        if value >= middle:
+            code = (code << 1) | 1
+            interval[0] = middle
+        else:
+            code <<= 1
+            interval[1] = middle
+        bits += 1
+        if bits % 5 == 0:
+            chars.append(BASE32[code])
+            code = 0
+    return "".join(chars)
+
+
+def upgrade():
+    with op.batch_alter_table('issues', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('geohash', sa.String(length=12), nullable=True))
+
+    # Geohashes are computed in Python so the same code fills them on Postgres and SQLite
+    issues = sa.table(
+        'issues',
+        sa.column('id', sa.Integer),
+        sa.column('location_lat', sa.Float),
+        sa.column('location_lng', sa.Float),
+        sa.column('geohash', sa.String),
+    )
+    # Backfilled in id-keyset batches, so only one batch of issues is in memory
+    bind = op.get_bind()
+    set_geohash = issues.update().where(issues.c.id == sa.bindparam('issue_id')).values(geohash=sa.bindparam('geohash'))
+    last_id = 0
+    while True:
+        batch = bind.execute(
+            sa.select(issues.c.id, issues.c.location_lat, issues.c.location_lng)
+            .where(issues.c.id > last_id).order_by(issues.c.id).limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        bind.execute(set_geohash, [{'issue_id': row.id, 'geohash': encode(row.location_lat, row.location_lng)} for row in batch])
+
+    with op.batch_alter_table('issues', schema=None) as batch_op:
+        batch_op.create_index('ix_issues_geohash', ['geohash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('issues', schema=None) as batch_op:
+        batch_op.drop_index('ix_issues_geohash')
+        batch_op.drop_column('geohash')
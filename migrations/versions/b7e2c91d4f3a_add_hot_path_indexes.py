@@ -0,0 +1,44 @@
+"""Add indexes for the hot issue, comment and worker query shapes
+
+Revision ID: b7e2c91d4f3a
+Revises: 5e9dcd162523
+Create Date: 2026-10-17 09:12:44.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2c91d4f3a'
+down_revision = '5e9dcd162523'
+branch_labels = None
+depends_on = None
+
+WORKER_LOCATION_PREDICATE = "role = 'Worker' AND location_lat IS NOT NULL AND location_lng IS NOT NULL"
+
+
+def upgrade():
+    op.create_index('ix_issues_created_at_id', 'issues',
+                    [sa.text('created_at DESC'), sa.text('id DESC')])
+    op.create_index('ix_issues_reporter_id_created_at', 'issues',
+                    ['reporter_id', sa.text('created_at DESC'), sa.text('id DESC')])
+    op.create_index('ix_issues_assigned_to_id_created_at', 'issues',
+                    ['assigned_to_id', sa.text('created_at DESC'), sa.text('id DESC')])
+    op.create_index('ix_issues_status_created_at', 'issues',
+                    ['status', sa.text('created_at DESC')])
+    op.create_index('ix_comments_issue_id_created_at', 'comments',
+                    ['issue_id', 'created_at'])
+    op.create_index('ix_users_worker_location', 'users',
+                    ['location_lat', 'location_lng'],
+                    postgresql_where=sa.text(WORKER_LOCATION_PREDICATE),
+                    sqlite_where=sa.text(WORKER_LOCATION_PREDICATE))
+
+
+def downgrade():
+    op.drop_index('ix_users_worker_location', table_name='users')
+    op.drop_index('ix_comments_issue_id_created_at', table_name='comments')
+    op.drop_index('ix_issues_status_created_at', table_name='issues')
+    op.drop_index('ix_issues_assigned_to_id_created_at', table_name='issues')
+    op.drop_index('ix_issues_reporter_id_created_at', table_name='issues')
+    op.drop_index('ix_issues_created_at_id', table_name='issues')
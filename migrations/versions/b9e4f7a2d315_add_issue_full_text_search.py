@@ -0,0 +1,98 @@
+"""Add issues.search_document and its full-text index
+
+Revision ID: b9e4f7a2d315
+Revises: a8d3e6f1c274
+Create Date: 2026-10-17 16:48:30.271905
+
+"""
+from collections import defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9e4f7a2d315'
+down_revision = 'a8d3e6f1c274'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+SEARCH_VECTOR_SQL = "to_tsvector('english', coalesce(search_document, ''))"
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS issues_fts USING fts5("
+    "search_document, content='issues', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS issues_fts_insert AFTER INSERT ON issues BEGIN "
+    "INSERT INTO issues_fts (rowid, search_document) VALUES (new.id, new.search_document); END",
+    "CREATE TRIGGER IF NOT EXISTS issues_fts_delete AFTER DELETE ON issues BEGIN "
+    "INSERT INTO issues_fts (issues_fts, rowid, search_document) VALUES ('delete', old.id, old.search_document); END",
+    "CREATE TRIGGER IF NOT EXISTS issues_fts_update AFTER UPDATE OF search_document ON issues BEGIN "
+    "INSERT INTO issues_fts (issues_fts, rowid, search_document) VALUES ('delete', old.id, old.search_document); "
+    "INSERT INTO issues_fts (rowid, search_document) VALUES (new.id, new.search_document); END",
+]
+
+
+def upgrade():
+    with op.batch_alter_table('issues', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_document', sa.Text(), nullable=True))
+
+    # Title, description and comments, in the same shape as models.search_document()
+    issues = sa.table(
+        'issues',
+        sa.column('id', sa.Integer),
+        sa.column('public_id', sa.String),
+        sa.column('title', sa.String),
+        sa.column('description', sa.Text),
+        sa.column('search_document', sa.Text),
+    )
+    comments = sa.table(
+        'comments',
+        sa.column('issue_id', sa.String),
+        sa.column('text', sa.Text),
+        sa.column('created_at', sa.DateTime),
+    )
+    # Backfill in id-keyset batches, so only one batch of issues and their comments is in memory
+    bind = op.get_bind()
+    set_document = issues.update().where(issues.c.id == sa.bindparam('issue_id')).values(search_document=sa.bindparam('document'))
+    last_id = 0
+    while True:
+        batch = bind.execute(
+            sa.select(issues.c.id, issues.c.public_id, issues.c.title, issues.c.description)
+            .where(issues.c.id > last_id).order_by(issues.c.id).limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        comment_texts = defaultdict(list)
+        for issue_id, text in bind.execute(
+            sa.select(comments.c.issue_id, comments.c.text)
+            .where(comments.c.issue_id.in_([row.public_id for row in batch]))
+            .order_by(comments.c.issue_id, comments.c.created_at)
+        ):
+            comment_texts[issue_id].append(text)
+        bind.execute(set_document, [
+            {'issue_id': row.id, 'document': "\n".join([row.title or "", row.description or "", *comment_texts[row.public_id]])}
+            for row in batch
+        ])
+
+    if bind.dialect.name == 'postgresql':
+        op.execute(f"CREATE INDEX ix_issues_search_document ON issues USING gin ({SEARCH_VECTOR_SQL})")
+    elif bind.dialect.name == 'sqlite':
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+        op.execute("INSERT INTO issues_fts (issues_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_issues_search_document")
+    elif bind.dialect.name == 'sqlite':
+        for trigger in ('issues_fts_insert', 'issues_fts_delete', 'issues_fts_update'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS issues_fts")
+
+    with op.batch_alter_table('issues', schema=None) as batch_op:
+        batch_op.drop_column('search_document')
@@ -0,0 +1,26 @@
+"""Add processing_state to issues for the asynchronous pipeline
+
+Revision ID: c3a8f5e21b9d
+Revises: b7e2c91d4f3a
+Create Date: 2026-10-17 11:03:27.904512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a8f5e21b9d'
+down_revision = 'b7e2c91d4f3a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('issues', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('processing_state', sa.String(length=20), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('issues', schema=None) as batch_op:
+        batch_op.drop_column('processing_state')
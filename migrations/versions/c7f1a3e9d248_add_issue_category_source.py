@@ -0,0 +1,36 @@
+"""Add issues.category_source so the classifier only trains on trusted labels
+
+Revision ID: c7f1a3e9d248
+Revises: b9e4f7a2d315
+Create Date: 2026-10-17 18:21:06.514870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7f1a3e9d248'
+down_revision = 'b9e4f7a2d315'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('issues', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('category_source', sa.String(length=20), nullable=True))
+
+    # Every issue before this revision was categorized by Gemini, except the
+    # placeholder stored when the call failed or the issue is still processing
+    issues = sa.table('issues', sa.column('category', sa.String), sa.column('title', sa.String),
+                      sa.column('category_source', sa.String))
+    op.execute(
+        issues.update()
+        .where(sa.not_(sa.and_(issues.c.category == 'Other', issues.c.title == 'Issue Report')))
+        .values(category_source='gemini')
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('issues', schema=None) as batch_op:
+        batch_op.drop_column('category_source')
@@ -0,0 +1,35 @@
+"""Add categorization_cache table
+
+Revision ID: d41f7a6c2e80
+Revises: c3a8f5e21b9d
+Create Date: 2026-10-17 12:41:09.216734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41f7a6c2e80'
+down_revision = 'c3a8f5e21b9d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('categorization_cache',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('title', sa.String(length=150), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    with op.batch_alter_table('categorization_cache', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_categorization_cache_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('categorization_cache', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_categorization_cache_created_at'))
+
+    op.drop_table('categorization_cache')
@@ -0,0 +1,41 @@
+"""Add duplicate_reports to keep reports folded into an existing issue
+
+Revision ID: e2d6b8f4a157
+Revises: c7f1a3e9d248
+Create Date: 2026-10-17 19:05:42.118306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2d6b8f4a157'
+down_revision = 'c7f1a3e9d248'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('duplicate_reports',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('issue_id', sa.String(length=8), nullable=False),
+    sa.Column('reporter_id', sa.Integer(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('location_lat', sa.Float(), nullable=False),
+    sa.Column('location_lng', sa.Float(), nullable=False),
+    sa.Column('similarity', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['issue_id'], ['issues.public_id'], ),
+    sa.ForeignKeyConstraint(['reporter_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('duplicate_reports', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_duplicate_reports_issue_id'), ['issue_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('duplicate_reports', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_duplicate_reports_issue_id'))
+
+    op.drop_table('duplicate_reports')
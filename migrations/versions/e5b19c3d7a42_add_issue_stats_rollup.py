@@ -0,0 +1,60 @@
+"""Add issue_stats rollup table
+
+Revision ID: e5b19c3d7a42
+Revises: d41f7a6c2e80
+Create Date: 2026-10-17 14:02:51.630118
+
+"""
+from collections import defaultdict
+from datetime import timedelta
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b19c3d7a42'
+down_revision = 'd41f7a6c2e80'
+branch_labels = None
+depends_on = None
+
+# The issuestatus enum stores member names, the rollup uses the values the API shows
+STATUS_VALUES = {'Pending': 'Pending', 'InProgress': 'In Progress', 'ForReview': 'For Review', 'Resolved': 'Resolved'}
+
+
+def upgrade():
+    issue_stats = op.create_table('issue_stats',
+    sa.Column('dimension', sa.String(length=20), nullable=False),
+    sa.Column('bucket', sa.String(length=64), nullable=False),
+    sa.Column('issue_count', sa.Integer(), nullable=False),
+    sa.Column('rating_sum', sa.Integer(), nullable=False),
+    sa.Column('rating_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('dimension', 'bucket')
+    )
+
+    # Backfill from the existing issues, streaming them so large tables fit in memory
+    totals = defaultdict(lambda: [0, 0, 0])
+    issues = sa.table('issues',
+        sa.column('created_at', sa.DateTime), sa.column('status', sa.String), sa.column('category', sa.String),
+        sa.column('assigned_to_id', sa.Integer), sa.column('rating', sa.Integer))
+    # The options go on the statement: on the connection they would stick to Alembic's
+    # shared connection and turn every later statement into a server-side cursor
+    rows = op.get_bind().execute(sa.select(issues.c.created_at, issues.c.status, issues.c.category,
+                                           issues.c.assigned_to_id, issues.c.rating).execution_options(yield_per=5000))
+    for created_at, status, category, assigned_to_id, rating in rows:
+        week = created_at.date() - timedelta(days=created_at.weekday())
+        for key in (('total', ''), ('status', STATUS_VALUES.get(status, status)), ('category', category),
+                    ('worker', str(assigned_to_id or '')), ('week', week.isoformat())):
+            totals[key][0] += 1
+            if rating is not None:
+                totals[key][1] += rating
+                totals[key][2] += 1
+
+    if totals:
+        op.bulk_insert(issue_stats, [
+            {'dimension': dimension, 'bucket': bucket, 'issue_count': count, 'rating_sum': rating_sum, 'rating_count': rating_count}
+            for (dimension, bucket), (count, rating_sum, rating_count) in totals.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('issue_stats')
@@ -0,0 +1,59 @@
+import datetime
+import os
+import tempfile
+
+import pytest
+
+# Settings must be in place before the app package reads them
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='civic-tests-'), 'test.db')
+os.environ.setdefault('SECRET_KEY', 'test-secret')
+os.environ['BLOB_STORAGE_BACKEND'] = 'local'
+os.environ['PASSWORD_HASH_WORKERS'] = '0'
+os.environ['BCRYPT_LOG_ROUNDS'] = '4'
+# Every request loads its user, so query counts don't depend on what ran before
+os.environ['PRINCIPAL_CACHE_TTL_SECONDS'] = '0'
+os.environ['RESPONSE_CACHE_BACKEND'] = 'none'
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+@pytest.fixture(scope='session')
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(scope='session')
+def make_user(app):
+    from app.extensions import db
+    from app.models import User
+
+    def make_user(email, role, lat=None, lng=None):
+        user = User(email=email, first_name=email.split('@')[0], last_name='Test', mobile_number='5550000',
+                    role=role, location_lat=lat, location_lng=lng)
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make_user
+
+
+@pytest.fixture(scope='session')
+def auth_header(app):
+    import jwt
+
+    def auth_header(user):
+        now = datetime.datetime.now()
+        token = jwt.encode({'sub': user.id, 'iat': now, 'exp': now + datetime.timedelta(days=1)},
+                           app.config['SECRET_KEY'], algorithm='HS256')
+        return {'Authorization': 'Bearer ' + token}
+    return auth_header
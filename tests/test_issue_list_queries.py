@@ -0,0 +1,76 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+# The caller (or the recent feed's ETag aggregate), the user being listed (service
+# route only), the page of issues, and its comments with their authors
+LIST_QUERY_BUDGET = 4
+
+
+@contextmanager
+def count_queries():
+    """Counts the statements sent to the database inside the block."""
+    from app.extensions import db
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+@pytest.fixture(scope='module')
+def population(app, make_user):
+    from app.extensions import db
+    from app.models import Comment, Issue
+
+    citizen = make_user('lister@example.com', 'Citizen')
+    worker = make_user('fixer@example.com', 'Worker', 40.0, -74.0)
+    admin = make_user('boss@example.com', 'Admin')
+    service = make_user('bot@example.com', 'Service')
+    commenters = [citizen, worker, admin]
+
+    now = datetime.now(timezone.utc)
+    for i in range(60):
+        issue = Issue(
+            public_id=f'list{i:04d}', title=f'Issue {i}', description=f'Report number {i}', category='Pothole',
+            photo_urls=[], location_lat=40.0, location_lng=-74.0, created_at=now - timedelta(minutes=i),
+            reporter_id=citizen.id, reporter_name='Lister Test',
+            assigned_to_id=worker.id, assigned_to_name='Fixer Test',
+        )
+        for j, author in enumerate(commenters):
+            issue.comments.append(Comment(text=f'Comment {j}', created_at=now, author_id=author.id,
+                                          author_name='Someone', issue_id=issue.public_id))
+        db.session.add(issue)
+    db.session.commit()
+    return {'citizen': citizen, 'worker': worker, 'admin': admin, 'service': service}
+
+
+@pytest.mark.parametrize('path, role', [
+    ('/api/issues/', 'admin'),
+    ('/api/issues/reported/', 'citizen'),
+    ('/api/issues/assigned/', 'worker'),
+    ('/api/issues/user/lister@example.com/', 'service'),
+    ('/api/issues/public/recent/', None),
+])
+def test_list_queries_do_not_grow_with_page_size(client, auth_header, population, path, role):
+    headers = auth_header(population[role]) if role else {}
+    counts = {}
+    for page_size in (1, 50):
+        with count_queries() as statements:
+            response = client.get(f'{path}?limit={page_size}', headers=headers)
+        assert response.status_code == 200
+        issues = response.get_json()['issues']
+        assert len(issues) == page_size
+        assert all(len(issue['comments']) == 3 for issue in issues)
+        assert len(statements) <= LIST_QUERY_BUDGET, statements
+        counts[page_size] = len(statements)
+
+    assert counts[1] == counts[50]